@@ -3,18 +3,31 @@ B站API接口
 """
 
 import re
+import functools
 import hashlib
+import json
+import threading
 import time
 import urllib.parse
-from typing import Any, Dict, List, Optional, cast, Tuple
+from collections import deque
+from contextlib import aclosing
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, cast, Tuple
 from utils.types import *
 from utils.fetcher import Fetcher
 from utils.logger import Logger
+from utils.constants import CACHE_DIR
 
 # 风控检测特殊指令
 RISK_CONTROL_DETECTED = "RISK_CONTROL_DETECTED"
 import asyncio
 
+# 分页列表并发获取的窗口大小（同时在途的页面请求数，实际速率仍由共享限速器控制）
+LIST_PAGE_WINDOW = 4
+
+# 视频列表接口（x/series/archives）允许的最大每页数量
+SERIES_PAGE_SIZE = 100
+
 
 # 移除format_avid_dict函数，直接使用avid.to_dict()
 
@@ -59,7 +72,8 @@ async def get_ugc_video_list(fetcher: Fetcher, avid: AvId) -> VideoListData:
             "pubdate": video_pubdate,
             "path": Path(video_title),  # 多P视频使用视频标题作为文件夹
             "is_multi_part": True,  # 标记为多P视频
-            "total_parts": total_pages  # 记录总分P数量
+            "total_parts": total_pages,  # 记录总分P数量
+            "duration": sum(int(page.get("duration") or 0) for page in page_data)  # 所有分P的总时长
         }]
     else:
         # 单P视频，使用原有逻辑
@@ -77,7 +91,8 @@ async def get_ugc_video_list(fetcher: Fetcher, avid: AvId) -> VideoListData:
             "pubdate": video_pubdate,
             "path": Path(f"{video_title}/{part_name}"),
             "is_multi_part": False,  # 标记为单P视频
-            "total_parts": 1
+            "total_parts": 1,
+            "duration": int(item.get("duration") or 0)
         }]
     
     return {"title": video_title, "videos": videos}
@@ -188,68 +203,151 @@ async def get_favourite_info(fetcher: Fetcher, fid: FId) -> Dict[str, Any]:
     return res_json["data"]
 
 
-async def get_favourite_avids(fetcher: Fetcher, fid: FId) -> List[AvId] | str:
-    """获取收藏夹视频URL列表（仅获取ID，不获取详细信息）- 带重试机制"""
-    Logger.info(f"获取收藏夹 {fid} 的视频列表...")
+async def get_favourite_fingerprint(fetcher: Fetcher, fid: FId) -> Optional[Dict[str, Any]]:
+    """获取收藏夹的变化指纹（收藏数和修改时间），失败返回None"""
+    api = f"https://api.bilibili.com/x/v3/fav/folder/info?media_id={fid}"
+    res_json = await fetcher.fetch_json(api, bypass_cache=True)
+    if not res_json or res_json.get("code") != 0:
+        return None
     
-    all_avids = []
-    pn = 1
-    ps = 20  # 每页数量
-    max_retries = 3
-    base_delay = 1.0
+    data = res_json["data"]
+    return {"media_count": data.get("media_count"), "mtime": data.get("mtime")}
+
+
+async def _iter_pages(fetch_page: Callable[[int], Awaitable[Any]], page_numbers: range) -> AsyncIterator[Any]:
+    """在有界窗口内预取分页，按页码顺序逐页产出结果（实际请求速率由共享限速器控制）
     
-    while True:
-        api = f"https://api.bilibili.com/x/v3/fav/resource/list?media_id={fid}&pn={pn}&ps={ps}"
-        
-        # 带重试的请求
-        success = False
-        for attempt in range(max_retries):
-            try:
-                res_json = await fetcher.fetch_json(api)
-                
-                if not res_json or res_json.get("code") != 0:
-                    if pn == 1 and attempt == max_retries - 1:  # 第一页失败，抛出异常
-                        raise Exception(f"无法获取收藏夹 {fid} 视频列表")
-                    elif pn > 1:  # 后续页面失败，可能是没有更多数据
-                        Logger.info(f"页面 {pn} 获取失败，结束获取")
-                        success = True
-                        break
-                    else:
-                        delay = base_delay * (attempt + 1)
-                        Logger.warning(f"获取收藏夹页面失败 (页面 {pn}，尝试 {attempt + 1}/{max_retries})，等待 {delay:.1f} 秒后重试...")
-                        await asyncio.sleep(delay)
-                        continue
-                
-                success = True
+    提前结束迭代时取消尚未完成的页面请求
+    """
+    numbers = iter(page_numbers)
+    pending: Deque[asyncio.Future] = deque()
+    try:
+        for pn in numbers:
+            pending.append(asyncio.ensure_future(fetch_page(pn)))
+            if len(pending) >= LIST_PAGE_WINDOW:
                 break
-                
-            except Exception as e:
-                Logger.warning(f"获取收藏夹异常 (页面 {pn}，尝试 {attempt + 1}/{max_retries}): {e}")
-                # 任何获取视频列表的失败都返回特殊指令
+        while pending:
+            result = await pending.popleft()
+            # 产出当前页之前先补充窗口，调用方处理结果时后续页面仍在获取
+            next_pn = next(numbers, None)
+            if next_pn is not None:
+                pending.append(asyncio.ensure_future(fetch_page(next_pn)))
+            yield result
+    finally:
+        for future in pending:
+            future.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def _collect_avid_pages(pages: AsyncIterator[List[AvId] | str]) -> List[AvId] | str:
+    """合并逐页产出的视频ID，任一页面返回风控指令时返回风控指令"""
+    all_avids: List[AvId] = []
+    async with aclosing(pages):
+        async for avids in pages:
+            if avids == RISK_CONTROL_DETECTED:
                 return RISK_CONTROL_DETECTED
-        
-        if not success:
-            break
-        
-        if res_json and res_json.get("code") == 0:
-            medias = res_json["data"]["medias"]
-            if not medias:
-                break
+            all_avids.extend(avids)
+    return all_avids
+
+
+async def _fetch_favourite_page(fetcher: Fetcher, fid: FId, pn: int, ps: int, beyond_total: bool = False) -> Optional[Dict[str, Any]] | str:
+    """获取收藏夹的一页（带重试），返回data
+    
+    收藏总数以内的页面失败时按相同的退避重试，仍然失败时返回风控指令（不能当作列表结束，否则列表被截断）；
+    beyond_total 为 True（超出收藏总数、按 has_more 继续获取的页面）时失败返回None，视为没有更多数据；
+    请求异常返回风控指令
+    """
+    api = f"https://api.bilibili.com/x/v3/fav/resource/list?media_id={fid}&pn={pn}&ps={ps}"
+    max_retries = 3
+    base_delay = 1.0
+    
+    for attempt in range(max_retries):
+        try:
+            res_json = await fetcher.fetch_json(api)
             
-            # 只添加视频ID
-            for video_info in medias:
-                all_avids.append(BvId(video_info["bvid"]))
+            if not res_json or res_json.get("code") != 0:
+                if beyond_total:  # 超出收藏总数的页面失败，可能是没有更多数据
+                    Logger.info(f"页面 {pn} 获取失败，结束获取")
+                    return None
+                elif attempt == max_retries - 1:  # 重试后仍失败，抛出异常
+                    raise Exception(f"无法获取收藏夹 {fid} 视频列表（页面 {pn}）")
+                else:
+                    delay = base_delay * (attempt + 1)
+                    Logger.warning(f"获取收藏夹页面失败 (页面 {pn}，尝试 {attempt + 1}/{max_retries})，等待 {delay:.1f} 秒后重试...")
+                    await asyncio.sleep(delay)
+                    continue
             
-            # 检查是否还有更多页面
-            data = res_json["data"]
-            if data.get("has_more", False):
-                pn += 1
-                # 添加延迟避免请求过快
-                await asyncio.sleep(0.5)
-            else:
-                break
-        else:
-            break
+            return res_json["data"]
+        
+        except Exception as e:
+            Logger.warning(f"获取收藏夹异常 (页面 {pn}，尝试 {attempt + 1}/{max_retries}): {e}")
+            # 任何获取视频列表的失败都返回特殊指令
+            return RISK_CONTROL_DETECTED
+    
+    return None
+
+
+def _favourite_page_medias(data: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return list((data or {}).get("medias") or [])
+
+
+async def iter_favourite_medias(fetcher: Fetcher, fid: FId) -> AsyncIterator[List[Dict[str, Any]] | str]:
+    """逐页获取收藏夹条目（接口原始的 media 字典，含标题、分P数、时长、UP主和首P的cid）
+    
+    第一页返回收藏总数后，后续页面在有界窗口内预取并按页码顺序逐页产出；
+    第一页总会产出（可能为空列表），收藏总数以内的任一页面获取失败时产出风控指令后结束
+    """
+    ps = 20  # 每页数量
+    data = await _fetch_favourite_page(fetcher, fid, 1, ps)
+    if data == RISK_CONTROL_DETECTED:
+        yield RISK_CONTROL_DETECTED
+        return
+    yield _favourite_page_medias(data)
+    if not (data and data.get("medias") and data.get("has_more", False)):
+        return
+    
+    pn = 1
+    media_count = (data.get("info") or {}).get("media_count", 0)
+    total_pages = (media_count + ps - 1) // ps  # 向上取整
+    async with aclosing(_iter_pages(lambda page: _fetch_favourite_page(fetcher, fid, page, ps), range(2, total_pages + 1))) as pages:
+        async for data in pages:
+            if data == RISK_CONTROL_DETECTED:
+                yield RISK_CONTROL_DETECTED
+                return
+            if not data or not data.get("medias"):
+                return
+            pn += 1
+            yield _favourite_page_medias(data)
+    
+    # 收藏总数与实际分页不一致时，按 has_more 继续逐页获取
+    while data.get("has_more", False):
+        pn += 1
+        data = await _fetch_favourite_page(fetcher, fid, pn, ps, beyond_total=True)
+        if data == RISK_CONTROL_DETECTED:
+            yield RISK_CONTROL_DETECTED
+            return
+        if not data or not data.get("medias"):
+            return
+        yield _favourite_page_medias(data)
+
+
+async def iter_favourite_avids(fetcher: Fetcher, fid: FId) -> AsyncIterator[List[AvId] | str]:
+    """逐页获取收藏夹视频ID（仅获取ID，不获取详细信息）"""
+    async with aclosing(iter_favourite_medias(fetcher, fid)) as pages:
+        async for medias in pages:
+            if medias == RISK_CONTROL_DETECTED:
+                yield RISK_CONTROL_DETECTED
+                return
+            yield [BvId(media["bvid"]) for media in medias]
+
+
+async def get_favourite_avids(fetcher: Fetcher, fid: FId) -> List[AvId] | str:
+    """获取收藏夹视频URL列表（仅获取ID，不获取详细信息）- 带重试机制"""
+    Logger.info(f"获取收藏夹 {fid} 的视频列表...")
+    
+    all_avids = await _collect_avid_pages(iter_favourite_avids(fetcher, fid))
+    if all_avids == RISK_CONTROL_DETECTED:
+        return RISK_CONTROL_DETECTED
     
     Logger.info(f"收藏夹 {fid} 共获取到 {len(all_avids)} 个视频ID")
     return all_avids
@@ -257,110 +355,83 @@ async def get_favourite_avids(fetcher: Fetcher, fid: FId) -> List[AvId] | str:
 
 async def get_favourite_avids_incremental(fetcher: Fetcher, fid: FId, existing_urls: set) -> List[AvId] | str:
     """增量获取收藏夹视频列表（支持实时查重，发现重复时停止获取）"""
+    medias = await get_favourite_medias_incremental(fetcher, fid, existing_urls)
+    if medias == RISK_CONTROL_DETECTED:
+        return RISK_CONTROL_DETECTED
+    return [BvId(media["bvid"]) for media in medias]
+
+
+async def get_favourite_medias_incremental(fetcher: Fetcher, fid: FId, existing_urls: set) -> List[Dict[str, Any]] | str:
+    """增量获取收藏夹条目（接口原始的 media 字典，支持实时查重，发现重复时停止获取）"""
     Logger.info(f"增量获取收藏夹 {fid} 的视频列表...")
     
-    new_avids = []
+    new_medias = []
     pn = 1
     ps = 20  # 每页数量
-    max_retries = 3
-    base_delay = 1.0
     duplicate_found = False
     
     while not duplicate_found:
-        api = f"https://api.bilibili.com/x/v3/fav/resource/list?media_id={fid}&pn={pn}&ps={ps}"
+        # 后续页面由上一页的 has_more 确认存在，失败时重试，仍然失败返回风控指令（不能当作列表结束，否则漏掉较早的视频）
+        data = await _fetch_favourite_page(fetcher, fid, pn, ps)
+        if data == RISK_CONTROL_DETECTED:
+            return RISK_CONTROL_DETECTED
         
-        # 带重试的请求
-        success = False
-        for attempt in range(max_retries):
-            try:
-                res_json = await fetcher.fetch_json(api)
-                
-                if not res_json or res_json.get("code") != 0:
-                    if pn == 1 and attempt == max_retries - 1:  # 第一页失败，抛出异常
-                        raise Exception(f"无法获取收藏夹 {fid} 视频列表")
-                    elif pn > 1:  # 后续页面失败，可能是没有更多数据
-                        Logger.info(f"页面 {pn} 获取失败，结束获取")
-                        success = True
-                        break
-                    else:
-                        delay = base_delay * (attempt + 1)
-                        Logger.warning(f"获取收藏夹页面失败 (页面 {pn}，尝试 {attempt + 1}/{max_retries})，等待 {delay:.1f} 秒后重试...")
-                        await asyncio.sleep(delay)
-                        continue
-                
-                success = True
-                break
-                
-            except Exception as e:
-                Logger.warning(f"获取收藏夹异常 (页面 {pn}，尝试 {attempt + 1}/{max_retries}): {e}")
-                # 任何获取视频列表的失败都返回特殊指令
-                return RISK_CONTROL_DETECTED
-        
-        if not success:
-            break
-        
-        if res_json and res_json.get("code") == 0:
-            medias = res_json["data"]["medias"]
+        if data:
+            medias = data.get("medias")
             if not medias:
                 break
             
             # 实时查重：检查当前页面的视频是否已存在
-            page_new_avids = []
             for video_info in medias:
                 bvid = BvId(video_info["bvid"])
                 video_url = bvid.to_url()
                 
                 if video_url in existing_urls:
                     # 发现重复，停止获取
-                    Logger.info(f"发现重复视频 {bvid}，停止获取（已获取 {len(new_avids)} 个新视频）")
+                    Logger.info(f"发现重复视频 {bvid}，停止获取（已获取 {len(new_medias)} 个新视频）")
                     duplicate_found = True
                     break
                 else:
                     # 新视频，添加到列表
-                    page_new_avids.append(bvid)
-                    new_avids.append(bvid)
+                    new_medias.append(video_info)
             
             # 如果当前页面有重复，不再处理后续页面
             if duplicate_found:
                 break
             
             # 检查是否还有更多页面
-            data = res_json["data"]
             if data.get("has_more", False):
                 pn += 1
-                # 添加延迟避免请求过快
-                await asyncio.sleep(0.5)
             else:
                 break
         else:
             break
     
     if duplicate_found:
-        Logger.info(f"增量获取完成：发现重复视频，共获取到 {len(new_avids)} 个新视频")
+        Logger.info(f"增量获取完成：发现重复视频，共获取到 {len(new_medias)} 个新视频")
     else:
-        Logger.info(f"增量获取完成：收藏夹 {fid} 共获取到 {len(new_avids)} 个新视频")
+        Logger.info(f"增量获取完成：收藏夹 {fid} 共获取到 {len(new_medias)} 个新视频")
     
-    return new_avids
+    return new_medias
 
 
-async def get_user_space_videos(fetcher: Fetcher, mid: MId) -> List[AvId] | str:
-    """获取用户空间视频URL列表（仅获取ID，不获取详细信息）- 带重试机制"""
-    Logger.info(f"获取用户 {mid} 的投稿视频列表...")
+async def _fetch_space_page(fetcher: Fetcher, mid: MId, pn: int, ps: int) -> Optional[Dict[str, Any]] | str:
+    """获取用户投稿的一页（带重试），返回data
     
+    第一页重试后仍失败返回None；后续页面（投稿总数以内）按相同的退避重试，
+    仍然失败时返回风控指令，不能当作列表结束，否则列表被截断；请求异常返回风控指令
+    """
+    space_videos_api = "https://api.bilibili.com/x/space/wbi/arc/search"
     max_retries = 10
     base_delay = 2.0
     
-    # 获取WBI签名信息
-    wbi_img = await get_wbi_img(fetcher)
-    
-    space_videos_api = "https://api.bilibili.com/x/space/wbi/arc/search"
-    ps = 30  # 每页数量
-    pn = 1
-    total_pages = 1
-    all_avids = []
-    
-    while pn <= total_pages:
-        # 构建参数
+    for attempt in range(max_retries):
+        # 构建参数并应用WBI签名（每次请求重新签名，时间戳保持最新）
+        try:
+            wbi_img = await get_wbi_img(fetcher)
+        except Exception as e:
+            Logger.warning(f"获取WBI签名信息失败: {e}")
+            return RISK_CONTROL_DETECTED
         params = {
             "mid": str(mid),
             "ps": ps,
@@ -368,78 +439,113 @@ async def get_user_space_videos(fetcher: Fetcher, mid: MId) -> List[AvId] | str:
             "pn": pn,
             "order": "pubdate",
         }
-        
-        # 应用WBI签名
         signed_params = encode_wbi(params, wbi_img)
         
-        # 带重试机制的请求
-        success = False
-        for attempt in range(max_retries):
-            try:
-                # 发起请求
-                res_json = await fetcher.fetch_json(space_videos_api, signed_params)
-                
-                if not res_json:
-                    raise Exception("无响应")
-                
-                if res_json.get("code") == -352:
-                    # 风控校验失败，需要重试
-                    delay = base_delay * (2 ** attempt)  # 指数退避
-                    Logger.warning(f"风控校验失败 (页面 {pn}，尝试 {attempt + 1}/{max_retries})，等待 {delay:.1f} 秒后重试...")
-                    await asyncio.sleep(delay)
-                    continue
-                elif res_json.get("code") != 0:
-                    if pn == 1 and attempt == max_retries - 1:
-                        Logger.error(f"无法获取用户 {mid} 的投稿视频: {res_json.get('message')}")
-                        return []
-                    elif pn > 1:
-                        # 后续页面失败，可能没有更多数据
-                        Logger.info(f"页面 {pn} 获取失败，结束获取")
-                        success = True
-                        break
-                    else:
-                        delay = base_delay * (attempt + 1)
-                        Logger.warning(f"请求失败 (页面 {pn}，尝试 {attempt + 1}/{max_retries})，等待 {delay:.1f} 秒后重试...")
-                        await asyncio.sleep(delay)
-                        continue
-                
-                # 成功获取数据
-                success = True
-                break
-                
-            except Exception as e:
-                Logger.warning(f"请求异常 (页面 {pn}，尝试 {attempt + 1}/{max_retries}): {e}")
-                # 任何获取视频列表的失败都返回特殊指令
-                return RISK_CONTROL_DETECTED
-        
-        if not success:
-            break
-        
-        # 解析数据，只获取BVID
-        if res_json and res_json.get("code") == 0:
-            data = res_json.get("data", {})
-            list_data = data.get("list", {})
-            vlist = list_data.get("vlist", [])
+        try:
+            # 发起请求
+            res_json = await fetcher.fetch_json(space_videos_api, signed_params)
             
-            if not vlist:
-                break
+            if not res_json:
+                raise Exception("无响应")
             
-            # 只添加视频ID
-            for video in vlist:
-                all_avids.append(BvId(video["bvid"]))
+            if res_json.get("code") == -352:
+                # 风控校验失败，可能是密钥已轮换，标记失效后重试
+                get_wbi_key_provider().invalidate(wbi_img)
+                delay = base_delay * (2 ** attempt)  # 指数退避
+                Logger.warning(f"风控校验失败 (页面 {pn}，尝试 {attempt + 1}/{max_retries})，等待 {delay:.1f} 秒后重试...")
+                await asyncio.sleep(delay)
+                continue
+            elif res_json.get("code") != 0:
+                if attempt == max_retries - 1:
+                    Logger.error(f"无法获取用户 {mid} 的投稿视频 (页面 {pn}): {res_json.get('message')}")
+                    break
+                delay = base_delay * (attempt + 1)
+                Logger.warning(f"请求失败 (页面 {pn}，尝试 {attempt + 1}/{max_retries})，等待 {delay:.1f} 秒后重试...")
+                await asyncio.sleep(delay)
+                continue
             
-            # 计算总页数
-            page_info = data.get("page", {})
-            total_count = page_info.get("count", 0)
-            total_pages = (total_count + ps - 1) // ps  # 向上取整
+            # 成功获取数据
+            return res_json.get("data", {})
             
-            Logger.debug(f"已获取第 {pn}/{total_pages} 页，共 {len(vlist)} 个视频ID")
-        
-        pn += 1
-        
-        # 添加延迟避免请求过快
-        if pn <= total_pages:
-            await asyncio.sleep(0.5)
+        except Exception as e:
+            Logger.warning(f"请求异常 (页面 {pn}，尝试 {attempt + 1}/{max_retries}): {e}")
+            # 任何获取视频列表的失败都返回特殊指令
+            return RISK_CONTROL_DETECTED
+    
+    return None if pn == 1 else RISK_CONTROL_DETECTED
+
+
+async def get_user_space_fingerprint(fetcher: Fetcher, mid: MId) -> Optional[Dict[str, Any]]:
+    """获取UP主投稿的变化指纹（投稿数和最新视频），只请求一条记录，失败返回None"""
+    try:
+        wbi_img = await get_wbi_img(fetcher)
+    except Exception as e:
+        Logger.debug(f"获取WBI签名信息失败: {e}")
+        return None
+    
+    params = {"mid": str(mid), "ps": 1, "tid": 0, "pn": 1, "order": "pubdate"}
+    res_json = await fetcher.fetch_json(
+        "https://api.bilibili.com/x/space/wbi/arc/search", encode_wbi(params, wbi_img), bypass_cache=True
+    )
+    if not res_json or res_json.get("code") != 0:
+        if res_json and res_json.get("code") == -352:
+            get_wbi_key_provider().invalidate(wbi_img)
+        return None
+    
+    data = res_json.get("data") or {}
+    vlist = data.get("list", {}).get("vlist", [])
+    return {"count": data.get("page", {}).get("count"), "newest": vlist[0]["bvid"] if vlist else None}
+
+
+def _space_page_avids(data: Optional[Dict[str, Any]]) -> List[AvId]:
+    vlist = (data or {}).get("list", {}).get("vlist", []) or []
+    return [BvId(video["bvid"]) for video in vlist]
+
+
+async def iter_user_space_videos(fetcher: Fetcher, mid: MId) -> AsyncIterator[List[AvId] | str]:
+    """逐页获取用户投稿视频ID（仅获取ID，不获取详细信息）
+    
+    第一页返回投稿总数后，后续页面在有界窗口内预取并按页码顺序逐页产出；
+    第一页总会产出（可能为空列表），投稿总数以内的任一页面获取失败时产出风控指令后结束
+    """
+    ps = 30  # 每页数量
+    data = await _fetch_space_page(fetcher, mid, 1, ps)
+    if data == RISK_CONTROL_DETECTED:
+        yield RISK_CONTROL_DETECTED
+        return
+    avids = _space_page_avids(data)
+    yield avids
+    if not avids:
+        return
+    
+    # 计算总页数
+    total_count = data.get("page", {}).get("count", 0)
+    total_pages = (total_count + ps - 1) // ps  # 向上取整
+    if total_pages <= 1:
+        return
+    Logger.debug(f"用户 {mid} 共 {total_count} 个投稿，{total_pages} 页")
+    
+    pn = 1
+    async with aclosing(_iter_pages(lambda page: _fetch_space_page(fetcher, mid, page, ps), range(2, total_pages + 1))) as pages:
+        async for data in pages:
+            if data == RISK_CONTROL_DETECTED:
+                yield RISK_CONTROL_DETECTED
+                return
+            avids = _space_page_avids(data)
+            if not avids:
+                return
+            pn += 1
+            Logger.debug(f"已获取第 {pn}/{total_pages} 页，共 {len(avids)} 个视频ID")
+            yield avids
+
+
+async def get_user_space_videos(fetcher: Fetcher, mid: MId) -> List[AvId] | str:
+    """获取用户空间视频URL列表（仅获取ID，不获取详细信息）- 带重试机制"""
+    Logger.info(f"获取用户 {mid} 的投稿视频列表...")
+    
+    all_avids = await _collect_avid_pages(iter_user_space_videos(fetcher, mid))
+    if all_avids == RISK_CONTROL_DETECTED:
+        return RISK_CONTROL_DETECTED
     
     Logger.info(f"用户 {mid} 共获取到 {len(all_avids)} 个投稿视频ID")
     return all_avids
@@ -449,13 +555,6 @@ async def get_user_space_videos_incremental(fetcher: Fetcher, mid: MId, existing
     """增量获取用户空间视频列表（支持实时查重，发现重复时停止获取）"""
     Logger.info(f"增量获取用户 {mid} 的投稿视频列表...")
     
-    max_retries = 10
-    base_delay = 2.0
-    
-    # 获取WBI签名信息
-    wbi_img = await get_wbi_img(fetcher)
-    
-    space_videos_api = "https://api.bilibili.com/x/space/wbi/arc/search"
     ps = 30  # 每页数量
     pn = 1
     total_pages = 1
@@ -463,102 +562,43 @@ async def get_user_space_videos_incremental(fetcher: Fetcher, mid: MId, existing
     duplicate_found = False
     
     while pn <= total_pages and not duplicate_found:
-        # 构建参数
-        params = {
-            "mid": str(mid),
-            "ps": ps,
-            "tid": 0,
-            "pn": pn,
-            "order": "pubdate",
-        }
+        data = await _fetch_space_page(fetcher, mid, pn, ps)
+        if data == RISK_CONTROL_DETECTED:
+            return RISK_CONTROL_DETECTED
+        if not data:
+            break
         
-        # 应用WBI签名
-        signed_params = encode_wbi(params, wbi_img)
+        # 解析数据并实时查重
+        vlist = data.get("list", {}).get("vlist", [])
+        if not vlist:
+            break
         
-        # 带重试机制的请求
-        success = False
-        for attempt in range(max_retries):
-            try:
-                # 发起请求
-                res_json = await fetcher.fetch_json(space_videos_api, signed_params)
-                
-                if not res_json:
-                    raise Exception("无响应")
-                
-                if res_json.get("code") == -352:
-                    # 风控校验失败，需要重试
-                    delay = base_delay * (2 ** attempt)  # 指数退避
-                    Logger.warning(f"风控校验失败 (页面 {pn}，尝试 {attempt + 1}/{max_retries})，等待 {delay:.1f} 秒后重试...")
-                    await asyncio.sleep(delay)
-                    continue
-                elif res_json.get("code") != 0:
-                    if pn == 1 and attempt == max_retries - 1:
-                        Logger.error(f"无法获取用户 {mid} 的投稿视频: {res_json.get('message')}")
-                        return []
-                    elif pn > 1:
-                        # 后续页面失败，可能没有更多数据
-                        Logger.info(f"页面 {pn} 获取失败，结束获取")
-                        success = True
-                        break
-                    else:
-                        delay = base_delay * (attempt + 1)
-                        Logger.warning(f"请求失败 (页面 {pn}，尝试 {attempt + 1}/{max_retries})，等待 {delay:.1f} 秒后重试...")
-                        await asyncio.sleep(delay)
-                        continue
-                
-                # 成功获取数据
-                success = True
+        # 实时查重：检查当前页面的视频是否已存在
+        page_new_avids = []
+        for video in vlist:
+            bvid = BvId(video["bvid"])
+            video_url = bvid.to_url()
+            
+            if video_url in existing_urls:
+                # 发现重复，停止获取
+                Logger.info(f"发现重复视频 {bvid}，停止获取（已获取 {len(new_avids)} 个新视频）")
+                duplicate_found = True
                 break
-                
-            except Exception as e:
-                Logger.warning(f"请求异常 (页面 {pn}，尝试 {attempt + 1}/{max_retries}): {e}")
-                # 任何获取视频列表的失败都返回特殊指令
-                return RISK_CONTROL_DETECTED
+            else:
+                # 新视频，添加到列表
+                page_new_avids.append(bvid)
+                new_avids.append(bvid)
         
-        if not success:
+        # 如果当前页面有重复，不再处理后续页面
+        if duplicate_found:
             break
         
-        # 解析数据并实时查重
-        if res_json and res_json.get("code") == 0:
-            data = res_json.get("data", {})
-            list_data = data.get("list", {})
-            vlist = list_data.get("vlist", [])
-            
-            if not vlist:
-                break
-            
-            # 实时查重：检查当前页面的视频是否已存在
-            page_new_avids = []
-            for video in vlist:
-                bvid = BvId(video["bvid"])
-                video_url = bvid.to_url()
-                
-                if video_url in existing_urls:
-                    # 发现重复，停止获取
-                    Logger.info(f"发现重复视频 {bvid}，停止获取（已获取 {len(new_avids)} 个新视频）")
-                    duplicate_found = True
-                    break
-                else:
-                    # 新视频，添加到列表
-                    page_new_avids.append(bvid)
-                    new_avids.append(bvid)
-            
-            # 如果当前页面有重复，不再处理后续页面
-            if duplicate_found:
-                break
-            
-            # 计算总页数
-            page_info = data.get("page", {})
-            total_count = page_info.get("count", 0)
-            total_pages = (total_count + ps - 1) // ps  # 向上取整
-            
-            Logger.debug(f"已获取第 {pn}/{total_pages} 页，新增 {len(page_new_avids)} 个视频ID")
+        # 计算总页数
+        total_count = data.get("page", {}).get("count", 0)
+        total_pages = (total_count + ps - 1) // ps  # 向上取整
         
+        Logger.debug(f"已获取第 {pn}/{total_pages} 页，新增 {len(page_new_avids)} 个视频ID")
         pn += 1
-        
-        # 添加延迟避免请求过快
-        if pn <= total_pages and not duplicate_found:
-            await asyncio.sleep(0.5)
     
     if duplicate_found:
         Logger.info(f"增量获取完成：发现重复视频，共获取到 {len(new_avids)} 个新视频")
@@ -568,24 +608,104 @@ async def get_user_space_videos_incremental(fetcher: Fetcher, mid: MId, existing
     return new_avids
 
 
-# WBI签名相关变量
-wbi_img_cache = None
+class WbiKeyProvider:
+    """WBI签名密钥（img_key/sub_key）提供者
+    
+    进程内所有任务共用一份密钥，持久化到缓存目录供下次运行使用。
+    密钥每天轮换，超过有效期后重新请求nav接口；签名校验失败时可标记失效。
+    """
+    
+    TTL = 6 * 3600  # 密钥有效期（秒）
+    MIN_REFRESH_INTERVAL = 300  # 两次因签名失败而刷新之间的最短间隔（秒），避免风控期间反复请求
+    
+    def __init__(self, cache_file: Path):
+        self.cache_file = cache_file
+        self._keys: Optional[Dict[str, str]] = None
+        self._fetched_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._load()
+    
+    def _load(self) -> None:
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("img_key") and data.get("sub_key"):
+                self._keys = {"img_key": data["img_key"], "sub_key": data["sub_key"]}
+                self._fetched_at = float(data.get("fetched_at", 0))
+        except (OSError, ValueError):
+            pass
+    
+    def _save(self) -> None:
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump(dict(self._keys or {}, fetched_at=self._fetched_at), f)
+        except OSError as e:
+            Logger.debug(f"保存WBI签名密钥失败: {e}")
+    
+    def _is_valid_locked(self) -> bool:
+        return self._keys is not None and time.time() - self._fetched_at < self.TTL
+    
+    async def get(self, fetcher: Fetcher) -> Dict[str, str]:
+        """获取有效的密钥，过期时刷新（同一时间只有一个请求在刷新，其余等待结果）"""
+        while True:
+            with self._lock:
+                if self._is_valid_locked():
+                    return dict(self._keys)
+                if not self._refreshing:
+                    self._refreshing = True
+                    break
+            await asyncio.sleep(0.2)
+        
+        try:
+            keys = await _request_wbi_keys(fetcher)
+            with self._lock:
+                self._keys = keys
+                self._fetched_at = time.time()
+                self._save()
+            return dict(keys)
+        finally:
+            with self._lock:
+                self._refreshing = False
+    
+    def invalidate(self, failed_keys: Optional[Dict[str, str]] = None) -> None:
+        """签名校验失败时标记密钥失效（密钥已被其他请求刷新或刚刚获取时忽略）"""
+        with self._lock:
+            if self._keys is None or (failed_keys is not None and failed_keys != self._keys):
+                return
+            if time.time() - self._fetched_at < self.MIN_REFRESH_INTERVAL:
+                return
+            Logger.debug("WBI签名密钥可能已轮换，下次签名前重新获取")
+            self._fetched_at = 0.0
+
 
-async def get_wbi_img(fetcher: Fetcher) -> Dict[str, str]:
-    """获取WBI签名所需的img_key和sub_key（带重试机制）"""
+_wbi_key_provider: Optional[WbiKeyProvider] = None
+_wbi_key_provider_lock = threading.Lock()
+
+
+def get_wbi_key_provider() -> WbiKeyProvider:
+    """获取全局WBI密钥提供者实例"""
+    global _wbi_key_provider
+    with _wbi_key_provider_lock:
+        if _wbi_key_provider is None:
+            _wbi_key_provider = WbiKeyProvider(CACHE_DIR / "wbi_keys.json")
+        return _wbi_key_provider
+
+
+async def _request_wbi_keys(fetcher: Fetcher) -> Dict[str, str]:
+    """请求nav接口获取WBI签名所需的img_key和sub_key（带重试机制）"""
     max_retries = 5
     base_delay = 1.0
     
     for attempt in range(max_retries):
         try:
-            # 先访问bilibili主页
-            await fetcher.get_redirected_url("https://www.bilibili.com")
-            
-            # 获取用户基本信息页面
+            # 获取用户基本信息页面（不走响应缓存，密钥的有效期由 WbiKeyProvider 管理）
             api = "https://api.bilibili.com/x/web-interface/nav"
-            res_json = await fetcher.fetch_json(api)
+            res_json = await fetcher.fetch_json(api, bypass_cache=True)
             
-            if not res_json or res_json.get("code") != 0:
+            # 未登录时 code 为 -101，但 wbi_img 仍然有效
+            if not res_json or not (res_json.get("data") or {}).get("wbi_img"):
                 if attempt < max_retries - 1:
                     delay = base_delay * (attempt + 1)
                     Logger.warning(f"获取WBI签名信息失败 (尝试 {attempt + 1}/{max_retries})，{delay:.1f}秒后重试...")
@@ -595,8 +715,7 @@ async def get_wbi_img(fetcher: Fetcher) -> Dict[str, str]:
                     raise Exception(f"获取WBI签名信息失败: {res_json.get('message') if res_json else 'No response'}")
             
             # 提取wbi相关字段
-            data = res_json["data"]
-            wbi_img_data = data["wbi_img"]
+            wbi_img_data = res_json["data"]["wbi_img"]
             img_url = wbi_img_data["img_url"]
             sub_url = wbi_img_data["sub_url"]
             
@@ -621,39 +740,19 @@ async def get_wbi_img(fetcher: Fetcher) -> Dict[str, str]:
     raise Exception("获取WBI签名信息失败")
 
 
+async def get_wbi_img(fetcher: Fetcher) -> Dict[str, str]:
+    """获取WBI签名所需的img_key和sub_key（全局共享，带有效期）"""
+    return await get_wbi_key_provider().get(fetcher)
+
+
 async def get_wbi_img_yutto_style(fetcher: Fetcher) -> Dict[str, str]:
-    """获取WBI签名所需的img_key和sub_key（yutto风格，使用缓存机制）"""
-    global wbi_img_cache
-    if wbi_img_cache is not None:
-        return wbi_img_cache
-    
-    # 获取用户基本信息页面
-    api = "https://api.bilibili.com/x/web-interface/nav"
-    res_json = await fetcher.fetch_json(api)
-    
-    if not res_json:
-        raise Exception("获取WBI签名信息失败: 无响应")
-    
-    if res_json.get("code") != 0:
-        raise Exception(f"获取WBI签名信息失败: {res_json.get('message', 'Unknown error')}")
-    
-    # 提取wbi相关字段
-    data = res_json["data"]
-    wbi_img_data = data["wbi_img"]
-    img_url = wbi_img_data["img_url"]
-    sub_url = wbi_img_data["sub_url"]
-    
-    # 提取文件名（去掉路径和扩展名）
-    img_key = img_url.split("/")[-1].split(".")[0]
-    sub_key = sub_url.split("/")[-1].split(".")[0]
-    
-    wbi_img_cache = {"img_key": img_key, "sub_key": sub_key}
-    Logger.debug(f"获取WBI签名密钥(yutto风格): img_key={img_key[:8]}..., sub_key={sub_key[:8]}...")
-    return wbi_img_cache
+    """获取WBI签名所需的img_key和sub_key（yutto风格签名使用同一份密钥）"""
+    return await get_wbi_key_provider().get(fetcher)
 
 
+@functools.lru_cache(maxsize=8)
 def _get_mixin_key(string: str) -> str:
-    """生成混合密钥"""
+    """生成混合密钥（密钥不变时直接复用计算结果）"""
     char_indices = [
         46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5,
         49, 33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55,
@@ -663,10 +762,11 @@ def _get_mixin_key(string: str) -> str:
     return "".join([string[idx] for idx in char_indices[:32] if idx < len(string)])
 
 
+_WBI_ILLEGAL_CHARS = re.compile(r"[!'\(\)*]")
+
+
 def encode_wbi(params: Dict[str, Any], wbi_img: Dict[str, str]) -> Dict[str, Any]:
     """WBI签名编码"""
-    import re
-    
     img_key = wbi_img.get("img_key", "")
     sub_key = wbi_img.get("sub_key", "")
     
@@ -674,8 +774,6 @@ def encode_wbi(params: Dict[str, Any], wbi_img: Dict[str, str]) -> Dict[str, Any
         Logger.warning("WBI密钥不完整，跳过签名")
         return params
     
-    illegal_char_remover = re.compile(r"[!'\(\)*]")
-    
     mixin_key = _get_mixin_key(img_key + sub_key)
     time_stamp = int(time.time())
     params_with_wts = dict(params, wts=time_stamp)
@@ -683,7 +781,7 @@ def encode_wbi(params: Dict[str, Any], wbi_img: Dict[str, str]) -> Dict[str, Any
     # URL编码并排序
     url_encoded_params = urllib.parse.urlencode(
         {
-            key: illegal_char_remover.sub("", str(params_with_wts[key]))
+            key: _WBI_ILLEGAL_CHARS.sub("", str(params_with_wts[key]))
             for key in sorted(params_with_wts.keys())
         }
     )
@@ -696,7 +794,6 @@ def encode_wbi(params: Dict[str, Any], wbi_img: Dict[str, str]) -> Dict[str, Any
 
 def encode_wbi_yutto_style(params: Dict[str, Any], wbi_img: Dict[str, str]) -> Dict[str, Any]:
     """WBI签名编码（yutto风格，包含dm参数）"""
-    import re
     import base64
     import random
     import string
@@ -708,8 +805,6 @@ def encode_wbi_yutto_style(params: Dict[str, Any], wbi_img: Dict[str, str]) -> D
         Logger.warning("WBI密钥不完整，跳过签名")
         return params
     
-    illegal_char_remover = re.compile(r"[!'\(\)*]")
-    
     mixin_key = _get_mixin_key(img_key + sub_key)
     time_stamp = int(time.time())
     params_with_wts = dict(params, wts=time_stamp)
@@ -729,7 +824,7 @@ def encode_wbi_yutto_style(params: Dict[str, Any], wbi_img: Dict[str, str]) -> D
     # URL编码并排序
     url_encoded_params = urllib.parse.urlencode(
         {
-            key: illegal_char_remover.sub("", str(params_with_dm[key]))
+            key: _WBI_ILLEGAL_CHARS.sub("", str(params_with_dm[key]))
             for key in sorted(params_with_dm.keys())
         }
     )
@@ -768,7 +863,8 @@ async def get_user_name(fetcher: Fetcher, mid: MId) -> str:
                 Logger.warning(f"用户 {mid} 不存在，疑似注销或被封禁")
                 return f"用户{mid}"
             elif user_info.get("code") == -352:
-                # 风控校验失败，准备下一轮
+                # 风控校验失败（可能是密钥已轮换），准备下一轮
+                get_wbi_key_provider().invalidate(wbi_img)
                 Logger.warning(f"第{round_start}轮-yutto风格: 风控校验失败，准备下一轮...")
                 raise Exception("风控校验失败")
             elif user_info.get("code") != 0:
@@ -803,7 +899,8 @@ async def get_user_name(fetcher: Fetcher, mid: MId) -> str:
                 Logger.warning(f"用户 {mid} 不存在，疑似注销或被封禁")
                 return f"用户{mid}"
             elif user_info.get("code") == -352:
-                # 风控校验失败，准备下一轮
+                # 风控校验失败（可能是密钥已轮换），准备下一轮
+                get_wbi_key_provider().invalidate(wbi_img)
                 Logger.warning(f"第{round_start}轮-原有方法: 风控校验失败，准备下一轮...")
                 raise Exception("风控校验失败")
             elif user_info.get("code") != 0:
@@ -830,18 +927,75 @@ async def get_user_name(fetcher: Fetcher, mid: MId) -> str:
     return f"用户{mid}"
 
 
+async def _fetch_series_page(fetcher: Fetcher, series_id: SeriesId, mid: MId, pn: int) -> Optional[Dict[str, Any]]:
+    """获取视频列表的一页（按发布时间倒序，带重试），重试后仍失败返回None"""
+    api = (
+        f"https://api.bilibili.com/x/series/archives?mid={mid}&series_id={series_id}"
+        f"&only_normal=true&sort=desc&pn={pn}&ps={SERIES_PAGE_SIZE}"
+    )
+    max_retries = 3
+    base_delay = 1.0
+    
+    for attempt in range(max_retries):
+        res_json = await fetcher.fetch_json(api)
+        if res_json and res_json.get("code") == 0:
+            return res_json["data"]
+        if attempt < max_retries - 1:
+            delay = base_delay * (attempt + 1)
+            Logger.warning(f"获取视频列表页面失败 (页面 {pn}，尝试 {attempt + 1}/{max_retries})，等待 {delay:.1f} 秒后重试...")
+            await asyncio.sleep(delay)
+    return None
+
+
+async def get_series_fingerprint(fetcher: Fetcher, series_id: SeriesId, mid: MId) -> Optional[Dict[str, Any]]:
+    """获取视频列表的变化指纹（视频总数和最新视频），只请求一条记录，失败返回None"""
+    api = (
+        f"https://api.bilibili.com/x/series/archives?mid={mid}&series_id={series_id}"
+        f"&only_normal=true&sort=desc&pn=1&ps=1"
+    )
+    res_json = await fetcher.fetch_json(api, bypass_cache=True)
+    if not res_json or res_json.get("code") != 0:
+        return None
+    
+    data = res_json.get("data") or {}
+    archives = data.get("archives") or []
+    return {"total": (data.get("page") or {}).get("total"), "newest": archives[0]["bvid"] if archives else None}
+
+
+def _series_page_avids(data: Dict[str, Any]) -> List[AvId]:
+    return [BvId(video["bvid"]) for video in data.get("archives") or []]
+
+
+async def iter_series_videos(fetcher: Fetcher, series_id: SeriesId, mid: MId) -> AsyncIterator[List[AvId] | str]:
+    """逐页获取视频列表/合集的视频ID（仅获取ID，不获取详细信息）
+    
+    第一页返回视频总数后，后续页面在有界窗口内预取并按页码顺序逐页产出；
+    第一页总会产出（可能为空列表），任一页面重试后仍获取失败时产出风控指令后结束
+    """
+    data = await _fetch_series_page(fetcher, series_id, mid, 1)
+    if data is None:
+        Logger.warning(f"无法获取视频列表 {series_id}")
+        yield RISK_CONTROL_DETECTED
+        return
+    yield _series_page_avids(data)
+    
+    total = (data.get("page") or {}).get("total", 0)
+    total_pages = (total + SERIES_PAGE_SIZE - 1) // SERIES_PAGE_SIZE  # 向上取整
+    async with aclosing(_iter_pages(lambda page: _fetch_series_page(fetcher, series_id, mid, page), range(2, total_pages + 1))) as pages:
+        async for data in pages:
+            if data is None:
+                Logger.warning(f"无法获取视频列表 {series_id} 的全部分页")
+                yield RISK_CONTROL_DETECTED
+                return
+            yield _series_page_avids(data)
+
+
 async def get_series_videos(fetcher: Fetcher, series_id: SeriesId, mid: MId) -> List[AvId] | str:
     """获取视频列表/合集URL列表（仅获取ID，不获取详细信息）"""
     try:
-        api = f"https://api.bilibili.com/x/series/archives?mid={mid}&series_id={series_id}&only_normal=true&pn=1&ps=30"
-        res_json = await fetcher.fetch_json(api)
-        
-        if not res_json or res_json.get("code") != 0:
-            raise Exception(f"无法获取视频列表 {series_id}")
-        
-        avids = []
-        for video in res_json["data"]["archives"]:
-            avids.append(BvId(video["bvid"]))
+        avids = await _collect_avid_pages(iter_series_videos(fetcher, series_id, mid))
+        if avids == RISK_CONTROL_DETECTED:
+            return RISK_CONTROL_DETECTED
         
         Logger.info(f"视频列表 {series_id} 共获取到 {len(avids)} 个视频ID")
         return avids
@@ -851,6 +1005,40 @@ async def get_series_videos(fetcher: Fetcher, series_id: SeriesId, mid: MId) ->
         return RISK_CONTROL_DETECTED
 
 
+async def get_series_videos_incremental(fetcher: Fetcher, series_id: SeriesId, mid: MId, existing_urls: set) -> List[AvId] | str:
+    """增量获取视频列表（从最新的视频开始逐页获取，发现已存在的视频时停止）"""
+    Logger.info(f"增量获取视频列表 {series_id}...")
+    
+    new_avids = []
+    try:
+        pn = 1
+        while True:
+            data = await _fetch_series_page(fetcher, series_id, mid, pn)
+            if data is None:
+                raise Exception(f"无法获取视频列表 {series_id} 第 {pn} 页")
+            
+            archives = data.get("archives") or []
+            for video in archives:
+                bvid = BvId(video["bvid"])
+                if bvid.to_url() in existing_urls:
+                    # 发现重复，停止获取
+                    Logger.info(f"增量获取完成：发现重复视频 {bvid}，共获取到 {len(new_avids)} 个新视频")
+                    return new_avids
+                new_avids.append(bvid)
+            
+            total = (data.get("page") or {}).get("total", 0)
+            if not archives or pn * SERIES_PAGE_SIZE >= total:
+                break
+            pn += 1
+    except Exception as e:
+        Logger.warning(f"增量获取视频列表异常: {e}")
+        # 任何获取视频列表的失败都返回特殊指令
+        return RISK_CONTROL_DETECTED
+    
+    Logger.info(f"增量获取完成：视频列表 {series_id} 共获取到 {len(new_avids)} 个新视频")
+    return new_avids
+
+
 async def get_watch_later_avids(fetcher: Fetcher) -> List[AvId] | str:
     """获取稍后再看URL列表（仅获取ID，不获取详细信息）"""
     try:
@@ -927,8 +1115,42 @@ async def get_bangumi_episode_list(fetcher: Fetcher, season_id: str) -> Tuple[st
     return bangumi_title, episode_ids 
 
 
+def _bangumi_episode_index(result: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """将番剧整季信息中的所有剧集（含专区）整理为 episode_id -> 剧集详细信息"""
+    author = result.get("actor", {}).get("info", "")
+    all_episodes = result["episodes"] + [ep for section in result.get("section", []) for ep in section.get("episodes", [])]
+    
+    index = {}
+    for episode in all_episodes:
+        episode_id = str(episode["id"])
+        episode_title = _bangumi_episode_title(episode["title"], episode["long_title"])
+        index[episode_id] = {
+            "avid": BvId(episode["bvid"]),
+            "cid": CId(str(episode["cid"])),
+            "title": episode_title,
+            "name": episode_title,
+            "pubdate": 0,  # 番剧没有pubdate概念
+            "author": author,
+            "duration": 0,  # 番剧duration需要从播放页面获取
+            "episode_id": episode_id,
+            "is_preview": episode.get("badge") == "预告"
+        }
+    return index
+
+
+async def get_bangumi_season_episodes(fetcher: Fetcher, season_id: str) -> Dict[str, Dict[str, Any]]:
+    """一次获取整季番剧所有剧集的详细信息，按episode_id索引"""
+    list_api = f"https://api.bilibili.com/pgc/view/web/season?season_id={season_id}"
+    resp_json = await fetcher.fetch_json(list_api)
+    
+    if not resp_json or resp_json.get("result") is None:
+        raise Exception(f"无法获取番剧 {season_id} 的剧集信息")
+    
+    return _bangumi_episode_index(resp_json["result"])
+
+
 async def get_bangumi_episode_info(fetcher: Fetcher, episode_id: str) -> Dict[str, Any]:
-    """获取单个番剧剧集的详细信息"""
+    """获取单个番剧剧集的详细信息（批量获取请使用 get_bangumi_season_episodes）"""
     # 通过episode_id获取剧集详细信息
     episode_api = f"https://api.bilibili.com/pgc/view/web/season?ep_id={episode_id}"
     resp_json = await fetcher.fetch_json(episode_api)
@@ -936,33 +1158,11 @@ async def get_bangumi_episode_info(fetcher: Fetcher, episode_id: str) -> Dict[st
     if not resp_json or resp_json.get("result") is None:
         raise Exception(f"无法获取剧集 {episode_id} 的详细信息")
     
-    result = resp_json["result"]
-    
-    # 查找当前剧集
-    current_episode = None
-    all_episodes = result["episodes"] + [ep for section in result.get("section", []) for ep in section.get("episodes", [])]
-    
-    for episode in all_episodes:
-        if str(episode["id"]) == episode_id:
-            current_episode = episode
-            break
-    
+    current_episode = _bangumi_episode_index(resp_json["result"]).get(episode_id)
     if not current_episode:
         raise Exception(f"无法找到剧集 {episode_id} 的信息")
     
-    episode_title = _bangumi_episode_title(current_episode["title"], current_episode["long_title"])
-    
-    return {
-        "avid": BvId(current_episode["bvid"]),
-        "cid": CId(str(current_episode["cid"])),
-        "title": episode_title,
-        "name": episode_title,
-        "pubdate": 0,  # 番剧没有pubdate概念
-        "author": result.get("actor", {}).get("info", ""),
-        "duration": 0,  # 番剧duration需要从播放页面获取
-        "episode_id": episode_id,
-        "is_preview": current_episode.get("badge") == "预告"
-    } 
+    return current_episode
 
 
 # 课程(Cheese)相关API
@@ -1000,39 +1200,48 @@ async def get_cheese_episode_list(fetcher: Fetcher, season_id: str) -> Tuple[str
     return course_title, episode_ids
 
 
-async def get_cheese_episode_info(fetcher: Fetcher, episode_id: str) -> Dict[str, Any]:
-    """获取单个课程课时的详细信息"""
-    # 先获取season_id
-    season_id = await get_cheese_season_id_by_episode_id(fetcher, episode_id)
+def _cheese_episode_index(result: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """将课程信息中的所有课时整理为 episode_id -> 课时详细信息"""
+    author = result.get("up_info", {}).get("uname", "")
     
-    # 通过season_id获取课程详细信息
-    episode_api = f"https://api.bilibili.com/pugv/view/web/season?season_id={season_id}"
-    resp_json = await fetcher.fetch_json(episode_api)
+    index = {}
+    for episode in result["episodes"]:
+        episode_id = str(episode["id"])
+        index[episode_id] = {
+            "avid": AId(str(episode["aid"])),
+            "cid": CId(str(episode["cid"])),
+            "title": episode["title"],
+            "name": episode["title"],
+            "pubdate": 0,  # 课程没有pubdate概念
+            "author": author,
+            "duration": 0,  # 课程duration需要从播放页面获取
+            "episode_id": episode_id
+        }
+    return index
+
+
+async def get_cheese_season_episodes(fetcher: Fetcher, season_id: str) -> Dict[str, Dict[str, Any]]:
+    """一次获取课程所有课时的详细信息，按episode_id索引"""
+    list_api = f"https://api.bilibili.com/pugv/view/web/season?season_id={season_id}"
+    resp_json = await fetcher.fetch_json(list_api)
     
     if not resp_json or resp_json.get("data") is None:
-        raise Exception(f"无法获取课时 {episode_id} 的详细信息")
+        raise Exception(f"无法获取课程 {season_id} 的课时信息")
     
-    result = resp_json["data"]
+    return _cheese_episode_index(resp_json["data"])
+
+
+async def get_cheese_episode_info(fetcher: Fetcher, episode_id: str) -> Dict[str, Any]:
+    """获取单个课程课时的详细信息（批量获取请使用 get_cheese_season_episodes）"""
+    # ep_id 查询返回的就是整个课程的信息，无需再按season_id请求一次
+    episode_api = f"https://api.bilibili.com/pugv/view/web/season?ep_id={episode_id}"
+    resp_json = await fetcher.fetch_json(episode_api)
     
-    # 查找当前课时
-    current_episode = None
-    for episode in result["episodes"]:
-        if str(episode["id"]) == episode_id:
-            current_episode = episode
-            break
+    if not resp_json or resp_json.get("data") is None:
+        raise Exception(f"无法获取课时 {episode_id} 的详细信息")
     
+    current_episode = _cheese_episode_index(resp_json["data"]).get(episode_id)
     if not current_episode:
         raise Exception(f"无法找到课时 {episode_id} 的信息")
     
-    episode_title = current_episode["title"]
-    
-    return {
-        "avid": AId(str(current_episode["aid"])),
-        "cid": CId(str(current_episode["cid"])),
-        "title": episode_title,
-        "name": episode_title,
-        "pubdate": 0,  # 课程没有pubdate概念
-        "author": result.get("up_info", {}).get("uname", ""),
-        "duration": 0,  # 课程duration需要从播放页面获取
-        "episode_id": episode_id
-    } 
+    return current_episode
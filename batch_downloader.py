@@ -8,29 +8,110 @@ import sys
 import shutil
 import glob
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, Callable, Awaitable, AsyncIterator
 import re
 import time
+from collections import deque
+from contextlib import aclosing
+from itertools import zip_longest
 
 from utils.types import VideoListData, VideoInfo, DownloadOptions, AId, BvId, CId
 from utils.fetcher import Fetcher
 from utils.logger import Logger
 from utils.csv_manager import CSVManager
-from utils.constants import TASK_FOLDER_PREFIXES
+from utils.constants import TASK_FOLDER_PREFIXES, DEFAULT_PERFORMANCE_OPTIONS
 from utils.anti_risk_manager import get_anti_risk_manager
-from extractors import extract_video_list, extract_video_list_incremental
+from utils.task_catalog import get_task_catalog
+from utils.rate_limiter import configure_rate_limits
+from utils.response_cache import configure_response_cache, get_response_cache
+from utils.download_scheduler import configure_download_scheduler, get_download_scheduler
+from utils.media_check import FINAL_MEDIA_SUFFIXES, PARTIAL_MEDIA_SUFFIXES, check_complete_mp4, partial_fragment_size
+from utils.failure_classifier import FailureClassifier, get_failure_rules
+from utils.yutto_pool import YuttoJob, classify_worker_result, configure_yutto_workers, get_yutto_worker_pool
+from utils.progress_parser import (
+    PROGRESS_LOG_INTERVAL,
+    PROGRESS_PUBLISH_INTERVAL,
+    DownloadProgress,
+    ProgressParser,
+    clean_output_line,
+    format_speed,
+    split_output,
+)
+from extractors import extract_video_list, extract_video_list_incremental, extract_video_stream, resolve_url, find_extractor
 from api.bilibili import (
     RISK_CONTROL_DETECTED,
     get_ugc_video_list,
     get_bangumi_episode_info,
+    get_bangumi_season_episodes,
     get_cheese_episode_info,
+    get_cheese_season_episodes,
 )
 
 
+def configure_process_options(performance: Optional[Dict[str, Any]] = None) -> None:
+    """设置进程级的性能参数（进程启动时调用一次）
+    
+    请求限速、响应缓存、下载槽位上限和常驻yutto进程池由进程内所有任务共享，不随单个任务的配置变化，
+    否则WebUI中后启动的任务会改掉正在运行的任务的设置；
+    命令行由 main.py 解析参数后调用，WebUI 在启动时按 --config 指定的配置调用
+    """
+    options = dict(DEFAULT_PERFORMANCE_OPTIONS)
+    options.update({k: v for k, v in (performance or {}).items() if v is not None})
+    configure_rate_limits(options["rate_limits"], bool(options["adaptive_pacing"]))
+    configure_response_cache(
+        enabled=bool(options["response_cache"]),
+        max_mb=float(options["response_cache_max_mb"])
+    )
+    # 进程内所有任务共享的下载槽位上限（WebUI中同时运行的多个任务共同受限）
+    configure_download_scheduler(
+        int(options["max_downloads"]),
+        int(options["max_downloads_per_account"]),
+        int(options["max_downloads_per_disk"])
+    )
+    configure_yutto_workers(max(0, int(options["yutto_workers"])))
+
+
+class _DownloadFeed:
+    """下载队列：下载协程按顺序领取；列表仍在获取时可以继续追加"""
+    
+    def __init__(self, items: List[Any], complete: bool = True):
+        self.items = list(items)
+        self.taken = 0  # 已被领取的数量
+        self.complete = complete  # 列表是否已获取完毕
+        self._changed = asyncio.Event()
+    
+    def extend(self, items: List[Any]) -> None:
+        self.items.extend(items)
+        self._changed.set()
+    
+    def close(self) -> None:
+        """列表获取完毕（唤醒所有等待中的协程）"""
+        self.complete = True
+        self._changed.set()
+    
+    def has_next(self) -> bool:
+        return self.taken < len(self.items)
+    
+    async def wait_changed(self) -> None:
+        """等待队列发生变化（追加、领取或结束）"""
+        self._changed.clear()
+        await self._changed.wait()
+    
+    async def take(self) -> Optional[Tuple[int, Any]]:
+        """领取下一个视频，返回 (序号, 视频)；队列为空时等待追加，列表获取完毕后返回None"""
+        while not self.has_next():
+            if self.complete:
+                return None
+            await self.wait_changed()
+        self.taken += 1
+        self._changed.set()
+        return self.taken, self.items[self.taken - 1]
+
+
 class BatchDownloader:
     """批量下载器"""
     
-    def __init__(self, output_dir: Path, sessdata: Optional[str] = None, extra_args: Optional[List[str]] = None, original_url: Optional[str] = None, task_id: Optional[str] = None, task_control: Optional[Dict] = None):
+    def __init__(self, output_dir: Path, sessdata: Optional[str] = None, extra_args: Optional[List[str]] = None, original_url: Optional[str] = None, task_id: Optional[str] = None, task_control: Optional[Dict] = None, performance: Optional[Dict[str, Any]] = None):
         """初始化批量下载器"""
         self.output_dir = output_dir
         self.sessdata = sessdata
@@ -38,9 +119,31 @@ class BatchDownloader:
         self.original_url = original_url
         self.task_id = task_id
         self.task_control = task_control or {}
-        self.fetcher = Fetcher(sessdata=sessdata)
         self.csv_manager = None  # 稍后根据任务创建
         self.anti_risk_manager = get_anti_risk_manager()
+        
+        # 性能参数：未指定的项使用默认值
+        self.performance = dict(DEFAULT_PERFORMANCE_OPTIONS)
+        self.performance.update({k: v for k, v in (performance or {}).items() if v is not None})
+        # 强制刷新只作用于本任务的请求，不影响同时运行的其他任务
+        self.fetcher = Fetcher(sessdata=sessdata, refresh=bool(self.performance["refresh"]))
+        self.download_concurrency = max(1, int(self.performance["download_concurrency"]))
+        self.download_interval = max(0.0, float(self.performance["download_interval"]))
+        self.task_concurrency = max(1, int(self.performance["task_concurrency"]))
+        self.stream_extraction = bool(self.performance["stream_extraction"])
+        self.metadata_prefetch = max(0, int(self.performance["metadata_prefetch"]))
+        self.resume_downloads = bool(self.performance["resume_downloads"])
+        self._shared_download_slots: Optional[asyncio.Semaphore] = None  # 批量更新时由调度器注入
+        self.failure_rules = get_failure_rules(self.performance["failure_rules"])
+        
+        # 任务索引：配置启用时创建，已存在时自动使用
+        self.task_catalog = get_task_catalog(output_dir, create=bool(self.performance["task_catalog"]))
+        
+        # 番剧/课程整季信息：每季只请求一次，按episode_id索引
+        self._season_episode_indexes: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._season_index_requests: Dict[str, asyncio.Future] = {}
+        # 正在预取详细信息的视频（video_url -> 预取完成的Future）
+        self._detail_prefetches: Dict[str, asyncio.Future] = {}
     
     def _should_stop(self) -> bool:
         """检查是否应该停止任务"""
@@ -72,40 +175,59 @@ class BatchDownloader:
                     }
                     
                     # 如果有WebSocket连接，推送进度更新
-                    try:
-                        import sys
-                        if 'webui.app' in sys.modules:
-                            webui_app = sys.modules['webui.app']
-                            if hasattr(webui_app, 'socketio') and hasattr(webui_app, 'filter_task_for_json'):
-                                webui_app.socketio.emit('task_progress', 
-                                    webui_app.filter_task_for_json(self.task_control[self.task_id]))
-                    except Exception:
-                        # 如果不在WebUI环境中运行或出现错误，忽略WebSocket推送
-                        pass
+                    self._emit_task_progress()
                     
                 Logger.debug(f"任务进度更新: {downloaded}/{total} ({progress}%)")
         except Exception as e:
             Logger.error(f"更新进度失败: {e}")
     
+    def _emit_task_progress(self) -> None:
+        """通过WebSocket推送任务进度（不在WebUI环境中运行时忽略）"""
+        try:
+            if 'webui.app' in sys.modules:
+                webui_app = sys.modules['webui.app']
+                if hasattr(webui_app, 'socketio') and hasattr(webui_app, 'filter_task_for_json'):
+                    webui_app.socketio.emit('task_progress', 
+                        webui_app.filter_task_for_json(self.task_control[self.task_id]))
+        except Exception:
+            # 如果不在WebUI环境中运行或出现错误，忽略WebSocket推送
+            pass
+    
     async def download_from_url(self, url: str) -> None:
         """从URL开始批量下载"""
         async with self.fetcher:
             try:
                 # 步骤1-4: 解析URL并获取基本信息
                 Logger.info("分析URL类型和获取基本信息...")
-                video_list = await extract_video_list(self.fetcher, url)
-                task_name = video_list["title"]
-                Logger.info(f"任务名称: {task_name}")
-                
-                # 步骤5: 确定"带名称的输出文件夹"
-                task_output_dir = self.output_dir / task_name
-                task_output_dir.mkdir(parents=True, exist_ok=True)
-                self.csv_manager = CSVManager(task_output_dir)
-                
-                Logger.info(f"任务输出目录: {task_output_dir}")
-                
-                # 步骤6: 检查是否存在CSV文件
-                existing_csv_videos = self.csv_manager.load_video_list()
+                canonical_url = await resolve_url(self.fetcher, url)
+                # 逐页获取视频列表：第一页即可确定任务名称
+                async with aclosing(extract_video_stream(self.fetcher, canonical_url)) as stream:
+                    first_chunk = await anext(stream, RISK_CONTROL_DETECTED)
+                    if first_chunk == RISK_CONTROL_DETECTED:
+                        raise Exception("无法获取视频列表（可能触发了风控）")
+                    task_name = first_chunk["title"]
+                    Logger.info(f"任务名称: {task_name}")
+                    
+                    # 步骤5: 确定"带名称的输出文件夹"
+                    task_output_dir = self.output_dir / task_name
+                    task_output_dir.mkdir(parents=True, exist_ok=True)
+                    self.csv_manager = CSVManager(task_output_dir)
+                    if find_extractor(canonical_url):
+                        self.csv_manager.update_task_meta(original_url=self.original_url or url, canonical_url=canonical_url)
+                    
+                    Logger.info(f"任务输出目录: {task_output_dir}")
+                    
+                    # 步骤6: 检查是否存在CSV文件
+                    existing_csv_videos = self.csv_manager.load_video_list()
+                    
+                    if not existing_csv_videos and self.stream_extraction:
+                        # 首次下载：边获取列表边下载
+                        Logger.info("首次下载，创建CSV文件并边获取列表边下载...")
+                        await self._download_streaming(first_chunk, stream, self.original_url or url)
+                        return
+                    
+                    # 其余情况需要完整的视频列表
+                    video_list = await self._collect_video_stream(first_chunk, stream)
                 videos_to_download = []
                 
                 if existing_csv_videos:
@@ -177,26 +299,7 @@ class BatchDownloader:
                 else:
                     Logger.info("风控已解除，继续批量更新")
             
-            # 扫描所有一级子目录
-            all_dirs = [d for d in self.output_dir.iterdir() if d.is_dir()]
-            
-            if not all_dirs:
-                Logger.info("未找到任何目录")
-                return
-            
-            # 筛选符合条件的任务目录
-            task_dirs = []
-            invalid_dirs = []
-            
-            for dir_path in all_dirs:
-                if self._is_valid_task_directory(dir_path):
-                    task_dirs.append(dir_path)
-                else:
-                    invalid_dirs.append(dir_path)
-                    Logger.debug(f"跳过不符合条件的目录: {dir_path.name}")
-            
-            if invalid_dirs:
-                Logger.info(f"跳过 {len(invalid_dirs)} 个不符合条件的目录")
+            task_dirs = self._find_task_directories()
             
             if not task_dirs:
                 Logger.info("未找到符合条件的任务目录")
@@ -204,55 +307,118 @@ class BatchDownloader:
             
             Logger.info(f"发现 {len(task_dirs)} 个任务目录")
             
-            # 使用任务队列机制处理风控等待
-            await self._process_tasks_with_risk_control(task_dirs)
+            if self.performance["update_mode"] == "two_phase":
+                # 先刷新所有任务列表，再统一下载
+                await self._update_tasks_two_phase(task_dirs)
+            else:
+                # 使用任务队列机制处理风控等待
+                await self._process_tasks_with_risk_control(task_dirs)
             
+            cache = get_response_cache()
+            if cache is not None:
+                stats = cache.get_stats()
+                Logger.info(f"接口缓存：命中 {stats['hits']} 次，未变化(304) {stats['not_modified']} 次，未命中 {stats['misses']} 次")
+        
         except Exception as e:
             Logger.error(f"批量更新失败: {e}")
             raise
     
-    async def _process_tasks_with_risk_control(self, task_dirs: List[Path]) -> None:
-        """使用任务队列机制处理风控等待"""
-        pending_tasks = list(task_dirs)  # 待处理任务队列
+    def _find_task_directories(self) -> List[Path]:
+        """扫描输出目录下所有有效的任务目录（启用任务索引时使用索引）"""
+        if self.task_catalog is not None:
+            task_dirs = [Path(task['path']) for task in self.task_catalog.list_tasks()]
+            Logger.debug(f"从任务索引获取到 {len(task_dirs)} 个任务目录")
+            return task_dirs
+        
+        # 扫描所有一级子目录
+        all_dirs = [d for d in self.output_dir.iterdir() if d.is_dir()]
+        
+        if not all_dirs:
+            Logger.info("未找到任何目录")
+            return []
+        
+        # 筛选符合条件的任务目录
+        task_dirs = []
+        invalid_dirs = []
+        
+        for dir_path in all_dirs:
+            if self._is_valid_task_directory(dir_path):
+                task_dirs.append(dir_path)
+            else:
+                invalid_dirs.append(dir_path)
+                Logger.debug(f"跳过不符合条件的目录: {dir_path.name}")
+        
+        if invalid_dirs:
+            Logger.info(f"跳过 {len(invalid_dirs)} 个不符合条件的目录")
+        
+        return task_dirs
+    
+    async def _process_tasks_with_risk_control(
+        self,
+        task_dirs: List[Path],
+        handle_task: Optional[Callable[["BatchDownloader", Path], Awaitable[None]]] = None,
+        label: str = "批量更新"
+    ) -> None:
+        """使用任务队列并行处理多个任务，遇到风控时暂停派发剩余任务
+        
+        最多 task_concurrency 个任务同时处理，每个任务使用独立的下载器实例，
+        所有任务的下载共享 download_concurrency 个下载槽位。
+        handle_task 默认为完整的单任务更新（刷新列表并下载）。
+        """
+        if handle_task is None:
+            handle_task = lambda task_downloader, task_dir: task_downloader._update_single_task_directory(task_dir)
+        
+        pending_tasks = deque(task_dirs)  # 待处理任务队列
         completed_tasks = []  # 已完成任务
         error_count = 0
+        halted = False  # 遇到风控后不再派发新任务
+        risk_lock = asyncio.Lock()
+        download_slots = asyncio.Semaphore(self.download_concurrency)
         
-        Logger.info(f"开始处理 {len(pending_tasks)} 个任务")
+        worker_count = min(self.task_concurrency, len(pending_tasks))
+        Logger.info(f"开始处理 {len(pending_tasks)} 个任务（并行任务数: {worker_count}）")
         
-        while pending_tasks:
-            # 检查是否应该停止
-            if self._should_stop():
-                Logger.warning("任务被手动停止")
-                break
+        async def worker() -> None:
+            nonlocal error_count, halted
             
-            # 检查风控状态
-            if self.anti_risk_manager.is_risk_controlled:
-                Logger.info("检测到风控状态，等待风控解除...")
-                await self._wait_for_risk_control_resolution()
+            while pending_tasks and not halted:
+                # 检查是否应该停止
+                if self._should_stop():
+                    return
+                
+                # 检查风控状态（同一时间只由一个协程负责等待）
                 if self.anti_risk_manager.is_risk_controlled:
-                    Logger.warning("风控仍未解除，暂停处理剩余任务")
-                    break
-            
-            # 处理当前任务
-            current_task = pending_tasks[0]
-            Logger.info(f"处理任务: {current_task.name}")
-            
-            try:
-                await self._update_single_task_directory(current_task)
-                completed_tasks.append(current_task)
-                pending_tasks.remove(current_task)
-                Logger.info(f"✅ 任务完成: {current_task.name}")
+                    async with risk_lock:
+                        if self.anti_risk_manager.is_risk_controlled and not halted:
+                            Logger.info("检测到风控状态，等待风控解除...")
+                            await self._wait_for_risk_control_resolution()
+                            if self.anti_risk_manager.is_risk_controlled:
+                                Logger.warning("风控仍未解除，暂停处理剩余任务")
+                                halted = True
+                    continue
                 
-            except Exception as e:
-                error_msg = str(e)
-                error_type = type(e).__name__
+                # 处理当前任务
+                current_task = pending_tasks.popleft()
+                Logger.info(f"处理任务: {current_task.name}")
                 
-                # 检查是否为风控异常
-                if "风控检测" in error_msg:
-                    Logger.warning(f"任务 {current_task.name} 遇到风控，暂停处理")
-                    # 不移除任务，等待风控解除后重新处理
-                    break
-                else:
+                task_downloader = self._create_task_downloader(download_slots)
+                try:
+                    await handle_task(task_downloader, current_task)
+                    completed_tasks.append(current_task)
+                    Logger.info(f"✅ 任务完成: {current_task.name}")
+                
+                except Exception as e:
+                    error_msg = str(e)
+                    error_type = type(e).__name__
+                    
+                    # 检查是否为风控异常
+                    if "风控检测" in error_msg:
+                        Logger.warning(f"任务 {current_task.name} 遇到风控，暂停处理")
+                        # 放回队首，等待风控解除后重新处理
+                        pending_tasks.appendleft(current_task)
+                        halted = True
+                        return
+                    
                     error_count += 1
                     Logger.error(f"❌ 任务失败 {current_task.name} ({error_type}): {e}")
                     
@@ -263,21 +429,118 @@ class BatchDownloader:
                         Logger.warning(f"   建议：检查网络连接和原始URL的有效性")
                     elif "permission" in error_msg.lower():
                         Logger.warning(f"   建议：检查 {current_task.name} 目录的读写权限")
-                    
-                    # 移除失败的任务，避免无限循环
-                    pending_tasks.remove(current_task)
-                    continue
+        
+        await asyncio.gather(*(worker() for _ in range(worker_count)))
+        
+        if self._should_stop():
+            Logger.warning("任务被手动停止")
         
         # 显示完成统计
         total_tasks = len(task_dirs)
         completed_count = len(completed_tasks)
         remaining_count = len(pending_tasks)
         
-        Logger.custom(f"批量更新完成 - 成功: {completed_count}, 失败: {error_count}, 剩余: {remaining_count}, 总计: {total_tasks}", "批量更新")
+        Logger.custom(f"{label}完成 - 成功: {completed_count}, 失败: {error_count}, 剩余: {remaining_count}, 总计: {total_tasks}", label)
         
         if remaining_count > 0:
             Logger.warning(f"有 {remaining_count} 个任务因风控或其他原因未完成，可稍后重新执行批量更新")
     
+    async def _update_tasks_two_phase(self, task_dirs: List[Path]) -> None:
+        """两阶段批量更新：先只刷新所有任务的视频列表并写入CSV，再按全局顺序统一下载"""
+        refreshed: List[Tuple["BatchDownloader", List[VideoInfo]]] = []
+        
+        async def refresh(task_downloader: "BatchDownloader", task_dir: Path) -> None:
+            async with task_downloader.fetcher:
+                videos = await task_downloader._refresh_task_directory(task_dir)
+            if videos:
+                refreshed.append((task_downloader, videos))
+        
+        Logger.info("阶段1：刷新所有任务的视频列表")
+        await self._process_tasks_with_risk_control(task_dirs, refresh, label="列表刷新")
+        
+        if self._should_stop():
+            return
+        
+        download_queue = self._order_download_queue(refreshed)
+        if not download_queue:
+            Logger.info("所有任务都没有待下载的视频")
+            return
+        
+        durations = [video.get('duration') or 0 for _, video in download_queue]
+        known = sum(1 for duration in durations if duration)
+        Logger.custom(
+            f"阶段2：{len(refreshed)} 个任务共 {len(download_queue)} 个待下载视频（顺序: {self.performance['download_order']}），"
+            f"其中 {known} 个已知时长，合计 {sum(durations) / 3600:.1f} 小时",
+            "批量更新"
+        )
+        await self._download_queue(download_queue)
+        
+        # 合并各任务的状态日志
+        for task_downloader, _ in refreshed:
+            if task_downloader.csv_manager:
+                task_downloader.csv_manager.compact_journal()
+        Logger.custom(f"两阶段更新完成 - 涉及任务: {len(refreshed)}, 本轮待下载: {len(download_queue)}", "批量更新")
+    
+    def _order_download_queue(
+        self, refreshed: List[Tuple["BatchDownloader", List[VideoInfo]]]
+    ) -> List[Tuple["BatchDownloader", VideoInfo]]:
+        """按 download_order 策略生成全局下载队列
+        
+        - newest: 发布时间从新到旧；新发现的视频尚未获取详情（pubdate为0），视为最新
+        - smallest: 已知总时长（所有分P合计）短的优先；尚未获取详情、时长未知的视频排在最后，保持任务内顺序
+        - round_robin: 各任务轮流取一个视频
+        """
+        order = self.performance["download_order"]
+        
+        if order == "round_robin":
+            queue = []
+            for group in zip_longest(*[[(task_downloader, video) for video in videos] for task_downloader, videos in refreshed]):
+                queue.extend(item for item in group if item is not None)
+            return queue
+        
+        queue = [(task_downloader, video) for task_downloader, videos in refreshed for video in videos]
+        if order == "newest":
+            queue.sort(key=lambda item: item[1].get('pubdate') or float('inf'), reverse=True)
+        elif order == "smallest":
+            queue.sort(key=lambda item: (0, item[1]['duration']) if item[1].get('duration') else (1, 0))
+        else:
+            Logger.warning(f"未知的下载顺序策略: {order}，按任务顺序下载")
+        return queue
+    
+    async def _download_queue(self, download_queue: List[Tuple["BatchDownloader", VideoInfo]]) -> None:
+        """使用 download_concurrency 个下载协程处理跨任务的全局下载队列"""
+        feed = _DownloadFeed(download_queue)
+        
+        async def process_item(item: Tuple["BatchDownloader", VideoInfo], i: int, total: int) -> None:
+            task_downloader, video = item
+            await task_downloader._process_video(video, i, total)
+        
+        async def prefetch_batch(items: List[Tuple["BatchDownloader", VideoInfo]]) -> None:
+            # 按任务分组，每个任务的预取结果写入各自的CSV
+            groups: Dict[int, Tuple["BatchDownloader", List[VideoInfo]]] = {}
+            for task_downloader, video in items:
+                groups.setdefault(id(task_downloader), (task_downloader, []))[1].append(video)
+            await asyncio.gather(*(task_downloader._prefetch_video_details(videos) for task_downloader, videos in groups.values()))
+        
+        await self._run_download_workers(feed, min(self.download_concurrency, len(download_queue)), process_item, prefetch_batch)
+        
+        remaining = len(feed.items) - feed.taken
+        if self._should_stop() and remaining:
+            Logger.warning(f"收到停止信号，中断下载任务（剩余 {remaining} 个视频未处理）")
+    
+    def _create_task_downloader(self, download_slots: asyncio.Semaphore) -> "BatchDownloader":
+        """为批量更新中的单个任务创建独立的下载器（共享任务控制和下载槽位）"""
+        task_downloader = BatchDownloader(
+            output_dir=self.output_dir,
+            sessdata=self.sessdata,
+            extra_args=self.extra_args,
+            task_id=self.task_id,
+            task_control=self.task_control,
+            performance=self.performance
+        )
+        task_downloader._shared_download_slots = download_slots
+        return task_downloader
+    
     async def _wait_for_risk_control_resolution(self) -> None:
         """等待风控解除（使用指数退避策略）"""
         max_attempts = 6  # 最多尝试6次
@@ -344,26 +607,7 @@ class BatchDownloader:
     async def delete_all_tasks(self) -> None:
         """删除所有任务的视频文件：扫描输出目录下的所有任务并删除视频文件，保留CSV记录"""
         try:
-            # 扫描所有一级子目录
-            all_dirs = [d for d in self.output_dir.iterdir() if d.is_dir()]
-            
-            if not all_dirs:
-                Logger.info("未找到任何目录")
-                return
-            
-            # 筛选符合条件的任务目录
-            task_dirs = []
-            invalid_dirs = []
-            
-            for dir_path in all_dirs:
-                if self._is_valid_task_directory(dir_path):
-                    task_dirs.append(dir_path)
-                else:
-                    invalid_dirs.append(dir_path)
-                    Logger.debug(f"跳过不符合条件的目录: {dir_path.name}")
-            
-            if invalid_dirs:
-                Logger.info(f"跳过 {len(invalid_dirs)} 个不符合条件的目录")
+            task_dirs = self._find_task_directories()
             
             if not task_dirs:
                 Logger.info("未找到符合条件的任务目录")
@@ -456,6 +700,9 @@ class BatchDownloader:
         
         Logger.info(f"正在删除目录 {task_dir.name} 中的视频文件...")
         
+        # 先把状态日志合并进CSV快照，保证保留下来的CSV是完整的
+        CSVManager(task_dir).compact_journal()
+        
         # 找到CSV文件
         csv_pattern = re.compile(r'^\d{2}-\d{2}-\d{2}-\d{2}-\d{2}\.csv$')
         csv_files = [f for f in task_dir.iterdir() 
@@ -470,7 +717,7 @@ class BatchDownloader:
         # 统计需要删除的项目
         items_to_delete = []
         for item in task_dir.iterdir():
-            if item.name != csv_file.name:
+            if item.name != csv_file.name and not CSVManager.is_state_file(item):
                 items_to_delete.append(item)
         
         if not items_to_delete:
@@ -546,169 +793,216 @@ class BatchDownloader:
     async def _update_single_task_directory(self, task_dir: Path) -> None:
         """更新单个任务目录的核心逻辑"""
         async with self.fetcher:
-            # 初始化CSV管理器，直接使用指定的任务目录
-            self.csv_manager = CSVManager(task_dir)
-            original_url = self.csv_manager.get_original_url()
+            videos_to_download = await self._refresh_task_directory(task_dir)
             
-            if not original_url:
-                Logger.warning(f"任务目录 {task_dir.name} 中未找到有效的原始URL，将禁用该目录")
-                self._disable_task_directory(task_dir, "CSV无URL")
-                return
-            
-            # 验证CSV文件格式
-            if not self._validate_csv_format(self.csv_manager):
-                Logger.warning(f"任务目录 {task_dir.name} 的CSV文件格式不正确，将禁用该目录")
-                self._disable_task_directory(task_dir, "缺少CSV文件")
-                return
+            # 下载待下载的视频
+            if videos_to_download:
+                Logger.info(f"开始下载 {len(videos_to_download)} 个视频...")
+                await self._download_videos(videos_to_download, self.original_url)
+            else:
+                Logger.info("没有需要下载的视频")
+    
+    async def _refresh_task_directory(self, task_dir: Path) -> List[VideoInfo]:
+        """刷新任务目录的视频列表并写入CSV，返回待下载的视频（不执行下载，需在 fetcher 上下文中调用）"""
+        # 初始化CSV管理器，直接使用指定的任务目录
+        self.csv_manager = CSVManager(task_dir)
+        original_url = self.csv_manager.get_original_url()
+        
+        if not original_url:
+            Logger.warning(f"任务目录 {task_dir.name} 中未找到有效的原始URL，将禁用该目录")
+            self._disable_task_directory(task_dir, "CSV无URL")
+            return []
+        
+        # 验证CSV文件格式
+        if not self._validate_csv_format(self.csv_manager):
+            Logger.warning(f"任务目录 {task_dir.name} 的CSV文件格式不正确，将禁用该目录")
+            self._disable_task_directory(task_dir, "缺少CSV文件")
+            return []
+        
+        Logger.info(f"发现任务URL: {original_url}")
+        
+        # 设置原始URL
+        self.original_url = original_url
+        
+        # 获取现有的视频列表
+        existing_videos = self.csv_manager.load_video_list()
+        if not existing_videos:
+            Logger.warning(f"任务目录 {task_dir.name} 的CSV文件为空，将重新获取视频列表")
+            existing_videos = []
+        
+        # 从URL获取最新的视频列表（使用增量获取优化）
+        Logger.info("正在获取最新的视频列表...")
+        try:
+            # 使用任务状态中保存的规范URL，跳过短链重定向和season_id查询
+            source_url = await self._resolve_task_url(original_url)
+            
+            # 获取现有视频URL集合用于查重
+            existing_urls = self.csv_manager.get_existing_video_urls()
+            Logger.debug(f"现有视频URL数量: {len(existing_urls)}")
+            
+            # 先用一次轻量请求获取列表指纹，与上次相同时跳过列表获取，只处理待下载视频
+            fingerprint = await self._probe_task_fingerprint(source_url) if existing_urls else None
+            if (fingerprint is not None and not self.performance["refresh"]
+                    and fingerprint == self.csv_manager.load_task_meta().get("fingerprint")):
+                Logger.info("列表未变化，跳过获取视频列表")
+                pending_videos = self.csv_manager.get_pending_videos()
+                if pending_videos:
+                    Logger.info(f"发现 {len(pending_videos)} 个待下载视频，开始下载任务")
+                return [self._csv_to_video_info(data) for data in pending_videos]
             
-            Logger.info(f"发现任务URL: {original_url}")
+            if existing_urls:
+                # 使用增量提取，支持实时查重
+                Logger.info("使用增量获取模式，支持实时查重")
+                video_list = await extract_video_list_incremental(self.fetcher, source_url, existing_urls)
+            else:
+                # 首次获取，使用普通提取
+                Logger.info("首次获取，使用普通提取模式")
+                video_list = await extract_video_list(self.fetcher, source_url)
+            
+            # 检查是否返回了风控检测指令
+            if video_list == RISK_CONTROL_DETECTED:
+                Logger.warning("检测到获取视频列表失败，触发风控检测")
+                is_risk_controlled = await self.anti_risk_manager.check_risk_control(self.fetcher)
+                if is_risk_controlled:
+                    Logger.warning("确认受到风控，设置风控状态")
+                    self.anti_risk_manager.set_risk_controlled(True)
+                    raise Exception("风控检测：获取视频列表失败，可能受到风控")
+                else:
+                    Logger.warning("未检测到风控，但获取视频列表失败")
+                    raise Exception("获取视频列表失败，非风控原因")
             
-            # 设置原始URL
-            self.original_url = original_url
+            new_videos = video_list["videos"]
+            # 增量结果只包含新增视频，为空表示没有更新，而不是列表为空
+            incremental = bool(video_list.get("incremental"))
+        except Exception as e:
+            error_msg = str(e).lower()
+            Logger.error(f"获取视频列表失败: {e}")
             
-            # 获取现有的视频列表
-            existing_videos = self.csv_manager.load_video_list()
-            if not existing_videos:
-                Logger.warning(f"任务目录 {task_dir.name} 的CSV文件为空，将重新获取视频列表")
-                existing_videos = []
+            # 检查是否为永久性错误，需要禁用目录
+            permanent_errors = ["权限不足", "访问被拒绝", "账号被封", "内容不存在", "已删除"]
+            if any(keyword in error_msg for keyword in permanent_errors):
+                Logger.warning(f"检测到永久性错误，将禁用任务目录: {task_dir.name}")
+                self._disable_task_directory(task_dir, "获取失败")
+                return []
             
-            # 从URL获取最新的视频列表（使用增量获取优化）
-            Logger.info("正在获取最新的视频列表...")
-            try:
-                # 获取现有视频URL集合用于查重
-                existing_urls = self.csv_manager.get_existing_video_urls()
-                Logger.debug(f"现有视频URL数量: {len(existing_urls)}")
-                
-                if existing_urls:
-                    # 使用增量提取，支持实时查重
-                    Logger.info("使用增量获取模式，支持实时查重")
-                    video_list = await extract_video_list_incremental(self.fetcher, original_url, existing_urls)
-                else:
-                    # 首次获取，使用普通提取
-                    Logger.info("首次获取，使用普通提取模式")
-                    video_list = await extract_video_list(self.fetcher, original_url)
-                
-                # 检查是否返回了风控检测指令
-                if video_list == RISK_CONTROL_DETECTED:
-                    Logger.warning("检测到获取视频列表失败，触发风控检测")
-                    is_risk_controlled = await self.anti_risk_manager.check_risk_control(self.fetcher)
-                    if is_risk_controlled:
-                        Logger.warning("确认受到风控，设置风控状态")
-                        self.anti_risk_manager.set_risk_controlled(True)
-                        raise Exception("风控检测：获取视频列表失败，可能受到风控")
-                    else:
-                        Logger.warning("未检测到风控，但获取视频列表失败")
-                        raise Exception("获取视频列表失败，非风控原因")
-                
-                new_videos = video_list["videos"]
-            except Exception as e:
-                error_msg = str(e).lower()
-                Logger.error(f"获取视频列表失败: {e}")
-                
-                # 检查是否为永久性错误，需要禁用目录
-                permanent_errors = ["权限不足", "访问被拒绝", "账号被封", "内容不存在", "已删除"]
-                if any(keyword in error_msg for keyword in permanent_errors):
-                    Logger.warning(f"检测到永久性错误，将禁用任务目录: {task_dir.name}")
-                    self._disable_task_directory(task_dir, "获取失败")
-                    return
-                
-                raise
+            raise
 
-            # 新增策略：若列表为空或标题已更改，先检测风控再决定是否禁用目录
-            try:
-                new_title = str(video_list.get("title", "")).strip()
-                current_dir_name = task_dir.name
-                title_changed = bool(new_title) and (new_title != current_dir_name)
-                list_empty = not new_videos or len(new_videos) == 0
+        # 新增策略：若列表为空或标题已更改，先检测风控再决定是否禁用目录
+        try:
+            new_title = str(video_list.get("title", "")).strip()
+            current_dir_name = task_dir.name
+            title_changed = bool(new_title) and (new_title != current_dir_name)
+            list_empty = (not new_videos or len(new_videos) == 0) and not incremental
+            
+            if title_changed:
+                # 标题已更改，直接禁用目录
+                Logger.warning(f"检测到标题已更改，将禁用任务目录: {current_dir_name}")
+                self._disable_task_directory(task_dir, "标题已更改")
+                return []
+            elif list_empty:
+                # 视频列表为空，检测是否受到风控
+                Logger.warning(f"检测到视频列表为空，开始风控检测: {current_dir_name}")
                 
-                if title_changed:
-                    # 标题已更改，直接禁用目录
-                    Logger.warning(f"检测到标题已更改，将禁用任务目录: {current_dir_name}")
-                    self._disable_task_directory(task_dir, "标题已更改")
-                    return
-                elif list_empty:
-                    # 视频列表为空，检测是否受到风控
-                    Logger.warning(f"检测到视频列表为空，开始风控检测: {current_dir_name}")
-                    
-                    # 检测是否受到风控
-                    is_risk_controlled = await self.anti_risk_manager.check_risk_control(self.fetcher)
+                # 检测是否受到风控
+                is_risk_controlled = await self.anti_risk_manager.check_risk_control(self.fetcher)
+                
+                if is_risk_controlled:
+                    Logger.warning("检测到风控，设置风控状态并抛出异常以触发任务队列等待")
+                    self.anti_risk_manager.set_risk_controlled(True)
+                    raise Exception("风控检测：视频列表为空，暂停处理等待风控解除")
+                else:
+                    # 没有风控，确实是视频列表为空，禁用目录
+                    Logger.warning(f"确认视频列表为空（非风控），将禁用任务目录: {current_dir_name}")
+                    self._disable_task_directory(task_dir, "视频列表为空")
+                    return []
                     
-                    if is_risk_controlled:
-                        Logger.warning("检测到风控，设置风控状态并抛出异常以触发任务队列等待")
-                        self.anti_risk_manager.set_risk_controlled(True)
-                        raise Exception("风控检测：视频列表为空，暂停处理等待风控解除")
-                    else:
-                        # 没有风控，确实是视频列表为空，禁用目录
-                        Logger.warning(f"确认视频列表为空（非风控），将禁用任务目录: {current_dir_name}")
-                        self._disable_task_directory(task_dir, "视频列表为空")
-                        return
-                        
-            except Exception as e:
-                Logger.error(f"处理空列表逻辑时出错: {e}")
-                # 若处理流程出错，不影响后续逻辑
-                pass
-            
-            if not new_videos:
-                Logger.warning("未获取到任何视频信息")
-                return
-            
-            Logger.info(f"获取到 {len(new_videos)} 个视频")
+        except Exception as e:
+            Logger.error(f"处理空列表逻辑时出错: {e}")
+            # 若处理流程出错，不影响后续逻辑
+            pass
+        
+        if not new_videos and not incremental:
+            Logger.warning("未获取到任何视频信息")
+            return []
+        
+        Logger.info(f"获取到 {len(new_videos)} 个{'新增' if incremental else ''}视频")
+        
+        # 成功获取到视频列表，添加到风控检测的测试URL列表
+        try:
+            # 根据URL类型确定类型标识
+            url_type = "unknown"
+            if "space.bilibili.com" in original_url:
+                url_type = "up主"
+            elif "favlist" in original_url:
+                url_type = "收藏夹"
+            elif "series" in original_url:
+                url_type = "视频合集"
+            elif "cheese" in original_url:
+                url_type = "课程"
+            elif "bangumi" in original_url:
+                url_type = "番剧"
+            
+            self.anti_risk_manager.add_successful_url(original_url, url_type)
+            Logger.debug(f"已添加成功URL到风控检测列表: {original_url} (类型: {url_type})")
+        except Exception as e:
+            Logger.error(f"添加成功URL到风控检测列表失败: {e}")
+        
+        # 检查是否有新增视频
+        if existing_videos:
+            # 对比CSV中的视频和当前获取的视频
+            csv_video_urls = {video['video_url'] for video in existing_videos}
+            current_video_urls = {self._get_video_url(video) for video in new_videos}
             
-            # 成功获取到视频列表，添加到风控检测的测试URL列表
-            try:
-                # 根据URL类型确定类型标识
-                url_type = "unknown"
-                if "space.bilibili.com" in original_url:
-                    url_type = "up主"
-                elif "favlist" in original_url:
-                    url_type = "收藏夹"
-                elif "series" in original_url:
-                    url_type = "视频合集"
-                elif "cheese" in original_url:
-                    url_type = "课程"
-                elif "bangumi" in original_url:
-                    url_type = "番剧"
-                
-                self.anti_risk_manager.add_successful_url(original_url, url_type)
-                Logger.debug(f"已添加成功URL到风控检测列表: {original_url} (类型: {url_type})")
-            except Exception as e:
-                Logger.error(f"添加成功URL到风控检测列表失败: {e}")
+            new_video_urls = current_video_urls - csv_video_urls
             
-            # 检查是否有新增视频
-            if existing_videos:
-                # 对比CSV中的视频和当前获取的视频
-                csv_video_urls = {video['video_url'] for video in existing_videos}
-                current_video_urls = {self._get_video_url(video) for video in new_videos}
-                
-                new_video_urls = current_video_urls - csv_video_urls
-                
-                if new_video_urls:
-                    Logger.info(f"发现 {len(new_video_urls)} 个新增视频，更新CSV文件")
-                    # 更新CSV文件（保持现有下载状态）
-                    self.csv_manager.update_video_list(new_videos, original_url)
-                else:
-                    Logger.info("没有发现新增视频")
-                
-                # 统一处理：无论是否有新增视频，都检查所有待下载视频
-                pending_videos = self.csv_manager.get_pending_videos()
-                if pending_videos:
-                    Logger.info(f"发现 {len(pending_videos)} 个待下载视频，开始下载任务")
-                    videos_to_download = [self._csv_to_video_info(data) for data in pending_videos]
-                else:
-                    Logger.info("所有视频都已下载完成")
-                    return
+            if new_video_urls:
+                Logger.info(f"发现 {len(new_video_urls)} 个新增视频，更新CSV文件")
+                # 更新CSV文件（保持现有下载状态）
+                self.csv_manager.update_video_list(new_videos, original_url, keep_existing=incremental)
             else:
-                # 首次创建CSV文件
-                Logger.info("首次创建CSV文件...")
-                self.csv_manager.save_video_list(new_videos, original_url)
-                videos_to_download = new_videos
+                Logger.info("没有发现新增视频")
             
-            # 下载待下载的视频
-            if videos_to_download:
-                Logger.info(f"开始下载 {len(videos_to_download)} 个视频...")
-                await self._download_videos(videos_to_download, original_url)
+            # 列表已同步，记录本次的指纹
+            if fingerprint is not None:
+                self.csv_manager.update_task_meta(fingerprint=fingerprint)
+            
+            # 统一处理：无论是否有新增视频，都检查所有待下载视频
+            pending_videos = self.csv_manager.get_pending_videos()
+            if pending_videos:
+                Logger.info(f"发现 {len(pending_videos)} 个待下载视频，开始下载任务")
+                videos_to_download = [self._csv_to_video_info(data) for data in pending_videos]
             else:
-                Logger.info("没有需要下载的视频")
+                Logger.info("所有视频都已下载完成")
+                return []
+        else:
+            # 首次创建CSV文件
+            Logger.info("首次创建CSV文件...")
+            self.csv_manager.save_video_list(new_videos, original_url)
+            videos_to_download = new_videos
+        
+        return videos_to_download
+    
+    async def _probe_task_fingerprint(self, source_url: str) -> Optional[Dict[str, Any]]:
+        """获取任务列表的变化指纹，不支持或失败时返回None（照常刷新列表）"""
+        extractor = find_extractor(source_url)
+        if extractor is None:
+            return None
+        try:
+            return await extractor.fingerprint(self.fetcher, source_url)
+        except Exception as e:
+            Logger.debug(f"获取列表指纹失败: {e}")
+            return None
+    
+    async def _resolve_task_url(self, original_url: str) -> str:
+        """返回任务的规范URL：优先读取任务元数据，否则解析后写回"""
+        meta = self.csv_manager.load_task_meta()
+        if meta.get("original_url") == original_url and meta.get("canonical_url"):
+            return meta["canonical_url"]
+        
+        canonical_url = await resolve_url(self.fetcher, original_url)
+        if find_extractor(canonical_url):
+            self.csv_manager.update_task_meta(original_url=original_url, canonical_url=canonical_url)
+        return canonical_url
     
     def _validate_csv_format(self, csv_manager: CSVManager) -> bool:
         """验证CSV文件格式是否正确"""
@@ -765,6 +1059,10 @@ class BatchDownloader:
         if not has_valid_prefix:
             return False
         
+        # 启用任务索引时，目录未变化则直接使用索引结果
+        if self.task_catalog is not None and dir_path.resolve().parent == self.task_catalog.root:
+            return self.task_catalog.get_task(dir_path) is not None
+        
         # 检查目录内是否包含符合格式的CSV文件
         csv_pattern = re.compile(r'^\d{2}-\d{2}-\d{2}-\d{2}-\d{2}\.csv$')
         csv_files = [f for f in dir_path.iterdir() 
@@ -781,91 +1079,252 @@ class BatchDownloader:
         except Exception:
             return False
     
-    async def _download_videos(self, videos: list[VideoInfo], original_url: str) -> None:
-        """步骤7: 逐个下载视频"""
-        for i, video in enumerate(videos, 1):
+    async def _collect_video_stream(self, first_chunk: VideoListData, stream: AsyncIterator[VideoListData | str]) -> VideoListData:
+        """读取剩余分页，合并为完整的视频列表"""
+        videos = list(first_chunk["videos"])
+        async for chunk in stream:
+            if chunk == RISK_CONTROL_DETECTED:
+                raise Exception("无法获取完整的视频列表（可能触发了风控）")
+            videos.extend(chunk["videos"])
+        return {"title": first_chunk["title"], "videos": videos}
+    
+    async def _download_streaming(self, first_chunk: VideoListData, stream: AsyncIterator[VideoListData | str], original_url: str) -> None:
+        """首次下载：第一页写入CSV后立即开始下载，后续分页到达时追加到CSV和下载队列
+        
+        获取后续分页失败时不中断下载，已获取的视频照常下载，缺失部分在下次更新时补全
+        """
+        self.csv_manager.save_video_list(first_chunk["videos"], original_url)
+        self._update_progress()
+        
+        feed = _DownloadFeed(first_chunk["videos"], complete=False)
+        
+        async def producer() -> None:
             try:
-                # 检查是否应该停止
-                if self._should_stop():
-                    Logger.warning(f"收到停止信号，中断下载任务")
-                    raise Exception("任务被手动停止")
-                
-                Logger.info(f"[{i}/{len(videos)}] 开始处理: {video['name']}")
-                
-                # 检查是否为不可访问的视频
-                if video.get('status') == 'unavailable':
-                    Logger.warning(f"[{i}/{len(videos)}] 跳过不可访问视频: {video['name']}")
-                    # 直接标记为已下载，避免重复尝试
-                    video_url = self._get_video_url(video)
-                    if self.csv_manager:
-                        self.csv_manager.mark_video_downloaded(video_url, folder_size=0)
-                    Logger.info(f"[{i}/{len(videos)}] 已标记不可访问视频为已处理: {video['name']}")
-                    # 更新进度
+                async for chunk in stream:
+                    if chunk == RISK_CONTROL_DETECTED:
+                        Logger.warning("获取后续列表分页失败，先下载已获取的视频，下次更新时补全")
+                        break
+                    if self._should_stop():
+                        break
+                    feed.extend(self.csv_manager.append_videos(chunk["videos"]))
                     self._update_progress()
-                    continue
-                
-                # 关键步骤：如果视频状态为pending，先获取详细信息
-                if video.get("status") == "pending":
-                    await self._fetch_video_details(video)
-                
-                # 步骤7关键逻辑: 检查视频文件夹是否存在，如果存在就删除重新下载
-                await self._cleanup_existing_video_folder(video)
-                
-                # 调用单视频下载方法
-                if not self.csv_manager:
-                    Logger.error("CSV管理器未初始化")
-                    continue
-                
-                download_success = await self._download_single_video(video, self.task_id, self.csv_manager.task_dir)
-                
-                if download_success:
-                    # 只有下载成功或应该跳过的情况才标记为已下载
-                    video_url = self._get_video_url(video)
-                    if self.csv_manager:
-                        # 计算文件夹大小
-                        folder_size = self._calculate_video_folder_size(video)
-                        if folder_size == 0:
-                            # 如果大小为0，等待一下再重试（yutto可能在合并音视频）
-                            Logger.debug(f"文件夹大小为0，等待2秒后重试...")
-                            await asyncio.sleep(2.0)
-                            folder_size = self._calculate_video_folder_size(video)
-                        
-                        self.csv_manager.mark_video_downloaded(video_url, folder_size=folder_size)
-                        if folder_size > 0:
-                            Logger.info(f"[{i}/{len(videos)}] 下载成功: {video['name']} (大小: {self._format_file_size(folder_size)})")
-                        else:
-                            Logger.warning(f"[{i}/{len(videos)}] 下载成功但文件夹大小为0: {video['name']}")
-                    else:
-                        Logger.info(f"[{i}/{len(videos)}] 下载成功: {video['name']}")
-                else:
-                    Logger.error(f"[{i}/{len(videos)}] 下载失败，不标记为已完成: {video['name']}")
-                
-                # 更新进度
-                self._update_progress()
-                
-                # 添加视频间延迟，避免请求过于频繁
-                if i < len(videos):  # 不是最后一个视频
-                    await asyncio.sleep(2.0)  # 延迟2秒
-                    
             except Exception as e:
-                Logger.error(f"下载视频 {video['name']} 失败: {e}")
-                
-                # 下载异常时不标记为已处理，让用户修复问题后可以重试
-                # 这样配置错误等问题修复后就能重新下载
-                Logger.warning(f"[{i}/{len(videos)}] 由于异常未标记为已完成，可修复问题后重试")
-                
-                # 更新进度（即使失败也要更新进度避免界面卡住）
-                self._update_progress()
+                Logger.error(f"获取视频列表失败: {e}")
+            finally:
+                # 唤醒正在等待新视频的下载协程
+                feed.close()
+                Logger.info(f"视频列表获取完成，共 {len(feed.items)} 个视频")
+        
+        Logger.custom(f"{first_chunk['title']} (列表获取中，已获取{len(feed.items)}个视频)", "批量下载")
+        if self.download_concurrency > 1:
+            Logger.info(f"使用 {self.download_concurrency} 个并发下载协程")
+        
+        await asyncio.gather(
+            producer(),
+            self._run_download_workers(feed, self.download_concurrency, self._process_video_in_slot, self._prefetch_video_details)
+        )
+        self._finish_downloads(feed)
+    
+    async def _download_videos(self, videos: list[VideoInfo], original_url: str) -> None:
+        """步骤7: 使用有界并发的下载协程池下载视频"""
+        feed = _DownloadFeed(videos)
+        
+        worker_count = min(self.download_concurrency, len(videos))
+        if worker_count > 1:
+            Logger.info(f"使用 {worker_count} 个并发下载协程")
+        
+        await self._run_download_workers(feed, worker_count, self._process_video_in_slot, self._prefetch_video_details)
+        self._finish_downloads(feed)
+    
+    async def _process_video_in_slot(self, video: VideoInfo, i: int, total: int) -> None:
+        """处理单个视频；多任务并行时，所有任务共享同一组下载槽位"""
+        if self._shared_download_slots is not None:
+            async with self._shared_download_slots:
+                await self._process_video(video, i, total)
+        else:
+            await self._process_video(video, i, total)
+    
+    async def _run_download_workers(self, feed: "_DownloadFeed", worker_count: int,
+                                    process_item: Callable[[Any, int, int], Awaitable[None]],
+                                    prefetch_batch: Callable[[List[Any]], Awaitable[None]]) -> None:
+        """运行下载协程池：按顺序从队列领取视频，直到队列领完且列表获取完毕
+        
+        启用元数据预取时，另有一个预取协程始终领先下载协程 metadata_prefetch 个视频，
+        提前批量获取详细信息，下载协程领取到的视频大多已是 ready 状态
+        """
+        async def worker() -> None:
+            while True:
+                # 检查是否应该停止：停止后不再领取新视频
+                if self._should_stop():
+                    return
+                taken = await feed.take()
+                if taken is None:
+                    return
+                i, item = taken
+                await process_item(item, i, len(feed.items))
                 
-                # 下载失败时也添加短暂延迟，避免连续快速重试
-                await asyncio.sleep(1.0)
+                # 添加视频间延迟，避免请求过于频繁
+                if self.download_interval > 0 and feed.has_next():
+                    await asyncio.sleep(self.download_interval)
+        
+        prefetcher = None
+        if self.metadata_prefetch > 0 and worker_count > 0:
+            prefetcher = asyncio.ensure_future(self._prefetch_ahead(feed, prefetch_batch))
+        try:
+            await asyncio.gather(*(worker() for _ in range(worker_count)))
+        finally:
+            if prefetcher is not None:
+                prefetcher.cancel()
+                await asyncio.gather(prefetcher, return_exceptions=True)
+    
+    async def _prefetch_ahead(self, feed: "_DownloadFeed", prefetch_batch: Callable[[List[Any]], Awaitable[None]]) -> None:
+        """预取协程：每当下载协程领取视频或列表追加视频时，预取接下来 metadata_prefetch 个尚未领取的视频"""
+        scheduled = 0
+        while True:
+            # 已被下载协程领取的视频由下载协程自行获取
+            scheduled = max(scheduled, feed.taken)
+            limit = min(len(feed.items), feed.taken + self.metadata_prefetch)
+            if scheduled < limit:
+                batch = feed.items[scheduled:limit]
+                scheduled = limit
+                await prefetch_batch(batch)
                 continue
+            if feed.complete and scheduled >= len(feed.items):
+                return
+            await feed.wait_changed()
+    
+    async def _prefetch_video_details(self, videos: List[VideoInfo]) -> None:
+        """并发获取一批待处理视频的详细信息，完成后一次性写入CSV
+        
+        请求速率由共享限速器控制；获取失败的视频保持 pending，下载前按原流程重新获取
+        （包括不可访问视频的处理）
+        """
+        loop = asyncio.get_running_loop()
+        batch: Dict[str, VideoInfo] = {}
+        for video in videos:
+            if video.get("status") != "pending":
+                continue
+            video_url = self._get_video_url(video)
+            if video_url in self._detail_prefetches:
+                continue
+            batch[video_url] = video
+            self._detail_prefetches[video_url] = loop.create_future()
+        if not batch:
+            return
+        
+        updates: Dict[str, Dict[str, str]] = {}
+        
+        async def prefetch(fetcher: Fetcher, video_url: str, video: VideoInfo) -> None:
+            try:
+                updates[video_url] = await self._resolve_video_details(fetcher, video)
+            except Exception as e:
+                Logger.debug(f"预取视频 {video['avid']} 详细信息失败，下载前重试: {e}")
+        
+        try:
+            async with self.fetcher as fetcher:
+                await asyncio.gather(*(prefetch(fetcher, video_url, video) for video_url, video in batch.items()))
+            if updates and self.csv_manager:
+                self.csv_manager.update_videos_info(updates)
+            Logger.debug(f"已预取 {len(updates)}/{len(batch)} 个视频的详细信息")
+        finally:
+            for video_url in batch:
+                future = self._detail_prefetches.pop(video_url)
+                if not future.done():
+                    future.set_result(None)
+    
+    def _finish_downloads(self, feed: "_DownloadFeed") -> None:
+        """下载协程池结束后：报告中断情况，显示最终统计并合并状态日志"""
+        remaining = len(feed.items) - feed.taken
+        if self._should_stop() and remaining:
+            Logger.warning(f"收到停止信号，中断下载任务（剩余 {remaining} 个视频未处理）")
         
-        # 显示最终统计
+        # 显示最终统计，并将本轮的状态日志合并回CSV快照
         if self.csv_manager:
+            self.csv_manager.compact_journal()
             stats = self.csv_manager.get_download_stats()
             Logger.custom(f"下载完成 - 成功: {stats['downloaded']}, 总计: {stats['total']}", "批量下载")
     
+    async def _process_video(self, video: VideoInfo, i: int, total: int) -> None:
+        """处理单个视频：获取详情、清理、下载并更新CSV状态
+        
+        CSV的读写都是同步调用，在事件循环中不会与其他下载协程交错，
+        因此并发下载时状态仍按完成顺序逐条落盘。
+        """
+        try:
+            # 检查是否应该停止
+            if self._should_stop():
+                Logger.warning(f"收到停止信号，中断下载任务")
+                raise Exception("任务被手动停止")
+            
+            Logger.info(f"[{i}/{total}] 开始处理: {video['name']}")
+            
+            # 检查是否为不可访问的视频
+            if video.get('status') == 'unavailable':
+                Logger.warning(f"[{i}/{total}] 跳过不可访问视频: {video['name']}")
+                # 直接标记为已下载，避免重复尝试
+                video_url = self._get_video_url(video)
+                if self.csv_manager:
+                    self.csv_manager.mark_video_downloaded(video_url, folder_size=0)
+                Logger.info(f"[{i}/{total}] 已标记不可访问视频为已处理: {video['name']}")
+                # 更新进度
+                self._update_progress()
+                return
+            
+            # 关键步骤：如果视频状态为pending，先获取详细信息（正在预取时等待预取完成）
+            prefetch = self._detail_prefetches.get(self._get_video_url(video))
+            if prefetch is not None:
+                await asyncio.shield(prefetch)
+            if video.get("status") == "pending":
+                await self._fetch_video_details(video)
+            
+            # 步骤7关键逻辑: 检查视频文件夹是否存在，删除重新下载或保留可续传的部分
+            await self._prepare_video_folder(video)
+            
+            # 调用单视频下载方法
+            if not self.csv_manager:
+                Logger.error("CSV管理器未初始化")
+                return
+            
+            download_success = await self._download_single_video(video, self.task_id, self.csv_manager.task_dir)
+            
+            if download_success:
+                # 只有下载成功或应该跳过的情况才标记为已下载
+                video_url = self._get_video_url(video)
+                if self.csv_manager:
+                    # 计算文件夹大小
+                    folder_size = self._calculate_video_folder_size(video)
+                    if folder_size == 0:
+                        # 如果大小为0，等待一下再重试（yutto可能在合并音视频）
+                        Logger.debug(f"文件夹大小为0，等待2秒后重试...")
+                        await asyncio.sleep(2.0)
+                        folder_size = self._calculate_video_folder_size(video)
+                    
+                    self.csv_manager.mark_video_downloaded(video_url, folder_size=folder_size)
+                    if folder_size > 0:
+                        Logger.info(f"[{i}/{total}] 下载成功: {video['name']} (大小: {self._format_file_size(folder_size)})")
+                    else:
+                        Logger.warning(f"[{i}/{total}] 下载成功但文件夹大小为0: {video['name']}")
+                else:
+                    Logger.info(f"[{i}/{total}] 下载成功: {video['name']}")
+            else:
+                Logger.error(f"[{i}/{total}] 下载失败，不标记为已完成: {video['name']}")
+            
+            # 更新进度
+            self._update_progress()
+                
+        except Exception as e:
+            Logger.error(f"下载视频 {video['name']} 失败: {e}")
+            
+            # 下载异常时不标记为已处理，让用户修复问题后可以重试
+            # 这样配置错误等问题修复后就能重新下载
+            Logger.warning(f"[{i}/{total}] 由于异常未标记为已完成，可修复问题后重试")
+            
+            # 更新进度（即使失败也要更新进度避免界面卡住）
+            self._update_progress()
+            
+            # 下载失败时也添加短暂延迟，避免连续快速重试
+            await asyncio.sleep(1.0)
+    
     def _get_video_url(self, video: VideoInfo) -> str:
         """获取视频URL"""
         if "episode_id" in video:
@@ -881,6 +1340,45 @@ class BatchDownloader:
             # 普通视频使用avid
             return video['avid'].to_url()
     
+    async def _get_episode_info(self, fetcher: Fetcher, main_folder: str, episode_id: str) -> Dict[str, Any]:
+        """获取番剧剧集/课程课时的详细信息
+        
+        主目录名（番剧-编号-名称 / 课程-编号-名称）中带有season_id，同一季只请求一次整季信息，
+        其余剧集直接从索引中读取；无法解析season_id、整季信息获取失败或索引中没有该剧集时按单集请求
+        """
+        is_cheese = main_folder.startswith("课程-")
+        parts = main_folder.split("-", 2)
+        season_id = parts[1] if len(parts) == 3 and parts[1].isdigit() else None
+        
+        if season_id:
+            key = f"{parts[0]}-{season_id}"
+            index = self._season_episode_indexes.get(key)
+            if index is None:
+                # 并发的下载协程共用同一个请求
+                request = self._season_index_requests.get(key)
+                if request is None:
+                    loader = get_cheese_season_episodes if is_cheese else get_bangumi_season_episodes
+                    request = self._season_index_requests[key] = asyncio.ensure_future(loader(fetcher, season_id))
+                try:
+                    index = await request
+                    if key not in self._season_episode_indexes:
+                        self._season_episode_indexes[key] = index
+                        Logger.debug(f"已索引 {main_folder} 的 {len(index)} 个剧集")
+                except Exception as e:
+                    # 记录空索引，同一季的其余剧集直接按单集获取，不再重复请求整季信息
+                    if key not in self._season_episode_indexes:
+                        self._season_episode_indexes[key] = {}
+                        Logger.warning(f"获取 {main_folder} 的整季信息失败，该季改为按单集获取: {e}")
+                    index = {}
+                finally:
+                    self._season_index_requests.pop(key, None)
+            
+            if episode_id in index:
+                return dict(index[episode_id])
+        
+        single_loader = get_cheese_episode_info if is_cheese else get_bangumi_episode_info
+        return await single_loader(fetcher, episode_id)
+    
     async def _fetch_video_details(self, video: VideoInfo) -> None:
         """获取视频的详细信息"""
         avid = video["avid"]
@@ -888,105 +1386,13 @@ class BatchDownloader:
         
         try:
             # 使用正确的异步上下文管理器语法
-            async with Fetcher(sessdata=self.sessdata) as fetcher:
-                # 判断是否为番剧或课程视频
-                episode_id = video.get("episode_id")
-                if episode_id:
-                    # 获取主文件夹名（保持原来的类型-编号-名称格式）
-                    main_folder = self._extract_main_folder(video)
-                    
-                    # 根据主文件夹类型判断是番剧还是课程
-                    if main_folder.startswith("番剧-"):
-                        # 番剧视频，使用episode_id获取详细信息
-                        Logger.info(f"获取番剧剧集 {episode_id} 的详细信息...")
-                        episode_info = await get_bangumi_episode_info(fetcher, episode_id)
-                        
-                        # 生成番剧视频的文件夹名：视频号-标题
-                        video_folder_name = f"{episode_info['avid']}-{episode_info['name']}"
-                        
-                        # 更新视频信息
-                        video.update({
-                            "avid": episode_info["avid"],
-                            "cid": episode_info["cid"],
-                            "title": episode_info["title"],
-                            "name": episode_info["name"],
-                            "author": episode_info["author"],
-                            "duration": episode_info["duration"],
-                            "path": Path(main_folder) / video_folder_name,  # 主文件夹/视频号-标题
-                            "status": "ready"
-                        })
-                        
-                        Logger.info(f"已获取并保存番剧剧集 {episode_id} 的详细信息: {episode_info['name']}")
-                        
-                    elif main_folder.startswith("课程-"):
-                        # 课程视频，使用episode_id获取详细信息
-                        Logger.info(f"获取课程课时 {episode_id} 的详细信息...")
-                        episode_info = await get_cheese_episode_info(fetcher, episode_id)
-                        
-                        # 生成课程视频的文件夹名：视频号-标题
-                        video_folder_name = f"{episode_info['avid']}-{episode_info['name']}"
-                        
-                        # 更新视频信息
-                        video.update({
-                            "avid": episode_info["avid"],
-                            "cid": episode_info["cid"],
-                            "title": episode_info["title"],
-                            "name": episode_info["name"],
-                            "author": episode_info["author"],
-                            "duration": episode_info["duration"],
-                            "path": Path(main_folder) / video_folder_name,  # 主文件夹/视频号-标题
-                            "status": "ready"
-                        })
-                        
-                        Logger.info(f"已获取并保存课程课时 {episode_id} 的详细信息: {episode_info['name']}")
-                    
-                    # 立即更新CSV文件中的详细信息
-                    video_url = self._get_video_url(video)
-                    if self.csv_manager:
-                        self.csv_manager.update_video_info(video_url, {
-                            "title": episode_info["title"],
-                            "name": episode_info["name"],
-                            "cid": str(episode_info["cid"]),
-                            "download_path": str(video["path"]),
-                            "status": "ready"
-                        })
-                else:
-                    # 投稿视频，使用原有逻辑获取详细信息
-                    detailed_video_data = await get_ugc_video_list(fetcher, avid)
-                    
-                    # 更新视频信息
-                    if detailed_video_data and detailed_video_data.get("videos"):
-                        detailed_video = detailed_video_data["videos"][0]
-                        
-                        # 获取主文件夹名（保持原来的类型-ID-名称格式）
-                        main_folder = self._extract_main_folder(video)
-                        
-                        # 生成单个视频的文件夹名：视频号-标题
-                        video_folder_name = f"{avid}-{detailed_video['title']}"
-                        
-                        # 更新详细信息
-                        video.update({
-                            "cid": detailed_video["cid"],
-                            "title": detailed_video["title"],
-                            "name": detailed_video["name"],
-                            "path": Path(main_folder) / video_folder_name,  # 主文件夹/视频号-标题
-                            "status": "ready"
-                        })
-                        
-                        # 立即更新CSV文件中的详细信息
-                        video_url = self._get_video_url(video)
-                        if self.csv_manager:
-                            self.csv_manager.update_video_info(video_url, {
-                                "title": detailed_video["title"],
-                                "name": detailed_video["name"],
-                                "cid": str(detailed_video["cid"]),
-                                "download_path": str(video["path"]),
-                                "status": "ready"
-                            })
-                        
-                        Logger.info(f"已获取并保存视频 {avid} 的详细信息")
-                    else:
-                        raise Exception("无法获取视频详细信息")
+            async with self.fetcher as fetcher:
+                video_url = self._get_video_url(video)
+                fields = await self._resolve_video_details(fetcher, video)
+                
+                # 立即更新CSV文件中的详细信息
+                if self.csv_manager:
+                    self.csv_manager.update_video_info(video_url, fields)
                         
         except Exception as e:
             error_msg = str(e)
@@ -1004,6 +1410,144 @@ class BatchDownloader:
                 Logger.warning(f"视频 {avid} 获取失败，跳过此次下载")
                 raise  # 重新抛出异常，让上层处理
     
+    async def _resolve_video_details(self, fetcher: Fetcher, video: VideoInfo) -> Dict[str, str]:
+        """请求视频的详细信息并更新video（状态改为ready），返回需要写入CSV的字段"""
+        avid = video["avid"]
+        
+        # 判断是否为番剧或课程视频
+        episode_id = video.get("episode_id")
+        if episode_id:
+            # 获取主文件夹名（保持原来的类型-编号-名称格式）
+            main_folder = self._extract_main_folder(video)
+            
+            # 根据主文件夹类型判断是番剧还是课程
+            if main_folder.startswith("番剧-"):
+                kind = "番剧剧集"
+            elif main_folder.startswith("课程-"):
+                kind = "课程课时"
+            else:
+                raise Exception(f"无法识别剧集 {episode_id} 所属的番剧/课程")
+            
+            # 使用episode_id获取详细信息
+            Logger.info(f"获取{kind} {episode_id} 的详细信息...")
+            episode_info = await self._get_episode_info(fetcher, main_folder, episode_id)
+            
+            # 生成视频的文件夹名：视频号-标题
+            video_folder_name = f"{episode_info['avid']}-{episode_info['name']}"
+            
+            # 更新视频信息
+            video.update({
+                "avid": episode_info["avid"],
+                "cid": episode_info["cid"],
+                "title": episode_info["title"],
+                "name": episode_info["name"],
+                "author": episode_info["author"],
+                "duration": episode_info["duration"],
+                "path": Path(main_folder) / video_folder_name,  # 主文件夹/视频号-标题
+                "status": "ready"
+            })
+            
+            Logger.info(f"已获取{kind} {episode_id} 的详细信息: {episode_info['name']}")
+            return {
+                "title": episode_info["title"],
+                "name": episode_info["name"],
+                "cid": str(episode_info["cid"]),
+                "download_path": str(video["path"]),
+                "duration": str(int(episode_info["duration"] or 0)),
+                "status": "ready"
+            }
+        
+        # 投稿视频，使用原有逻辑获取详细信息
+        detailed_video_data = await get_ugc_video_list(fetcher, avid)
+        if not detailed_video_data or not detailed_video_data.get("videos"):
+            raise Exception("无法获取视频详细信息")
+        
+        detailed_video = detailed_video_data["videos"][0]
+        
+        # 获取主文件夹名（保持原来的类型-ID-名称格式）
+        main_folder = self._extract_main_folder(video)
+        
+        # 生成单个视频的文件夹名：视频号-标题
+        video_folder_name = f"{avid}-{detailed_video['title']}"
+        
+        # 更新详细信息（分P数以分P列表为准）
+        video.update({
+            "cid": detailed_video["cid"],
+            "title": detailed_video["title"],
+            "name": detailed_video["name"],
+            "path": Path(main_folder) / video_folder_name,  # 主文件夹/视频号-标题
+            "is_multi_part": detailed_video.get("is_multi_part", False),
+            "total_parts": detailed_video.get("total_parts", 1),
+            "duration": detailed_video.get("duration") or video.get("duration") or 0,
+            "status": "ready"
+        })
+        
+        Logger.info(f"已获取视频 {avid} 的详细信息")
+        return {
+            "title": detailed_video["title"],
+            "name": detailed_video["name"],
+            "cid": str(detailed_video["cid"]),
+            "download_path": str(video["path"]),
+            "is_multi_part": str(video["is_multi_part"]),
+            "total_parts": str(video["total_parts"]),
+            "duration": str(int(video["duration"])),
+            "status": "ready"
+        }
+    
+    async def _prepare_video_folder(self, video: VideoInfo) -> None:
+        """下载（或重试）前处理视频文件夹：启用断点续传时只清理损坏的文件，否则全部删除"""
+        if self.resume_downloads:
+            await self._prepare_resume(video)
+        else:
+            await self._cleanup_existing_video_folder(video)
+    
+    async def _prepare_resume(self, video: VideoInfo) -> None:
+        """断点续传：保留可以继续使用的下载文件
+        
+        结构有效的分段文件（.m4s）保留，yutto会从已下载的位置继续；
+        完整的视频文件保留（yutto会跳过已存在的文件），不完整的删除后重新合并；
+        其他文件（弹幕、字幕、封面）体积很小，保留由yutto覆盖
+        """
+        if not self.csv_manager:
+            return
+        
+        final_video_folder_name = self._get_final_video_folder_name(video)
+        task_dir = self.csv_manager.task_dir
+        video_folder_path = task_dir / final_video_folder_name
+        
+        candidates = [task_dir / f"{final_video_folder_name}{ext}" for ext in ['.mp4', '_audio.m4s', '_video.m4s']]
+        if video_folder_path.is_dir():
+            candidates.extend(path for path in video_folder_path.rglob("*") if path.is_file())
+        
+        resumable_bytes = 0
+        kept_files = 0
+        removed_items = []
+        for path in candidates:
+            suffix = path.suffix.lower()
+            if suffix not in PARTIAL_MEDIA_SUFFIXES and suffix not in FINAL_MEDIA_SUFFIXES:
+                continue
+            if not path.is_file():
+                continue
+            if suffix in PARTIAL_MEDIA_SUFFIXES:
+                size = partial_fragment_size(path)
+                if size:
+                    resumable_bytes += size
+                    continue
+            elif check_complete_mp4(path):
+                kept_files += 1
+                continue
+            try:
+                path.unlink()
+                removed_items.append(path.name)
+            except OSError as e:
+                Logger.warning(f"删除损坏文件时出现警告: {path} - {e}")
+        
+        if resumable_bytes or kept_files:
+            Logger.info(f"保留已下载的内容继续下载: {final_video_folder_name}"
+                        f"（分段 {self._format_file_size(resumable_bytes)}，完整文件 {kept_files} 个）")
+        for name in removed_items:
+            Logger.debug(f"  已删除损坏或不完整的文件 {name}")
+    
     async def _cleanup_existing_video_folder(self, video: VideoInfo) -> None:
         """清理已存在的视频文件夹和文件"""
         if not self.csv_manager:
@@ -1104,16 +1648,9 @@ class BatchDownloader:
             return False
         
         # 检查视频是否已下载或不可访问
-        pending_videos = self.csv_manager.get_pending_videos()
-        if pending_videos is None:
-            pending_videos = []
-        video_urls_pending = [v['video_url'] for v in pending_videos]
-        
-        # 添加调试信息
         Logger.debug(f"当前视频URL: {video_url}")
-        Logger.debug(f"待下载URL列表: {video_urls_pending[:3]}...")  # 只显示前3个避免太长
         
-        if video_url not in video_urls_pending:
+        if not self.csv_manager.is_video_pending(video_url):
             Logger.info(f"视频 {avid} 已下载，跳过")
             return True
         
@@ -1133,11 +1670,13 @@ class BatchDownloader:
                 # 如果是重试，先清理现有文件夹
                 if attempt > 0:
                     Logger.info(f"准备第 {attempt + 1}/{max_retries} 次重试下载...")
-                    await self._cleanup_existing_video_folder(video)
+                    await self._prepare_video_folder(video)
                     # 重试时添加延迟，避免立即重试
                     await asyncio.sleep(min(2.0 * attempt, 10.0))  # 递增延迟，最大10秒
                 
-                result = await self._perform_single_download(video, task_id, output_dir)
+                # 运行yutto前领取全局下载槽位，各任务之间轮流分配
+                async with get_download_scheduler().slot(self.task_id or f"local-{id(self)}", self.sessdata, output_dir):
+                    result = await self._perform_single_download(video, task_id, output_dir)
                 
                 if result == "success":
                     if attempt > 0:
@@ -1226,67 +1765,64 @@ class BatchDownloader:
         # 添加用户额外参数
         yutto_cmd.extend(self.extra_args)
         
-        # 收集yutto输出用于智能判断结果
-        yutto_output = []
+        # 逐行匹配失败分类规则，用于智能判断结果
+        classifier = self.failure_rules.classifier()
+        process = None
         
         try:
             Logger.debug(f"执行命令: {' '.join(yutto_cmd)}")
             
-            # 执行yutto命令，捕获输出并实时转发到Logger
-            process = await asyncio.create_subprocess_exec(
-                *yutto_cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.STDOUT,
-                cwd=Path(__file__).parent
-            )
+            # 启用常驻进程时交给已导入yutto的进程执行，未启用或不可用时启动新的yutto进程
+            process = await get_yutto_worker_pool().submit(yutto_cmd[1:])
+            if process is None:
+                # 执行yutto命令，捕获输出并实时转发到Logger
+                process = await asyncio.create_subprocess_exec(
+                    *yutto_cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.STDOUT,
+                    cwd=Path(__file__).parent
+                )
             
             # 保存进程引用以便停止控制
-            if self.task_id and self.task_control:
-                self.task_control[self.task_id]['process'] = process
+            self._register_process(process)
             
-            # 实时读取和转发输出
+            # 实时读取和转发输出（按 \r 或 \n 切分，进度条原地刷新的输出也能及时解析）
+            progress_parser = ProgressParser()
+            pending_output = b""
             if process.stdout:
                 while True:
                     # 检查是否应该停止
                     if self._should_stop():
                         Logger.warning("收到停止信号，终止yutto进程")
-                        process.terminate()
-                        try:
-                            await asyncio.wait_for(process.wait(), timeout=3.0)
-                        except asyncio.TimeoutError:
-                            Logger.warning("进程未在3秒内终止，强制杀死")
-                            process.kill()
+                        await self._terminate_process(process)
                         raise Exception("任务被手动停止")
                     
+                    # 已出现致命错误（配置问题），重试也不会成功，不必等进程结束
+                    if classifier.fatal_rule is not None:
+                        Logger.error(f"检测到配置错误: {classifier.fatal_rule.pattern}，终止yutto进程")
+                        await self._terminate_process(process)
+                        return "failure"
+                    
                     try:
-                        line = await asyncio.wait_for(process.stdout.readline(), timeout=1.0)
-                        if not line:
-                            break
-                        
-                        # 解码输出并发送到Logger
-                        output = line.decode('utf-8', errors='ignore').strip()
-                        if output:
-                            # 收集输出用于后续分析
-                            yutto_output.append(output)
-                            
-                            # 根据输出内容判断日志级别
-                            if 'error' in output.lower() or 'failed' in output.lower():
-                                Logger.error(f"[yutto] {output}")
-                            elif 'warning' in output.lower() or 'warn' in output.lower():
-                                Logger.warning(f"[yutto] {output}")
-                            elif 'downloading' in output.lower() or 'progress' in output.lower() or '%' in output:
-                                Logger.custom(output, "下载进度")
-                            else:
-                                Logger.info(f"[yutto] {output}")
+                        chunk = await asyncio.wait_for(process.stdout.read(65536), timeout=1.0)
                     except asyncio.TimeoutError:
                         # 超时继续循环，用于检查停止信号
                         continue
+                    if not chunk:
+                        break
+                    
+                    lines, pending_output = split_output(pending_output + chunk)
+                    for line in lines:
+                        self._handle_yutto_output(line, classifier, progress_parser, avid)
+                if pending_output:
+                    self._handle_yutto_output(pending_output, classifier, progress_parser, avid)
             
             # 等待进程完成
             return_code = await process.wait()
             
             # 分析下载结果并返回结果类型
-            download_result = self._analyze_yutto_result(return_code, yutto_output)
+            worker_result = process.result if isinstance(process, YuttoJob) else None
+            download_result = self._analyze_yutto_result(return_code, classifier, worker_result)
             return download_result
                 
         except Exception as e:
@@ -1294,82 +1830,114 @@ class BatchDownloader:
             raise
         finally:
             # 清理进程引用
-            if self.task_id and self.task_control:
-                self.task_control[self.task_id]['process'] = None
+            if process is not None:
+                self._unregister_process(process)
+                self._publish_transfer(str(avid), None)
+    
+    async def _terminate_process(self, process) -> None:
+        """终止yutto进程，3秒内未退出时强制杀死"""
+        process.terminate()
+        try:
+            await asyncio.wait_for(process.wait(), timeout=3.0)
+        except asyncio.TimeoutError:
+            Logger.warning("进程未在3秒内终止，强制杀死")
+            process.kill()
+    
+    def _handle_yutto_output(self, raw: bytes, classifier: FailureClassifier, progress_parser: ProgressParser, avid) -> None:
+        """处理yutto的一行输出：进度行解析后限流记录，其余行交给失败分类器并转发到Logger"""
+        output = clean_output_line(raw)
+        if not output:
+            return
+        
+        lowered = output.lower()
+        is_error = 'error' in lowered or 'failed' in lowered
+        if not is_error and progress_parser.parse(output):
+            if progress_parser.due("log", PROGRESS_LOG_INTERVAL):
+                Logger.custom(f"{avid} {progress_parser.progress.format()}", "下载进度")
+            if progress_parser.due("publish", PROGRESS_PUBLISH_INTERVAL):
+                self._publish_transfer(str(avid), progress_parser.progress)
+            return
+        
+        # 匹配失败分类规则，用于后续判断结果
+        classifier.feed(output)
+        
+        # 根据输出内容判断日志级别
+        if is_error:
+            Logger.error(f"[yutto] {output}")
+        elif 'warn' in lowered:
+            Logger.warning(f"[yutto] {output}")
+        elif 'downloading' in lowered or 'progress' in lowered:
+            Logger.custom(output, "下载进度")
+        else:
+            Logger.info(f"[yutto] {output}")
+    
+    def _publish_transfer(self, video_key: str, progress: Optional[DownloadProgress]) -> None:
+        """把视频的实时下载速度和剩余时间写入任务控制字典（progress为None时移除该视频）"""
+        if not self.task_id or self.task_id not in self.task_control:
+            return
+        task = self.task_control[self.task_id]
+        transfer = task.setdefault('transfer', {'videos': {}})
+        videos = transfer['videos']
+        if progress is None:
+            if videos.pop(video_key, None) is None:
+                return
+        else:
+            videos[video_key] = progress.to_dict()
+        
+        speed = sum(video['speed'] for video in videos.values())
+        transfer.update(active=len(videos), speed=speed, speed_text=format_speed(speed))
+        self._emit_task_progress()
+    
+    def _register_process(self, process) -> None:
+        """登记正在运行的yutto进程，便于停止任务时统一终止"""
+        if not self.task_id or self.task_id not in self.task_control:
+            return
+        task = self.task_control[self.task_id]
+        processes = task.setdefault('processes', [])
+        processes.append(process)
+        task['process'] = process
+    
+    def _unregister_process(self, process) -> None:
+        """移除已结束的yutto进程引用"""
+        if not self.task_id or self.task_id not in self.task_control:
+            return
+        task = self.task_control[self.task_id]
+        processes = task.get('processes') or []
+        if process in processes:
+            processes.remove(process)
+        # 'process' 始终指向仍在运行的最后一个进程
+        task['process'] = processes[-1] if processes else None
 
-    def _analyze_yutto_result(self, return_code: int, output_lines: list) -> str:
+    def _analyze_yutto_result(self, return_code: int, classifier: FailureClassifier, worker_result: Optional[Dict[str, Any]] = None) -> str:
         """分析yutto下载结果
         
+        worker_result 为常驻进程返回的结构化结果，能识别时优先使用，
+        否则使用输出逐行匹配失败分类规则（见 utils/failure_classifier.py）的结果
+        
         Returns:
             "success": 下载成功
             "should_skip": 应该跳过（充电视频等不可下载内容）
             "retry": 可重试的临时错误（网络问题等）
             "failure": 真正的失败（配置错误等）
         """
-        # 合并所有输出为一个字符串用于分析
-        full_output = "\n".join(output_lines).lower()
-        
         # 如果返回码为0，说明下载成功
         if return_code == 0:
             return "success"
         
-        # 分析失败原因 - 优先检查配置问题
-        # 1. 配置问题（不应标记为成功）- 优先级最高
-        config_error_indicators = [
-            "启用了严格校验大会员或登录模式，请检查 sessdata 或大会员状态",
-            "请检查 sessdata",
-            "cookie 无效",
-            "登录失败",
-            "身份验证失败"
-        ]
-        
-        for indicator in config_error_indicators:
-            if indicator in full_output:
-                Logger.error(f"检测到配置错误: {indicator}")
-                return "failure"
-        
-        # 2. 应该跳过的情况（标记为成功避免重复尝试）- 优先级较高
-        skip_indicators = [
-            "尚不支持 dash 格式",  # 充电视频
-            "该视频（bvid:",       # 充电视频的另一种表达
-            "视频不存在",
-            "稿件不可见",
-            "已删除",
-            "权限不足",
-            "需要付费",
-            "会员专享",  # 仅当不是配置错误时才跳过
-            "充电专享"
-        ]
-        
-        for indicator in skip_indicators:
-            if indicator in full_output:
-                Logger.info(f"检测到应跳过的失败类型: {indicator}")
-                return "should_skip"
-        
-        # 3. 可重试的临时错误
-        retry_error_indicators = [
-            "网络错误",
-            "连接超时",
-            "请求失败",
-            "下载失败",
-            "separator is not found",  # 网络传输问题
-            "chunk exceed the limit",  # 网络传输问题
-            "connection reset",
-            "timeout",
-            "temporary failure",
-            "无法访问",
-            "无法连接",
-            "网络不可达",
-            "服务器错误",
-            "503 service unavailable",
-            "502 bad gateway",
-            "504 gateway timeout"
-        ]
-        
-        for indicator in retry_error_indicators:
-            if indicator in full_output:
-                Logger.warning(f"检测到可重试的错误: {indicator}")
-                return "retry"
+        structured_result = classify_worker_result(worker_result)
+        if structured_result:
+            Logger.info(f"yutto返回错误: {worker_result.get('error') or worker_result.get('exception')}")
+            return structured_result
+        
+        rule = classifier.matched_rule
+        if rule is not None:
+            if rule.category == "failure":
+                Logger.error(f"检测到配置错误: {rule.pattern}")
+            elif rule.category == "should_skip":
+                Logger.info(f"检测到应跳过的失败类型: {rule.pattern}")
+            else:
+                Logger.warning(f"检测到可重试的错误: {rule.pattern}")
+            return rule.category
         
         # 默认情况：未知错误，不标记为成功
         Logger.warning(f"未识别的失败类型，返回码: {return_code}")
@@ -1461,6 +2029,14 @@ class BatchDownloader:
         """解析CSV中的folder_size字符串"""
         return CSVManager.parse_folder_size_value(value)
     
+    @staticmethod
+    def _parse_duration_value(value: Optional[str]) -> int:
+        """解析CSV中的总时长（秒），旧版本CSV没有该列或尚未获取时为0"""
+        try:
+            return max(0, int(value or 0))
+        except ValueError:
+            return 0
+    
     def _csv_to_video_info(self, csv_data: Dict[str, str]) -> VideoInfo:
         """将CSV数据转换为VideoInfo"""
         video_url = csv_data['video_url']
@@ -1489,6 +2065,7 @@ class BatchDownloader:
                 'episode_id': episode_id,  # 保存episode_id用于获取详细信息
                 'is_multi_part': csv_data.get('is_multi_part', 'False') == 'True',  # 从CSV读取多P标记
                 'total_parts': int(csv_data.get('total_parts', '1')),  # 从CSV读取总分P数量
+                'duration': self._parse_duration_value(csv_data.get('duration')),
                 'folder_size': folder_size
             }
         else:
@@ -1527,6 +2104,7 @@ class BatchDownloader:
                 'status': csv_data.get('status', 'pending'),
                 'is_multi_part': csv_data.get('is_multi_part', 'False') == 'True',  # 从CSV读取多P标记
                 'total_parts': int(csv_data.get('total_parts', '1')),  # 从CSV读取总分P数量
+                'duration': self._parse_duration_value(csv_data.get('duration')),
                 'folder_size': folder_size
             }
         
@@ -5,17 +5,27 @@
 
 import re
 import asyncio
+from contextlib import aclosing
 from pathlib import Path
 from typing import Dict, List, Any
 from utils.logger import Logger
 from utils.fetcher import Fetcher
 from api.bilibili import (
     get_favourite_avids,
+    iter_favourite_avids,
+    iter_favourite_medias,
     get_favourite_avids_incremental,
+    get_favourite_medias_incremental,
+    get_favourite_fingerprint,
     get_favourite_info,
     get_user_space_videos,
+    iter_user_space_videos,
     get_user_space_videos_incremental,
+    get_user_space_fingerprint,
     get_series_videos,
+    iter_series_videos,
+    get_series_videos_incremental,
+    get_series_fingerprint,
     get_watch_later_avids,
     get_bangumi_list,
     get_season_id_by_media_id,
@@ -29,14 +39,65 @@ from api.bilibili import (
     RISK_CONTROL_DETECTED,
 )
 from abc import ABC, abstractmethod
-from typing import List, Optional, Tuple
+from typing import AsyncIterator, List, Optional, Tuple
 
 from utils.types import *
 from utils.fetcher import Fetcher
 from utils.logger import Logger
+from utils.resolution_cache import get_resolution_cache
 from api.bilibili import *
 
 
+def _placeholder_videos(folder_name: str, avids: List[AvId], author: str = "") -> List[VideoInfo]:
+    """创建占位符视频条目，稍后按需获取详细信息"""
+    return [
+        {
+            "avid": avid,
+            "cid": CId("0"),  # 占位符
+            "title": "",  # 空标题，稍后获取
+            "name": "",   # 空名称，稍后获取
+            "pubdate": 0, # 空发布时间，稍后获取
+            "author": author,
+            "duration": 0, # 空时长，稍后获取
+            "path": Path(f"{folder_name}/{avid}"),  # 临时路径，下载时会更新为avid-title
+            "status": "pending"  # 标记为待处理，需要下载时再获取详细信息
+        }
+        for avid in avids
+    ]
+
+
+def _favourite_media_to_video(folder_name: str, media: Dict[str, Any]) -> VideoInfo:
+    """根据收藏夹条目自带的信息创建视频条目
+    
+    单P的普通视频信息已足够下载，直接标记为 ready，无需再请求详细信息；
+    多P视频仍需获取分P列表，失效或非视频条目按占位符处理
+    """
+    avid = BvId(media["bvid"])
+    video = _placeholder_videos(folder_name, [avid])[0]
+    first_cid = (media.get("ugc") or {}).get("first_cid")
+    # type 2 为普通视频，attr 非0表示失效等异常状态
+    if media.get("type") != 2 or media.get("attr", 0) != 0 or not first_cid or not media.get("title"):
+        return video
+    
+    total_parts = int(media.get("page") or 1)
+    video.update({
+        "cid": CId(str(first_cid)),
+        "title": media["title"],
+        "name": media["title"],
+        "pubdate": media.get("pubtime") or media.get("ctime") or 0,
+        "author": (media.get("upper") or {}).get("name", ""),
+        "duration": media.get("duration") or 0,
+        "is_multi_part": total_parts > 1,
+        "total_parts": total_parts,
+    })
+    if total_parts == 1:
+        video.update({
+            "path": Path(folder_name) / f"{avid}-{media['title']}",  # 主文件夹/视频号-标题
+            "status": "ready"
+        })
+    return video
+
+
 class URLExtractor(ABC):
     """URL提取器基类"""
     
@@ -55,9 +116,37 @@ class URLExtractor(ABC):
         # 默认实现：回退到普通提取
         return await self.extract(fetcher, url)
     
+    async def extract_stream(self, fetcher: Fetcher, url: str) -> AsyncIterator[VideoListData | str]:
+        """逐页提取视频列表：每次产出一页视频（title 相同），获取失败时产出风控指令后结束"""
+        # 默认实现：一次产出完整列表
+        yield await self.extract(fetcher, url)
+    
+    async def _collect_stream(self, fetcher: Fetcher, url: str) -> VideoListData | str:
+        """将逐页提取的结果合并为完整列表"""
+        title = ""
+        videos: List[VideoInfo] = []
+        async with aclosing(self.extract_stream(fetcher, url)) as chunks:
+            async for chunk in chunks:
+                if chunk == RISK_CONTROL_DETECTED:
+                    return RISK_CONTROL_DETECTED
+                title = chunk["title"]
+                videos.extend(chunk["videos"])
+        return {"title": title, "videos": videos}
+    
     def resolve_shortcut(self, url: str) -> Tuple[bool, str]:
         """解析快捷方式"""
         return False, url
+    
+    async def canonicalize(self, fetcher: Fetcher, url: str) -> str:
+        """将已匹配的URL转换为规范形式（同一内容的不同链接得到相同结果）"""
+        return url
+    
+    async def fingerprint(self, fetcher: Fetcher, url: str) -> Optional[Dict[str, Any]]:
+        """用一次轻量请求获取列表的变化指纹（数量、最新条目等），不支持时返回None
+        
+        指纹与上次更新时相同说明列表没有变化，可以跳过完整的列表获取
+        """
+        return None
 
 
 class UgcVideoExtractor(URLExtractor):
@@ -146,6 +235,13 @@ class BangumiExtractor(URLExtractor):
         
         return {"title": folder_name, "videos": videos}
     
+    async def canonicalize(self, fetcher: Fetcher, url: str) -> str:
+        """md/ep 链接统一转换为 ss 链接"""
+        if self.REGEX_SS.match(url):
+            return url
+        season_id = await self._parse_season_id(fetcher, url)
+        return f"https://www.bilibili.com/bangumi/play/ss{season_id}"
+    
     async def _parse_season_id(self, fetcher: Fetcher, url: str) -> str:
         """根据URL类型获取season_id"""
         if match_obj := self.REGEX_MD.match(url):
@@ -169,8 +265,17 @@ class FavouriteExtractor(URLExtractor):
         """检查URL是否匹配"""
         return bool(self.REGEX_FAV.match(url))
     
+    async def fingerprint(self, fetcher: Fetcher, url: str) -> Optional[Dict[str, Any]]:
+        """收藏数和收藏夹修改时间"""
+        match_obj = self.REGEX_FAV.match(url)
+        return await get_favourite_fingerprint(fetcher, FId(match_obj.group("fid"))) if match_obj else None
+    
     async def extract(self, fetcher: Fetcher, url: str) -> VideoListData:
         """提取收藏夹视频列表"""
+        return await self._collect_stream(fetcher, url)
+    
+    async def extract_stream(self, fetcher: Fetcher, url: str) -> AsyncIterator[VideoListData | str]:
+        """逐页提取收藏夹视频列表"""
         match_obj = self.REGEX_FAV.match(url)
         if not match_obj:
             raise ValueError(f"无法解析收藏夹URL: {url}")
@@ -179,32 +284,16 @@ class FavouriteExtractor(URLExtractor):
         Logger.info(f"提取收藏夹: {fid}")
         
         fav_info = await get_favourite_info(fetcher, fid)
-        avids = await get_favourite_avids(fetcher, fid)
-        
-        # 检查是否返回了风控检测指令
-        if avids == RISK_CONTROL_DETECTED:
-            return RISK_CONTROL_DETECTED
-        
         # 修改文件夹命名格式：收藏夹-收藏夹ID-收藏夹名
         folder_name = f"收藏夹-{fid}-{fav_info['title']}"
         
-        videos = []
-        for avid in avids:
-            # 创建占位符视频条目，稍后按需获取详细信息
-            video = {
-                "avid": avid,
-                "cid": CId("0"),  # 占位符
-                "title": "",  # 空标题，稍后获取
-                "name": "",   # 空名称，稍后获取
-                "pubdate": 0, # 空发布时间，稍后获取
-                "author": "", # 空作者，稍后获取
-                "duration": 0, # 空时长，稍后获取
-                "path": Path(f"{folder_name}/{avid}"),  # 临时路径，下载时会更新为avid-title
-                "status": "pending"  # 标记为待处理，需要下载时再获取详细信息
-            }
-            videos.append(video)
-        
-        return {"title": folder_name, "videos": videos}
+        async with aclosing(iter_favourite_medias(fetcher, fid)) as pages:
+            async for medias in pages:
+                # 检查是否返回了风控检测指令
+                if medias == RISK_CONTROL_DETECTED:
+                    yield RISK_CONTROL_DETECTED
+                    return
+                yield {"title": folder_name, "videos": [_favourite_media_to_video(folder_name, media) for media in medias]}
     
     async def extract_incremental(self, fetcher: Fetcher, url: str, existing_urls: set) -> VideoListData:
         """增量提取收藏夹视频（支持实时查重）"""
@@ -216,32 +305,17 @@ class FavouriteExtractor(URLExtractor):
         Logger.info(f"增量提取收藏夹: {fid}")
         
         fav_info = await get_favourite_info(fetcher, fid)
-        avids = await get_favourite_avids_incremental(fetcher, fid, existing_urls)
+        medias = await get_favourite_medias_incremental(fetcher, fid, existing_urls)
         
         # 检查是否返回了风控检测指令
-        if avids == RISK_CONTROL_DETECTED:
+        if medias == RISK_CONTROL_DETECTED:
             return RISK_CONTROL_DETECTED
         
         # 修改文件夹命名格式：收藏夹-收藏夹ID-收藏夹名
         folder_name = f"收藏夹-{fid}-{fav_info['title']}"
         
-        videos = []
-        for avid in avids:
-            # 创建占位符视频条目，稍后按需获取详细信息
-            video = {
-                "avid": avid,
-                "cid": CId("0"),  # 占位符
-                "title": "",  # 空标题，稍后获取
-                "name": "",   # 空名称，稍后获取
-                "pubdate": 0, # 空发布时间，稍后获取
-                "author": "", # 空作者，稍后获取
-                "duration": 0, # 空时长，稍后获取
-                "path": Path(f"{folder_name}/{avid}"),  # 临时路径，下载时会更新为avid-title
-                "status": "pending"  # 标记为待处理，需要下载时再获取详细信息
-            }
-            videos.append(video)
-        
-        return {"title": folder_name, "videos": videos}
+        videos = [_favourite_media_to_video(folder_name, media) for media in medias]
+        return {"title": folder_name, "videos": videos, "incremental": True}
 
 
 class SeriesExtractor(URLExtractor):
@@ -253,24 +327,50 @@ class SeriesExtractor(URLExtractor):
         """检查URL是否匹配"""
         return bool(self.REGEX_SERIES.match(url))
     
+    async def fingerprint(self, fetcher: Fetcher, url: str) -> Optional[Dict[str, Any]]:
+        """视频总数和最新视频"""
+        mid, series_id, _ = self._parse_url(url)
+        return await get_series_fingerprint(fetcher, series_id, mid)
+    
     async def extract(self, fetcher: Fetcher, url: str) -> VideoListData:
         """提取视频列表"""
-        match_obj = self.REGEX_SERIES.match(url)
-        if not match_obj:
-            raise ValueError(f"无法解析视频列表URL: {url}")
-        
-        mid = MId(match_obj.group("mid"))
-        series_id = SeriesId(match_obj.group("series_id"))
-        list_type = match_obj.group("type")
-        
+        return await self._collect_stream(fetcher, url)
+    
+    async def extract_stream(self, fetcher: Fetcher, url: str) -> AsyncIterator[VideoListData | str]:
+        """逐页提取视频列表"""
+        mid, series_id, list_type = self._parse_url(url)
         Logger.info(f"提取{'视频列表' if list_type == 'series' else '视频合集'}: {series_id}")
         
-        avids = await get_series_videos(fetcher, series_id, mid)
+        async with aclosing(iter_series_videos(fetcher, series_id, mid)) as pages:
+            async for avids in pages:
+                # 检查是否返回了风控检测指令
+                if avids == RISK_CONTROL_DETECTED:
+                    yield RISK_CONTROL_DETECTED
+                    return
+                yield self._build_video_list(series_id, list_type, avids)
+    
+    async def extract_incremental(self, fetcher: Fetcher, url: str, existing_urls: set) -> VideoListData:
+        """增量提取视频列表（支持实时查重）"""
+        mid, series_id, list_type = self._parse_url(url)
+        Logger.info(f"增量提取{'视频列表' if list_type == 'series' else '视频合集'}: {series_id}")
+        
+        avids = await get_series_videos_incremental(fetcher, series_id, mid, existing_urls)
         
         # 检查是否返回了风控检测指令
         if avids == RISK_CONTROL_DETECTED:
             return RISK_CONTROL_DETECTED
         
+        video_list = self._build_video_list(series_id, list_type, avids)
+        video_list["incremental"] = True
+        return video_list
+    
+    def _parse_url(self, url: str) -> Tuple[MId, SeriesId, str]:
+        match_obj = self.REGEX_SERIES.match(url)
+        if not match_obj:
+            raise ValueError(f"无法解析视频列表URL: {url}")
+        return MId(match_obj.group("mid")), SeriesId(match_obj.group("series_id")), match_obj.group("type")
+    
+    def _build_video_list(self, series_id: SeriesId, list_type: str, avids: List[AvId]) -> VideoListData:
         # 修改文件夹命名格式：视频列表-视频列表ID-视频列表名
         type_name = "视频列表" if list_type == "series" else "视频合集"
         folder_name = f"{type_name}-{series_id}-{type_name}{series_id}"  # 暂时使用ID作为名称，后续可能需要获取实际名称
@@ -303,8 +403,17 @@ class UserSpaceExtractor(URLExtractor):
         """检查URL是否匹配"""
         return bool(self.REGEX_SPACE.match(url))
     
+    async def fingerprint(self, fetcher: Fetcher, url: str) -> Optional[Dict[str, Any]]:
+        """投稿数和最新投稿"""
+        match_obj = self.REGEX_SPACE.match(url)
+        return await get_user_space_fingerprint(fetcher, MId(match_obj.group("mid"))) if match_obj else None
+    
     async def extract(self, fetcher: Fetcher, url: str) -> VideoListData:
         """提取用户空间视频"""
+        return await self._collect_stream(fetcher, url)
+    
+    async def extract_stream(self, fetcher: Fetcher, url: str) -> AsyncIterator[VideoListData | str]:
+        """逐页提取用户空间视频"""
         match_obj = self.REGEX_SPACE.match(url)
         if not match_obj:
             raise ValueError(f"无法解析用户空间URL: {url}")
@@ -312,34 +421,18 @@ class UserSpaceExtractor(URLExtractor):
         mid = MId(match_obj.group("mid"))
         Logger.info(f"提取用户空间: {mid}")
         
-        # 获取用户名和视频列表（仅ID）
+        # 获取用户名，再逐页获取视频列表（仅ID）
         username = await get_user_name(fetcher, mid)
-        avids = await get_user_space_videos(fetcher, mid)
-        
-        # 检查是否返回了风控检测指令
-        if avids == RISK_CONTROL_DETECTED:
-            return RISK_CONTROL_DETECTED
-        
         # 修改文件夹命名格式：UP主-UP主UID-UP主名
         folder_name = f"UP主-{mid}-{username}"
         
-        videos = []
-        for avid in avids:
-            # 创建占位符视频条目，稍后按需获取详细信息
-            video = {
-                "avid": avid,
-                "cid": CId("0"),  # 占位符，下载时再获取
-                "title": "",  # 空标题，稍后获取
-                "name": "",   # 空名称，稍后获取
-                "pubdate": 0, # 空发布时间，稍后获取
-                "author": username, # 使用获取到的用户名
-                "duration": 0, # 空时长，稍后获取
-                "path": Path(f"{folder_name}/{avid}"),  # 临时路径，下载时会更新为avid-title
-                "status": "pending"  # 标记为待处理，需要下载时再获取详细信息
-            }
-            videos.append(video)
-        
-        return {"title": folder_name, "videos": videos}
+        async with aclosing(iter_user_space_videos(fetcher, mid)) as pages:
+            async for avids in pages:
+                # 检查是否返回了风控检测指令
+                if avids == RISK_CONTROL_DETECTED:
+                    yield RISK_CONTROL_DETECTED
+                    return
+                yield {"title": folder_name, "videos": _placeholder_videos(folder_name, avids, author=username)}
     
     async def extract_incremental(self, fetcher: Fetcher, url: str, existing_urls: set) -> VideoListData:
         """增量提取用户空间视频（支持实时查重）"""
@@ -377,7 +470,7 @@ class UserSpaceExtractor(URLExtractor):
             }
             videos.append(video)
         
-        return {"title": folder_name, "videos": videos}
+        return {"title": folder_name, "videos": videos, "incremental": True}
 
 
 class WatchLaterExtractor(URLExtractor):
@@ -462,6 +555,13 @@ class CheeseExtractor(URLExtractor):
         
         return {"title": folder_name, "videos": videos}
     
+    async def canonicalize(self, fetcher: Fetcher, url: str) -> str:
+        """ep 链接统一转换为 ss 链接"""
+        if self.REGEX_SS.match(url):
+            return url
+        season_id = await self._parse_season_id(fetcher, url)
+        return f"https://www.bilibili.com/cheese/play/ss{season_id}"
+    
     async def _parse_season_id(self, fetcher: Fetcher, url: str) -> str:
         """根据URL类型获取season_id"""
         if match_obj := self.REGEX_EP.match(url):
@@ -485,8 +585,20 @@ EXTRACTORS = [
 ]
 
 
-async def extract_video_list(fetcher: Fetcher, url: str) -> VideoListData | str:
-    """从URL提取视频列表"""
+def find_extractor(url: str) -> Optional[URLExtractor]:
+    """返回能直接处理该URL的提取器"""
+    for extractor in EXTRACTORS:
+        if extractor.match(url):
+            return extractor
+    return None
+
+
+async def resolve_url(fetcher: Fetcher, url: str) -> str:
+    """将URL解析为提取器可直接处理的规范URL
+    
+    依次尝试：快捷方式（av/BV号）→ 解析缓存 → 直接匹配（无需网络）→ 跟随重定向（短链等），
+    番剧/课程链接再统一转换为 ss 链接。解析成功的结果写入持久化缓存。
+    """
     # 首先尝试解析快捷方式
     original_url = url
     for extractor in EXTRACTORS:
@@ -496,10 +608,37 @@ async def extract_video_list(fetcher: Fetcher, url: str) -> VideoListData | str:
             Logger.info(f"快捷方式解析: {original_url} -> {url}")
             break
     
-    # 获取重定向后的URL
-    url = await fetcher.get_redirected_url(url)
-    if url != original_url:
-        Logger.info(f"URL重定向: {original_url} -> {url}")
+    cache = get_resolution_cache()
+    cached_url = cache.get(original_url)
+    if cached_url:
+        Logger.debug(f"使用已缓存的URL解析结果: {original_url} -> {cached_url}")
+        return cached_url
+    
+    # 无法直接匹配时获取重定向后的URL
+    extractor = find_extractor(url)
+    if extractor is None:
+        url = await fetcher.get_redirected_url(url)
+        if url != original_url:
+            Logger.info(f"URL重定向: {original_url} -> {url}")
+        extractor = find_extractor(url)
+        if extractor is None:
+            return url
+    
+    try:
+        canonical_url = await extractor.canonicalize(fetcher, url)
+    except Exception as e:
+        # 交给提取器按原URL处理（失败时由提取器返回风控指令）
+        Logger.warning(f"规范化URL失败: {e}")
+        return url
+    
+    if canonical_url != original_url:
+        cache.set(original_url, canonical_url)
+    return canonical_url
+
+
+async def extract_video_list(fetcher: Fetcher, url: str) -> VideoListData | str:
+    """从URL提取视频列表"""
+    url = await resolve_url(fetcher, url)
     
     # 匹配提取器
     for extractor in EXTRACTORS:
@@ -515,21 +654,28 @@ async def extract_video_list(fetcher: Fetcher, url: str) -> VideoListData | str:
     raise ValueError(f"不支持的URL类型: {url}")
 
 
+async def extract_video_stream(fetcher: Fetcher, url: str) -> AsyncIterator[VideoListData | str]:
+    """逐页提取视频列表（流式），提取失败时产出风控指令后结束"""
+    url = await resolve_url(fetcher, url)
+    
+    extractor = find_extractor(url)
+    if extractor is None:
+        raise ValueError(f"不支持的URL类型: {url}")
+    
+    Logger.info(f"使用提取器: {extractor.__class__.__name__}")
+    try:
+        async with aclosing(extractor.extract_stream(fetcher, url)) as chunks:
+            async for chunk in chunks:
+                yield chunk
+    except Exception as e:
+        Logger.warning(f"提取器 {extractor.__class__.__name__} 执行失败: {e}")
+        # 任何获取视频列表的失败都返回特殊指令
+        yield RISK_CONTROL_DETECTED
+
+
 async def extract_video_list_incremental(fetcher: Fetcher, url: str, existing_urls: set) -> VideoListData | str:
     """增量提取视频列表（支持实时查重）"""
-    # 首先尝试解析快捷方式
-    original_url = url
-    for extractor in EXTRACTORS:
-        matched, resolved_url = extractor.resolve_shortcut(url)
-        if matched:
-            url = resolved_url
-            Logger.info(f"快捷方式解析: {original_url} -> {url}")
-            break
-    
-    # 获取重定向后的URL
-    url = await fetcher.get_redirected_url(url)
-    if url != original_url:
-        Logger.info(f"URL重定向: {original_url} -> {url}")
+    url = await resolve_url(fetcher, url)
     
     # 匹配提取器
     for extractor in EXTRACTORS:
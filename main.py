@@ -8,8 +8,9 @@ import asyncio
 from typing import Optional
 from pathlib import Path
 
-from batch_downloader import BatchDownloader
+from batch_downloader import BatchDownloader, configure_process_options
 from utils.logger import Logger
+from utils.fetcher import close_shared_clients
 from utils.config_manager import ConfigManager
 
 
@@ -45,6 +46,18 @@ BiliSyncer - 精简版B站批量下载工具
     -d, --directory DIR 定向模式目录：指定单个任务目录
     --vip-strict        启用严格VIP模式（传递给yutto）
     --save-cover        保存视频封面（传递给yutto）
+    -j, --concurrency N 单个任务内同时下载的视频数量 (默认: 3)
+    --task-concurrency N 批量更新时同时处理的任务数 (默认: 2)
+    --prefetch N        提前获取详细信息的视频数，0 表示不预取 (默认: 8)
+    --max-downloads N   整个进程同时运行的yutto数量上限，0 表示不限制 (默认: 6)
+    --yutto-workers N   保留N个已导入yutto的常驻进程执行下载，0 表示每次启动新进程 (默认: 0)
+    --catalog           在输出目录下建立SQLite任务索引，加速批量扫描与统计
+    --two-phase         批量更新时先刷新所有任务的视频列表，再统一下载
+    --order POLICY      两阶段更新的下载顺序: newest / smallest / round_robin (默认: newest)
+    --refresh           忽略已缓存的接口响应，强制重新请求
+    --no-cache          不使用接口响应缓存
+    --no-stream         首次下载时先获取完整列表再开始下载
+    --no-resume         重试时删除已下载的部分重新开始，不使用断点续传
 
 模式说明:
     单个下载模式    下载指定URL的内容到输出目录
@@ -76,6 +89,50 @@ BiliSyncer - 精简版B站批量下载工具
     print(help_text)
 
 
+def parse_performance_option(args: list, i: int, performance: dict) -> int:
+    """解析性能相关选项，返回处理后的参数下标；未识别时原样返回 i"""
+    int_options = {
+        '-j': 'download_concurrency',
+        '--concurrency': 'download_concurrency',
+        '--task-concurrency': 'task_concurrency',
+        '--prefetch': 'metadata_prefetch',
+        '--max-downloads': 'max_downloads',
+        '--yutto-workers': 'yutto_workers',
+    }
+    if args[i] in int_options and i + 1 < len(args):
+        try:
+            performance[int_options[args[i]]] = int(args[i + 1])
+        except ValueError:
+            Logger.error(f"无效的并发数: {args[i + 1]}")
+            sys.exit(1)
+        return i + 2
+    if args[i] == '--catalog':
+        performance['task_catalog'] = True
+        return i + 1
+    if args[i] == '--refresh':
+        performance['refresh'] = True
+        return i + 1
+    if args[i] == '--no-cache':
+        performance['response_cache'] = False
+        return i + 1
+    if args[i] == '--no-resume':
+        performance['resume_downloads'] = False
+        return i + 1
+    if args[i] == '--no-stream':
+        performance['stream_extraction'] = False
+        return i + 1
+    if args[i] == '--two-phase':
+        performance['update_mode'] = 'two_phase'
+        return i + 1
+    if args[i] == '--order' and i + 1 < len(args):
+        if args[i + 1] not in ['newest', 'smallest', 'round_robin']:
+            Logger.error(f"无效的下载顺序: {args[i + 1]}")
+            sys.exit(1)
+        performance['download_order'] = args[i + 1]
+        return i + 2
+    return i
+
+
 def parse_args():
     """解析命令行参数"""
     args = sys.argv[1:]
@@ -115,6 +172,9 @@ def parse_args():
         Logger.error("不能同时使用 --update 和 --delete 模式")
         sys.exit(1)
     
+    # 性能参数：先取配置文件中的 performance 段，命令行参数优先
+    performance = dict(config_data.get('performance') or {})
+    
     if update_mode or delete_mode:
         # 更新或删除模式
         url = None
@@ -152,6 +212,8 @@ def parse_args():
                 # 将save-cover参数传递给yutto
                 extra_args.append('--save-cover')
                 i += 1
+            elif (next_i := parse_performance_option(args, i, performance)) != i:
+                i = next_i
             else:
                 # 未识别的参数传递给yutto
                 extra_args.append(args[i])
@@ -187,18 +249,23 @@ def parse_args():
                 # 将save-cover参数传递给yutto
                 extra_args.append('--save-cover')
                 i += 1
+            elif (next_i := parse_performance_option(args, i, performance)) != i:
+                i = next_i
             else:
                 # 未识别的参数传递给yutto
                 extra_args.append(args[i])
                 i += 1
     
-    return url, output_dir, sessdata, extra_args, update_mode, delete_mode, target_directory
+    return url, output_dir, sessdata, extra_args, update_mode, delete_mode, target_directory, performance
 
 
 async def main():
     """主函数"""
     try:
-        url, output_dir, sessdata, extra_args, update_mode, delete_mode, target_directory = parse_args()
+        url, output_dir, sessdata, extra_args, update_mode, delete_mode, target_directory, performance = parse_args()
+        
+        # 进程级参数（常驻进程池等）只在启动时设置一次
+        configure_process_options(performance)
         
         # 创建输出目录
         output_dir.mkdir(parents=True, exist_ok=True)
@@ -208,7 +275,8 @@ async def main():
             output_dir=output_dir,
             sessdata=sessdata,
             extra_args=extra_args,
-            original_url=url
+            original_url=url,
+            performance=performance
         )
         
         if update_mode:
@@ -265,6 +333,8 @@ async def main():
     except Exception as e:
         Logger.error(f"操作失败: {e}")
         sys.exit(1)
+    finally:
+        await close_shared_clients()
 
 
 if __name__ == "__main__":
@@ -52,6 +52,7 @@ def open_browser(url, delay=2):
 def main():
     parser = argparse.ArgumentParser(description="启动 BiliSyncer WebUI")
     parser.add_argument("-p", "--port", type=int, help="指定 WebUI 使用的端口号")
+    parser.add_argument("--config", help="进程级性能参数（请求限速、下载数上限、常驻进程、响应缓存）使用的配置文件名 (不含.yaml扩展名)")
     args = parser.parse_args()
     
     # 检查依赖
@@ -85,7 +86,10 @@ def main():
             sys.exit(1)
     
     # 启动WebUI
-    from webui.app import app, socketio
+    from webui.app import app, socketio, apply_process_config
+    
+    # 进程级参数由所有任务共享，只在启动时设置
+    apply_process_config(args.config)
     
     url = f"http://localhost:{port}"
     
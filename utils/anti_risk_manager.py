@@ -39,7 +39,14 @@ class AntiRiskManager:
         Logger.debug(f"已添加成功URL: {url} (类型: {url_type})")
     
     async def check_risk_control(self, fetcher: Fetcher) -> bool:
-        """检测是否受到风控"""
+        """检测是否受到风控，确认风控时同时降低该账号的请求速率"""
+        is_risk_controlled = await self._probe_risk_control(fetcher)
+        if is_risk_controlled:
+            fetcher.rate_limiter.report_risk()
+        return is_risk_controlled
+    
+    async def _probe_risk_control(self, fetcher: Fetcher) -> bool:
+        """用测试URL探测是否受到风控"""
         if not self.successful_urls:
             Logger.warning("没有可用的测试URL，无法检测风控状态")
             return False
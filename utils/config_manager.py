@@ -88,7 +88,8 @@ class ConfigManager:
             'vip_strict': False,
             'save_cover': False,
             'debug': False,
-            'extra_args': []
+            'extra_args': [],
+            'performance': {}
         }
     
     def validate_config(self, config: Dict[str, Any]) -> List[str]:
@@ -118,6 +119,9 @@ class ConfigManager:
         if 'extra_args' in config and not isinstance(config['extra_args'], list):
             errors.append("extra_args 必须是列表")
         
+        if 'performance' in config and config['performance'] is not None and not isinstance(config['performance'], dict):
+            errors.append("performance 必须是字典")
+        
         return errors
     
     def get_config_for_download(self, name: str) -> Optional[Dict[str, Any]]:
@@ -132,7 +136,8 @@ class ConfigManager:
             'vip_strict': config.get('vip_strict', False),
             'save_cover': config.get('save_cover', False),
             'debug': config.get('debug', False),
-            'extra_args': config.get('extra_args', [])
+            'extra_args': config.get('extra_args', []),
+            'performance': config.get('performance') or {}
         }
 
 
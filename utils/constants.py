@@ -2,6 +2,8 @@
 通用常量
 """
 
+from pathlib import Path
+
 TASK_FOLDER_PREFIXES = [
     "投稿视频-",
     "番剧-",
@@ -12,3 +14,55 @@ TASK_FOLDER_PREFIXES = [
     "稍后再看-",
     "课程-",
 ]
+
+# 任务CSV快照的列
+CSV_FIELDNAMES = [
+    'video_url', 'title', 'name', 'download_path', 'folder_size',
+    'downloaded', 'avid', 'cid', 'pubdate', 'status',
+    'is_multi_part', 'total_parts', 'duration'
+]
+
+# 性能相关默认参数（可在配置文件的 performance 段或命令行中覆盖）
+DEFAULT_PERFORMANCE_OPTIONS = {
+    "download_concurrency": 3,  # 单个任务内同时运行的下载协程数
+    "download_interval": 2.0,  # 每个下载协程处理相邻视频之间的间隔（秒）
+    "task_concurrency": 2,  # 批量更新时同时处理的任务数（下载槽位在任务之间共享）
+    "update_mode": "interleaved",  # 批量更新模式：interleaved 逐任务刷新并下载；two_phase 先刷新全部列表再统一下载
+    "download_order": "newest",  # two_phase 模式的全局下载顺序：newest / smallest / round_robin
+    "rate_limits": {},  # 各接口类别的请求速率（次/秒），覆盖 DEFAULT_RATE_LIMITS（进程级）
+    "adaptive_pacing": True,  # 根据限流/风控信号自动调整请求速率（AIMD；进程级）
+    "task_catalog": False,  # 在输出目录下建立SQLite任务索引，加速扫描与统计
+    "response_cache": True,  # 缓存元数据接口的响应（见 RESPONSE_CACHE_TTLS；进程级）
+    "response_cache_max_mb": 200,  # 响应缓存的容量上限（MB），超出时淘汰最久未使用的条目（进程级）
+    "refresh": False,  # 强制刷新：忽略已缓存的响应（新响应仍会写入缓存；只作用于本任务）
+    "stream_extraction": True,  # 首次下载时边获取列表边下载（逐页写入CSV，第一页到达即开始下载）
+    "metadata_prefetch": 8,  # 提前并发获取详细信息的待下载视频数（0 表示下载前逐个获取）
+    "max_downloads": 6,  # 整个进程同时运行的yutto数量上限（WebUI多个任务共享，0 表示不限制；进程级，只在启动时设置）
+    "max_downloads_per_account": 4,  # 同一账号（SESSDATA）同时运行的yutto数量上限（进程级）
+    "max_downloads_per_disk": 4,  # 同一输出磁盘同时运行的yutto数量上限（进程级）
+    "yutto_workers": 0,  # 保留的yutto常驻进程数，下载在已导入yutto的进程中执行（0 表示每次下载启动新进程；进程级，只在启动时设置）
+    "failure_rules": [],  # 额外的yutto失败分类规则，与默认规则同名时替换（见 utils/failure_classifier.py）
+    "resume_downloads": True,  # 重试和重新下载时保留有效的分段文件由yutto续传，只删除损坏的文件（False 时整个文件夹删除重下）
+}
+
+# 各接口类别的默认请求速率（次/秒），所有请求共享，取代固定的请求间隔
+DEFAULT_RATE_LIMITS = {
+    "space": 1.0,  # UP主空间（WBI接口，最容易触发风控）
+    "list": 2.0,  # 收藏夹、视频列表、稍后再看等分页列表
+    "video": 4.0,  # 视频详情、分P信息
+    "pgc": 2.0,  # 番剧、课程
+    "default": 4.0,  # 其他请求
+}
+
+# 响应缓存目录（程序目录下，与 config 同级）
+CACHE_DIR = Path(__file__).parent.parent / "cache"
+
+# 可缓存的接口及有效期（秒），按URL片段匹配；分页列表接口不缓存，以保证能发现新视频
+RESPONSE_CACHE_TTLS = {
+    "api.bilibili.com/x/web-interface/view": 24 * 3600,  # 视频详情
+    "api.bilibili.com/x/player/pagelist": 24 * 3600,  # 分P列表
+    "api.bilibili.com/x/v3/fav/folder/info": 600,  # 收藏夹信息
+    "api.bilibili.com/pgc/view/web/season": 3600,  # 番剧季信息（连载中会更新）
+    "api.bilibili.com/pgc/web/season/section": 3600,  # 番剧分集
+    "api.bilibili.com/pugv/view/web/season": 3600,  # 课程信息
+}
@@ -5,6 +5,7 @@ CSV文件管理模块
 
 import csv
 import glob
+import json
 import re
 import shutil
 from datetime import datetime
@@ -13,11 +14,26 @@ from typing import List, Dict, Optional, Tuple, Any
 
 from utils.types import VideoInfo
 from utils.logger import Logger
-from utils.constants import TASK_FOLDER_PREFIXES
+from utils.constants import TASK_FOLDER_PREFIXES, CSV_FIELDNAMES
+from utils.task_catalog import get_task_catalog
 
 
 class CSVManager:
-    """CSV文件管理器"""
+    """CSV文件管理器
+    
+    任务状态由两部分组成：
+    - 快照：yy-mm-dd-hh-mm.csv，完整的视频列表
+    - 状态日志：download_state.journal，每次状态变化追加一行JSON记录
+    读取时先解析快照再重放日志；日志达到一定条数后合并回新的快照。
+    
+    解析结果缓存在内存中并按 video_url 建立索引，只有当目录/快照/日志的
+    mtime 发生变化或管理器自身写入快照时才重新解析；自身追加的日志直接
+    原地更新缓存。
+    """
+    
+    JOURNAL_FILENAME = "download_state.journal"
+    META_FILENAME = "task_meta.json"  # 任务元数据：URL解析结果等，避免每次更新重复解析
+    JOURNAL_COMPACT_THRESHOLD = 200  # 日志记录达到该条数时合并回CSV快照
     
     def __init__(self, task_dir: Path):
         """
@@ -26,6 +42,59 @@ class CSVManager:
         """
         self.task_dir = task_dir
         self.task_dir.mkdir(parents=True, exist_ok=True)
+        self._journal_records: Optional[int] = None  # 当前日志记录数（懒加载）
+        
+        # 内存缓存：快照 + 日志重放后的视频列表，及其 video_url 索引
+        self._cache_rows: Optional[List[Dict[str, str]]] = None
+        self._cache_index: Dict[str, Dict[str, str]] = {}
+        self._cache_downloaded = 0
+        self._cache_signature: Optional[Tuple] = None
+        self._csv_path: Optional[Path] = None  # 当前快照文件，文件不存在时才重新查找
+        self._original_url_cache: Optional[Tuple[Tuple, Optional[str]]] = None
+        
+        # 输出根目录启用了任务索引时，状态变化同时写入索引
+        self._catalog = get_task_catalog(task_dir.parent)
+    
+    @property
+    def journal_path(self) -> Path:
+        """状态日志文件路径"""
+        return self.task_dir / self.JOURNAL_FILENAME
+    
+    @property
+    def meta_path(self) -> Path:
+        """任务元数据文件路径"""
+        return self.task_dir / self.META_FILENAME
+    
+    @classmethod
+    def is_state_file(cls, path: Path) -> bool:
+        """判断文件是否属于任务状态（CSV快照之外需要保留的文件）"""
+        return path.name in (cls.JOURNAL_FILENAME, cls.META_FILENAME)
+    
+    def load_task_meta(self) -> Dict[str, Any]:
+        """读取任务元数据，不存在或损坏时返回空字典"""
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            return meta if isinstance(meta, dict) else {}
+        except (OSError, ValueError):
+            return {}
+    
+    def update_task_meta(self, **fields: Any) -> None:
+        """合并写入任务元数据（内容无变化时不写入）"""
+        meta = self.load_task_meta()
+        if all(meta.get(key) == value for key, value in fields.items()):
+            return
+        meta.update(fields)
+        
+        temp_path = self.task_dir / f"temp_{self.META_FILENAME}"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2)
+            temp_path.replace(self.meta_path)
+        except Exception as e:
+            Logger.warning(f"保存任务元数据失败: {e}")
+            if temp_path.exists():
+                temp_path.unlink()
     
     def _extract_main_folder_from_path(self, path_value: Any) -> str:
         """根据路径提取任务主目录名称"""
@@ -112,7 +181,8 @@ class CSVManager:
             'pubdate': pubdate_str,
             'status': video.get('status', 'normal'),
             'is_multi_part': str(video.get('is_multi_part', False)),
-            'total_parts': str(video.get('total_parts', 1))
+            'total_parts': str(video.get('total_parts', 1)),
+            'duration': str(int(video.get('duration') or 0))  # 总时长（秒），0 表示尚未获取
         }
     
     def _format_download_path(self, path_value: Any) -> str:
@@ -251,16 +321,20 @@ class CSVManager:
         """智能检测CSV文件编码"""
         encodings = ['utf-8-sig', 'utf-8', 'gbk', 'gb2312']
         
-        for encoding in encodings:
-            try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    # 尝试读取前几行
-                    f.readline()
+        # 只打开一次文件，用首行字节依次尝试解码
+        try:
+            with open(file_path, 'rb') as f:
+                first_line = f.readline()
+        except Exception:
+            first_line = None
+        
+        if first_line is not None:
+            for encoding in encodings:
+                try:
+                    first_line.decode(encoding)
                     return encoding
-            except UnicodeDecodeError:
-                continue
-            except Exception:
-                continue
+                except UnicodeDecodeError:
+                    continue
         
         # 如果都失败了，默认使用utf-8
         Logger.warning(f"无法检测CSV文件编码，使用默认utf-8: {file_path}")
@@ -286,6 +360,97 @@ class CSVManager:
         Logger.info(f"找到现有CSV文件：{latest_file.name}")
         return latest_file
     
+    def _state_signature(self) -> Optional[Tuple]:
+        """计算任务状态签名（快照路径、快照与日志的mtime和大小），用于判断缓存是否失效
+        
+        不使用任务目录的mtime：yutto每下载一个视频都会在任务目录中新建文件夹，
+        目录mtime随之变化，但快照和日志并没有改变
+        """
+        csv_stat = None
+        if self._csv_path is not None:
+            try:
+                csv_stat = self._csv_path.stat()
+            except OSError:
+                pass
+        if csv_stat is None:
+            # 快照已被替换或删除（写入新快照时旧快照会被删除），重新查找
+            self._csv_path = self._find_latest_csv()
+            if self._csv_path is None:
+                return None
+            try:
+                csv_stat = self._csv_path.stat()
+            except OSError:
+                return None
+        
+        return (self._csv_path, csv_stat.st_mtime_ns, csv_stat.st_size, self._journal_signature(self.journal_path))
+    
+    @staticmethod
+    def _journal_signature(journal_path: Path) -> Optional[Tuple[int, int]]:
+        try:
+            journal_stat = journal_path.stat()
+            return (journal_stat.st_mtime_ns, journal_stat.st_size)
+        except OSError:
+            return None
+    
+    @staticmethod
+    def _signature_key(signature: Tuple) -> str:
+        """把状态签名转换为可以存入任务索引的字符串（快照文件名在最前）"""
+        csv_path, csv_mtime_ns, csv_size, journal_signature = signature
+        journal_key = f"{journal_signature[0]}:{journal_signature[1]}" if journal_signature else "-"
+        return f"{csv_path.name}:{csv_mtime_ns}:{csv_size}:{journal_key}"
+    
+    def state_key(self) -> Optional[str]:
+        """当前快照与状态日志的签名字符串，没有快照时返回None"""
+        signature = self._state_signature()
+        return self._signature_key(signature) if signature is not None else None
+    
+    @classmethod
+    def snapshot_state_key(cls, task_dir: Path, csv_name: str) -> Optional[str]:
+        """按已知的快照文件名计算签名字符串（只需两次stat，不查找快照），快照已不存在时返回None"""
+        csv_path = task_dir / csv_name
+        try:
+            csv_stat = csv_path.stat()
+        except OSError:
+            return None
+        journal_signature = cls._journal_signature(task_dir / cls.JOURNAL_FILENAME)
+        return cls._signature_key((csv_path, csv_stat.st_mtime_ns, csv_stat.st_size, journal_signature))
+    
+    @staticmethod
+    def _is_downloaded(row: Dict[str, str]) -> bool:
+        return row.get('downloaded', '').lower() == 'true'
+    
+    def _set_cache(self, rows: List[Dict[str, str]], signature: Optional[Tuple]) -> None:
+        """用解析结果重建内存缓存和索引"""
+        self._cache_rows = rows
+        self._cache_index = {row['video_url']: row for row in rows}
+        self._cache_downloaded = sum(1 for row in rows if self._is_downloaded(row))
+        self._cache_signature = signature
+    
+    def _invalidate_cache(self) -> None:
+        """丢弃内存缓存，下次读取时重新解析"""
+        self._cache_rows = None
+        self._cache_index = {}
+        self._cache_downloaded = 0
+        self._cache_signature = None
+    
+    def _ensure_cache(self) -> bool:
+        """确保内存缓存与磁盘一致，返回是否存在可用的视频列表"""
+        signature = self._state_signature()
+        if signature is None:
+            self._invalidate_cache()
+            return False
+        
+        if self._cache_rows is not None and signature == self._cache_signature:
+            return True
+        
+        rows = self._load_snapshot(signature[0])
+        if rows is None:
+            self._invalidate_cache()
+            return False
+        self._replay_journal(rows)
+        self._set_cache(rows, signature)
+        return True
+    
     def save_video_list(self, videos: List[VideoInfo], original_url: Optional[str] = None) -> Path:
         """保存视频列表到CSV文件（仅用于新任务）"""
         csv_filename = self._generate_csv_filename()
@@ -293,24 +458,25 @@ class CSVManager:
         temp_path = self.task_dir / f"temp_{csv_filename}"
         
         try:
+            rows = [self._video_to_csv_row(video) for video in videos]
+            
             # 先写入临时文件，使用UTF-8-BOM编码确保Excel正确识别
             with open(temp_path, 'w', newline='', encoding='utf-8-sig') as f:
                 # 第一行写入原始URL（如果提供）
                 if original_url:
                     f.write(f"# Original URL: {original_url}\n")
                 
-                writer = csv.DictWriter(f, fieldnames=[
-                    'video_url', 'title', 'name', 'download_path', 'folder_size',
-                    'downloaded', 'avid', 'cid', 'pubdate', 'status',
-                    'is_multi_part', 'total_parts'
-                ])
+                writer = csv.DictWriter(f, fieldnames=CSV_FIELDNAMES)
                 writer.writeheader()
-                
-                for video in videos:
-                    writer.writerow(self._video_to_csv_row(video))
+                writer.writerows(rows)
             
             # 验证临时文件写入成功后，移动到正式位置
             shutil.move(str(temp_path), str(csv_path))
+            self._csv_path = csv_path
+            # 新任务的快照不继承任何旧的状态日志
+            self._clear_journal()
+            self._invalidate_cache()
+            self._sync_catalog(rows, original_url)
             Logger.info(f"已保存视频列表到: {csv_path}")
             return csv_path
             
@@ -321,8 +487,11 @@ class CSVManager:
             Logger.error(f"保存CSV文件失败: {e}")
             raise
     
-    def update_video_list(self, new_videos: List[VideoInfo], original_url: str) -> Path:
-        """更新现有的视频列表，合并新视频并保持已下载状态"""
+    def update_video_list(self, new_videos: List[VideoInfo], original_url: str, keep_existing: bool = False) -> Path:
+        """更新现有的视频列表，合并新视频并保持已下载状态
+        
+        keep_existing 为 True 时 new_videos 只是增量结果：新视频排在前面，原有记录全部保留
+        """
         current_csv = self._find_latest_csv()
         
         if current_csv is None:
@@ -338,11 +507,6 @@ class CSVManager:
             # 创建现有视频的URL映射（保留下载状态）
             existing_video_map = {video['video_url']: video for video in existing_videos}
             
-            # 生成新的CSV文件名（带时间戳）
-            new_csv_filename = self._generate_csv_filename()
-            new_csv_path = self.task_dir / new_csv_filename
-            temp_path = self.task_dir / f"temp_{new_csv_filename}"
-            
             merged_videos = []
             for video in new_videos:
                 video_url, _ = self._get_video_url_and_identifier(video)
@@ -352,48 +516,68 @@ class CSVManager:
                 else:
                     merged_videos.append(self._video_to_csv_row(video))
             
-            # 定义统一的字段列表
-            fieldnames = [
-                'video_url', 'title', 'name', 'download_path', 'folder_size',
-                'downloaded', 'avid', 'cid', 'pubdate', 'status',
-                'is_multi_part', 'total_parts'
-            ]
+            if keep_existing:
+                merged_urls = {row['video_url'] for row in merged_videos}
+                merged_videos.extend(
+                    self._normalize_csv_row_for_write(video)
+                    for video in existing_videos if video['video_url'] not in merged_urls
+                )
             
-            # 安全写入新的CSV文件
-            with open(temp_path, 'w', newline='', encoding='utf-8-sig') as f:
-                # 写入原始URL
-                f.write(f"# Original URL: {original_url}\n")
-                
-                if merged_videos:
-                    writer = csv.DictWriter(f, fieldnames=fieldnames)
-                    writer.writeheader()
-                    writer.writerows(merged_videos)
-            
-            # 验证写入成功后，替换原文件
-            shutil.move(str(temp_path), str(new_csv_path))
-            
-            # 删除旧的CSV文件
-            if current_csv != new_csv_path:
-                current_csv.unlink()
-                Logger.debug(f"已删除旧CSV文件: {current_csv.name}")
+            # 已合并日志中的状态，写入新快照后清空日志
+            new_csv_path = self._write_snapshot(merged_videos, f"# Original URL: {original_url}\n", current_csv)
+            self._clear_journal()
+            self._sync_catalog(merged_videos, original_url)
             
             Logger.info(f"已更新视频列表到: {new_csv_path}")
             return new_csv_path
             
         except Exception as e:
+            Logger.error(f"更新CSV文件失败: {e}")
+            raise
+    
+    def _write_snapshot(self, rows: List[Dict[str, str]], url_line: Optional[str], current_csv: Optional[Path]) -> Path:
+        """将完整视频列表写入新的时间戳CSV快照，并删除旧快照"""
+        new_csv_filename = self._generate_csv_filename()
+        new_csv_path = self.task_dir / new_csv_filename
+        temp_path = self.task_dir / f"temp_{new_csv_filename}"
+        
+        try:
+            # 先写入临时文件，使用UTF-8-BOM编码确保Excel正确识别
+            with open(temp_path, 'w', newline='', encoding='utf-8-sig') as f:
+                # 写入原始URL行（如果存在）
+                if url_line:
+                    f.write(url_line if url_line.endswith("\n") else f"{url_line}\n")
+                
+                if rows:
+                    writer = csv.DictWriter(f, fieldnames=CSV_FIELDNAMES)
+                    writer.writeheader()
+                    writer.writerows(rows)
+            
+            # 验证写入成功后，替换文件
+            shutil.move(str(temp_path), str(new_csv_path))
+            self._csv_path = new_csv_path
+            self._invalidate_cache()
+        except Exception:
             # 清理临时文件
             if temp_path.exists():
                 temp_path.unlink()
-            Logger.error(f"更新CSV文件失败: {e}")
             raise
+        
+        # 删除旧的CSV文件
+        if current_csv is not None and current_csv != new_csv_path and current_csv.exists():
+            current_csv.unlink()
+            Logger.debug(f"已删除旧CSV文件: {current_csv.name}")
+        
+        return new_csv_path
     
     def load_video_list(self) -> Optional[List[Dict[str, str]]]:
-        """从CSV文件加载视频列表"""
-        csv_path = self._find_latest_csv()
-        
-        if csv_path is None:
+        """从CSV文件加载视频列表（快照 + 状态日志重放），返回缓存的副本"""
+        if not self._ensure_cache():
             return None
-        
+        return [dict(row) for row in self._cache_rows]
+    
+    def _load_snapshot(self, csv_path: Path) -> Optional[List[Dict[str, str]]]:
+        """解析CSV快照文件"""
         try:
             # 智能检测文件编码
             encoding = self._detect_csv_encoding(csv_path)
@@ -456,6 +640,7 @@ class CSVManager:
                         row.setdefault('avid', '')
                         row.setdefault('cid', '')
                         row.setdefault('pubdate', '')
+                        row.setdefault('duration', '0')
                         
                         row['download_path'] = self._format_download_path(row['download_path'])
                         folder_size_bytes = self.parse_folder_size_value(row['folder_size'])
@@ -546,11 +731,10 @@ class CSVManager:
     
     def get_pending_videos(self) -> Optional[List[Dict[str, str]]]:
         """获取未下载的视频列表"""
-        videos = self.load_video_list()
-        if videos is None:
+        if not self._ensure_cache():
             return None
         
-        pending_videos = [v for v in videos if v['downloaded'].lower() != 'true']
+        pending_videos = [dict(v) for v in self._cache_rows if not self._is_downloaded(v)]
         
         if pending_videos:
             Logger.info(f"发现 {len(pending_videos)} 个未下载的视频")
@@ -559,108 +743,232 @@ class CSVManager:
         
         return pending_videos
     
+    def is_video_pending(self, video_url: str) -> bool:
+        """判断视频是否仍待下载（CSV中不存在的视频视为无需下载）"""
+        if not self._ensure_cache():
+            return False
+        row = self._cache_index.get(video_url)
+        return row is not None and not self._is_downloaded(row)
+    
     def mark_video_downloaded(self, video_url: str, folder_size: Optional[int] = None) -> None:
-        """标记视频为已下载并更新CSV文件"""
-        current_csv = self._find_latest_csv()
-        
-        if current_csv is None:
+        """标记视频为已下载（追加一条状态日志）"""
+        if self._state_signature() is None:
             Logger.warning("未找到CSV文件，无法标记下载状态")
             return
         
+        record: Dict[str, Any] = {'op': 'downloaded', 'video_url': video_url}
+        if folder_size is not None:
+            record['folder_size'] = int(folder_size)
+        
+        try:
+            self._append_journal(record)
+            Logger.debug(f"已记录下载状态: {video_url}")
+        except Exception as e:
+            Logger.error(f"更新CSV文件失败: {e}")
+    
+    def _append_journal(self, record: Dict[str, Any]) -> None:
+        """向状态日志追加一条记录，达到阈值时合并回快照"""
+        self._append_journal_records([record])
+    
+    def _append_journal_records(self, records: List[Dict[str, Any]]) -> None:
+        """向状态日志一次追加多条记录，达到阈值时合并回快照"""
+        # 写入前确认缓存仍与磁盘一致，否则写入后直接丢弃缓存
+        cache_valid = self._cache_rows is not None and self._state_signature() == self._cache_signature
+        
+        lines = [json.dumps(record, ensure_ascii=False) + "\n" for record in records]
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.writelines(lines)
+            f.flush()
+        
+        if cache_valid:
+            for record in records:
+                row = self._cache_index.get(record['video_url'])
+                if row is None:
+                    if record.get('op') == 'add':
+                        row = self._row_from_add_record(record)
+                        self._cache_rows.append(row)
+                        self._cache_index[row['video_url']] = row
+                        self._cache_downloaded += int(self._is_downloaded(row))
+                    continue
+                was_downloaded = self._is_downloaded(row)
+                self._apply_journal_record(row, record)
+                self._cache_downloaded += int(self._is_downloaded(row)) - int(was_downloaded)
+            self._cache_signature = self._state_signature()
+        else:
+            self._invalidate_cache()
+        
+        if self._catalog is not None:
+            try:
+                state = self.state_key()
+                added_rows = [self._row_from_add_record(record) for record in records if record.get('op') == 'add']
+                if added_rows:
+                    self._catalog.add_videos(self.task_dir.name, added_rows, state)
+                for record in records:
+                    if record.get('op') == 'add':
+                        continue
+                    changed_fields: Dict[str, str] = {}
+                    self._apply_journal_record(changed_fields, record)
+                    self._catalog.update_video(self.task_dir.name, record['video_url'], changed_fields, state)
+            except Exception as e:
+                Logger.warning(f"更新任务索引失败: {e}")
+        
+        if self._journal_records is None:
+            self._journal_records = len(self._read_journal())
+        else:
+            self._journal_records += len(records)
+        
+        if self._journal_records >= self.JOURNAL_COMPACT_THRESHOLD:
+            self.compact_journal()
+    
+    @staticmethod
+    def _row_from_add_record(record: Dict[str, Any]) -> Dict[str, str]:
+        """从新增视频的日志记录还原CSV行"""
+        row = record.get('row') or {}
+        return {key: str(row.get(key, '') or '') for key in CSV_FIELDNAMES} | {'video_url': record['video_url']}
+    
+    def append_videos(self, videos: List[VideoInfo]) -> List[VideoInfo]:
+        """向现有视频列表追加新视频（流式提取时逐页调用），返回实际追加的视频
+        
+        已存在的视频跳过；新视频以 add 记录写入状态日志，合并日志时并入快照
+        """
+        if not self._ensure_cache():
+            Logger.warning("未找到CSV文件，无法追加视频")
+            return []
+        
+        added_videos = []
+        records = []
+        seen_urls = set(self._cache_index)
+        for video in videos:
+            row = self._video_to_csv_row(video)
+            if row['video_url'] in seen_urls:
+                continue
+            seen_urls.add(row['video_url'])
+            records.append({'op': 'add', 'video_url': row['video_url'], 'row': row})
+            added_videos.append(video)
+        
+        if records:
+            try:
+                self._append_journal_records(records)
+                Logger.debug(f"已追加 {len(records)} 个视频到列表")
+            except Exception as e:
+                Logger.error(f"追加视频失败: {e}")
+                return []
+        return added_videos
+    
+    def _sync_catalog(self, rows: List[Dict[str, str]], original_url: Optional[str]) -> None:
+        """将完整快照写入任务索引（在快照和日志都落盘之后调用）"""
+        if self._catalog is None:
+            return
+        try:
+            self._catalog.replace_task(self.task_dir.name, original_url, rows, self.state_key())
+        except Exception as e:
+            Logger.warning(f"更新任务索引失败: {e}")
+    
+    def _read_journal(self) -> List[Dict[str, Any]]:
+        """读取状态日志，跳过损坏的行（如写入中断的最后一行）"""
+        if not self.journal_path.exists():
+            return []
+        
+        records = []
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line_num, line in enumerate(f, start=1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        Logger.warning(f"状态日志第{line_num}行损坏，已忽略")
+                        continue
+                    if isinstance(record, dict) and record.get('video_url'):
+                        records.append(record)
+        except Exception as e:
+            Logger.error(f"读取状态日志失败: {e}")
+        return records
+    
+    def _apply_journal_record(self, row: Dict[str, str], record: Dict[str, Any]) -> None:
+        """将一条日志记录应用到CSV行"""
+        op = record.get('op')
+        if op == 'downloaded':
+            row['downloaded'] = 'True'
+            if record.get('folder_size') is not None:
+                row['folder_size'] = self._format_folder_size_value(int(record['folder_size']))
+        elif op == 'update':
+            fields = record.get('fields') or {}
+            row.update({key: str(value) for key, value in fields.items() if key in CSV_FIELDNAMES and key != 'video_url'})
+    
+    def _replay_journal(self, videos: List[Dict[str, str]]) -> None:
+        """在快照数据上重放状态日志"""
+        records = self._read_journal()
+        self._journal_records = len(records)
+        if not records:
+            return
+        
+        video_map = {video['video_url']: video for video in videos}
+        applied = 0
+        for record in records:
+            row = video_map.get(record['video_url'])
+            if row is None:
+                if record.get('op') == 'add':
+                    # 流式提取时逐页追加的视频
+                    row = video_map[record['video_url']] = self._row_from_add_record(record)
+                    videos.append(row)
+                    applied += 1
+                continue
+            self._apply_journal_record(row, record)
+            applied += 1
+        Logger.debug(f"已重放 {applied}/{len(records)} 条状态日志")
+    
+    def _clear_journal(self) -> None:
+        """删除状态日志（其内容已合并进快照）"""
+        try:
+            if self.journal_path.exists():
+                self.journal_path.unlink()
+        except Exception as e:
+            Logger.warning(f"删除状态日志失败: {e}")
+        self._journal_records = 0
+    
+    def compact_journal(self) -> Optional[Path]:
+        """将状态日志合并回新的CSV快照（yy-mm-dd-hh-mm.csv）"""
+        if not self.journal_path.exists():
+            return None
+        
+        if self._state_signature() is None:
+            Logger.warning("未找到CSV文件，无法合并状态日志")
+            return None
+        
         try:
-            # 智能检测文件编码
-            encoding = self._detect_csv_encoding(current_csv)
-            
-            # 读取现有数据
-            videos = []
             url_line = None
-            with open(current_csv, 'r', encoding=encoding) as f:
-                # 检查第一行是否为原始URL
-                first_line = f.readline()
-                if first_line.startswith("# Original URL:"):
-                    url_line = first_line
-                else:
-                    # 如果第一行不是URL，重新回到文件开头
-                    f.seek(0)
-                
-                reader = csv.DictReader(f)
-                for row in reader:
-                    row.setdefault('is_multi_part', 'False')
-                    row.setdefault('total_parts', '1')
-                    row.setdefault('status', 'normal')
-                    # 保留原有的folder_size值，不要用setdefault覆盖
-                    if 'folder_size' not in row or not row['folder_size']:
-                        row['folder_size'] = '0'
-                    
-                    # 先保存原有的folder_size值（如果存在且有效）
-                    existing_folder_size = row.get('folder_size', '0')
-                    existing_size_bytes = self.parse_folder_size_value(existing_folder_size)
-                    
-                    normalized_row = self._normalize_csv_row_for_write(row)
-                    
-                    if normalized_row['video_url'] == video_url:
-                        normalized_row['downloaded'] = 'True'
-                        if folder_size is not None:
-                            # 更新当前视频的folder_size
-                            normalized_row['folder_size'] = self._format_folder_size_value(folder_size)
-                        elif existing_size_bytes > 0:
-                            # 如果当前视频没有新的folder_size，但已有值，保留原有值
-                            normalized_row['folder_size'] = self._format_folder_size_value(existing_size_bytes)
-                    else:
-                        # 对于其他视频，保留原有的folder_size值
-                        if existing_size_bytes > 0:
-                            normalized_row['folder_size'] = self._format_folder_size_value(existing_size_bytes)
-                    
-                    videos.append(normalized_row)
-            
-            # 生成新的CSV文件名
-            new_csv_filename = self._generate_csv_filename()
-            new_csv_path = self.task_dir / new_csv_filename
-            temp_path = self.task_dir / f"temp_{new_csv_filename}"
-            
-            # 定义统一的字段列表
-            fieldnames = [
-                'video_url', 'title', 'name', 'download_path', 'folder_size',
-                'downloaded', 'avid', 'cid', 'pubdate', 'status',
-                'is_multi_part', 'total_parts'
-            ]
-            
-            # 先写入临时文件，使用UTF-8-BOM编码确保Excel正确识别
-            with open(temp_path, 'w', newline='', encoding='utf-8-sig') as f:
-                # 写入原始URL行（如果存在）
-                if url_line:
-                    f.write(url_line)
-                
-                if videos:
-                    writer = csv.DictWriter(f, fieldnames=fieldnames)
-                    writer.writeheader()
-                    writer.writerows(videos)
-            
-            # 验证写入成功后，替换文件
-            shutil.move(str(temp_path), str(new_csv_path))
+            original_url = self.get_original_url()
+            if original_url:
+                url_line = f"# Original URL: {original_url}\n"
             
-            # 删除旧的CSV文件
-            if current_csv != new_csv_path:
-                current_csv.unlink()
-                Logger.debug(f"已删除旧CSV文件: {current_csv.name}")
-            
-            Logger.debug(f"已更新CSV文件并标记下载: {video_url}")
+            if not self._ensure_cache():
+                Logger.error("CSV快照读取失败，暂不合并状态日志")
+                return None
             
+            current_csv = self._cache_signature[0]
+            videos = self._cache_rows
+            rows = [self._normalize_csv_row_for_write(video) for video in videos]
+            new_csv_path = self._write_snapshot(rows, url_line, current_csv)
+            self._clear_journal()
+            # 合并前后内容一致，直接沿用已解析的数据，只刷新签名
+            self._set_cache(videos, self._state_signature())
+            self._sync_catalog(rows, original_url)
+            Logger.debug(f"已合并状态日志到: {new_csv_path.name}")
+            return new_csv_path
         except Exception as e:
-            # 清理临时文件
-            temp_path = self.task_dir / f"temp_{self._generate_csv_filename()}"
-            if temp_path.exists():
-                temp_path.unlink()
-            Logger.error(f"更新CSV文件失败: {e}")
+            Logger.error(f"合并状态日志失败: {e}")
+            return None
     
     def get_download_stats(self) -> Dict[str, int]:
         """获取下载统计信息"""
-        videos = self.load_video_list()
-        if not videos:
+        if not self._ensure_cache() or not self._cache_rows:
             return {'total': 0, 'downloaded': 0, 'pending': 0}
         
-        total = len(videos)
-        downloaded = sum(1 for v in videos if v['downloaded'].lower() == 'true')
+        total = len(self._cache_rows)
+        downloaded = self._cache_downloaded
         pending = total - downloaded
         
         return {
@@ -671,120 +979,78 @@ class CSVManager:
     
     def get_existing_video_urls(self) -> set:
         """获取现有视频的URL集合，用于增量获取时的查重"""
-        videos = self.load_video_list()
-        if not videos:
+        if not self._ensure_cache():
             return set()
         
         # 提取所有video_url
-        existing_urls = set()
-        for video in videos:
-            video_url = video.get('video_url', '').strip()
-            if video_url:
-                existing_urls.add(video_url)
+        existing_urls = {video_url.strip() for video_url in self._cache_index if video_url.strip()}
         
         Logger.debug(f"现有视频URL数量: {len(existing_urls)}")
         return existing_urls
     
     def get_original_url(self) -> Optional[str]:
-        """从CSV文件中获取原始URL"""
-        csv_path = self._find_latest_csv()
-        
-        if csv_path is None:
+        """从CSV文件中获取原始URL（快照未变化时直接返回缓存值）"""
+        signature = self._state_signature()
+        if signature is None:
             return None
         
+        # 原始URL只取决于快照文件本身
+        snapshot_key = signature[:3]
+        if self._original_url_cache is not None and self._original_url_cache[0] == snapshot_key:
+            return self._original_url_cache[1]
+        
+        csv_path = signature[0]
         try:
             # 智能检测文件编码
             encoding = self._detect_csv_encoding(csv_path)
             
+            original_url = None
             with open(csv_path, 'r', encoding=encoding) as f:
                 first_line = f.readline().strip()
                 if first_line.startswith("# Original URL:"):
-                    return first_line[15:].strip()  # 去掉"# Original URL:"前缀
-            return None
+                    original_url = first_line[15:].strip()  # 去掉"# Original URL:"前缀
+            self._original_url_cache = (snapshot_key, original_url)
+            return original_url
             
         except Exception as e:
             Logger.error(f"读取原始URL失败: {e}")
             return None
     
     def update_video_info(self, video_url: str, updated_info: Dict[str, str]) -> None:
-        """更新视频的详细信息"""
-        current_csv = self._find_latest_csv()
-        
-        if current_csv is None:
+        """更新视频的详细信息（追加一条状态日志）"""
+        if self._state_signature() is None:
             Logger.warning("未找到CSV文件，无法更新视频信息")
             return
         
         try:
-            # 智能检测文件编码
-            encoding = self._detect_csv_encoding(current_csv)
-            
-            # 读取现有数据
-            videos = []
-            url_line = None
-            with open(current_csv, 'r', encoding=encoding) as f:
-                # 检查第一行是否为原始URL
-                first_line = f.readline()
-                if first_line.startswith("# Original URL:"):
-                    url_line = first_line
-                else:
-                    # 如果第一行不是URL，重新回到文件开头
-                    f.seek(0)
-                
-                reader = csv.DictReader(f)
-                for row in reader:
-                    row.setdefault('is_multi_part', 'False')
-                    row.setdefault('total_parts', '1')
-                    row.setdefault('status', 'normal')
-                    row.setdefault('folder_size', '0')
-                    
-                    normalized_row = self._normalize_csv_row_for_write(row)
-                    if normalized_row['video_url'] == video_url:
-                        updated_copy = updated_info.copy()
-                        if 'download_path' in updated_copy:
-                            updated_copy['download_path'] = self._format_download_path(updated_copy['download_path'])
-                        if 'folder_size' in updated_copy:
-                            size_bytes = self.parse_folder_size_value(str(updated_copy['folder_size']))
-                            updated_copy['folder_size'] = self._format_folder_size_value(size_bytes)
-                        normalized_row.update(updated_copy)
-                        normalized_row = self._normalize_csv_row_for_write(normalized_row)
-                    videos.append(normalized_row)
-            
-            # 生成新的CSV文件名
-            new_csv_filename = self._generate_csv_filename()
-            new_csv_path = self.task_dir / new_csv_filename
-            temp_path = self.task_dir / f"temp_{new_csv_filename}"
-            
-            # 定义统一的字段列表
-            fieldnames = [
-                'video_url', 'title', 'name', 'download_path', 'folder_size',
-                'downloaded', 'avid', 'cid', 'pubdate', 'status',
-                'is_multi_part', 'total_parts'
-            ]
-            
-            # 先写入临时文件，使用UTF-8-BOM编码确保Excel正确识别
-            with open(temp_path, 'w', newline='', encoding='utf-8-sig') as f:
-                # 写入原始URL行（如果存在）
-                if url_line:
-                    f.write(url_line)
-                
-                if videos:
-                    writer = csv.DictWriter(f, fieldnames=fieldnames)
-                    writer.writeheader()
-                    writer.writerows(videos)
-            
-            # 验证写入成功后，替换文件
-            shutil.move(str(temp_path), str(new_csv_path))
-            
-            # 删除旧的CSV文件
-            if current_csv != new_csv_path:
-                current_csv.unlink()
-                Logger.debug(f"已删除旧CSV文件: {current_csv.name}")
-            
+            self._append_journal(self._make_update_record(video_url, updated_info))
             Logger.debug(f"已更新视频信息: {video_url}")
             
         except Exception as e:
-            # 清理临时文件
-            temp_path = self.task_dir / f"temp_{self._generate_csv_filename()}"
-            if temp_path.exists():
-                temp_path.unlink()
-            Logger.error(f"更新视频信息失败: {e}") 
+            Logger.error(f"更新视频信息失败: {e}")
+    
+    def update_videos_info(self, updates: Dict[str, Dict[str, str]]) -> None:
+        """批量更新多个视频的详细信息（video_url -> 字段），一次写入状态日志"""
+        if not updates:
+            return
+        if self._state_signature() is None:
+            Logger.warning("未找到CSV文件，无法更新视频信息")
+            return
+        
+        try:
+            self._append_journal_records([
+                self._make_update_record(video_url, updated_info) for video_url, updated_info in updates.items()
+            ])
+            Logger.debug(f"已批量更新 {len(updates)} 个视频的信息")
+        except Exception as e:
+            Logger.error(f"批量更新视频信息失败: {e}")
+    
+    def _make_update_record(self, video_url: str, updated_info: Dict[str, str]) -> Dict[str, Any]:
+        """生成更新视频信息的日志记录（统一路径和大小的格式）"""
+        updated_copy = {key: str(value) for key, value in updated_info.items()}
+        if 'download_path' in updated_copy:
+            updated_copy['download_path'] = self._format_download_path(updated_copy['download_path'])
+        if 'folder_size' in updated_copy:
+            size_bytes = self.parse_folder_size_value(updated_copy['folder_size'])
+            updated_copy['folder_size'] = self._format_folder_size_value(size_bytes)
+        return {'op': 'update', 'video_url': video_url, 'fields': updated_copy}
@@ -0,0 +1,185 @@
+"""
+下载槽位调度
+进程级共享的调度器：WebUI中同时运行的多个任务（各自一个线程和事件循环）
+都从这里领取下载槽位，按全局、每个账号、每个输出磁盘分别限制同时运行的yutto数量；
+等待中的请求按任务轮流分配，避免单个大任务占满所有槽位
+"""
+
+import asyncio
+import os
+import threading
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Counter, Deque, Dict, Optional
+
+from .logger import Logger
+from .constants import DEFAULT_PERFORMANCE_OPTIONS
+from .rate_limiter import account_key
+
+
+class _SlotRequest:
+    """一个等待中（或已分配）的槽位请求"""
+    
+    __slots__ = ("task_key", "account", "disk", "loop", "future", "granted")
+    
+    def __init__(self, task_key: str, account: str, disk: str, loop: asyncio.AbstractEventLoop):
+        self.task_key = task_key
+        self.account = account
+        self.disk = disk
+        self.loop = loop
+        self.future: asyncio.Future = loop.create_future()
+        self.granted = False
+
+
+class DownloadScheduler:
+    """下载槽位调度器（线程安全，可被多个事件循环共享）
+    
+    上限 <= 0 表示不限制。槽位分配在锁内完成，再通过 call_soon_threadsafe
+    唤醒请求所在的事件循环；每次分配后该任务移到队尾，实现任务间轮转。
+    """
+    
+    def __init__(self, max_global: int = 0, max_per_account: int = 0, max_per_disk: int = 0):
+        self.max_global = max_global
+        self.max_per_account = max_per_account
+        self.max_per_disk = max_per_disk
+        self._active = 0
+        self._active_accounts: Counter[str] = Counter()
+        self._active_disks: Counter[str] = Counter()
+        self._queues: "OrderedDict[str, Deque[_SlotRequest]]" = OrderedDict()  # 任务 -> 等待队列
+        self._lock = threading.Lock()
+    
+    def configure(self, max_global: int, max_per_account: int, max_per_disk: int) -> None:
+        """调整各项上限（放宽时立即唤醒等待中的请求）"""
+        with self._lock:
+            self.max_global = max_global
+            self.max_per_account = max_per_account
+            self.max_per_disk = max_per_disk
+            self._dispatch_locked()
+    
+    @staticmethod
+    def _within(limit: int, current: int) -> bool:
+        return limit <= 0 or current < limit
+    
+    def _can_grant_locked(self, request: _SlotRequest) -> bool:
+        return (self._within(self.max_per_account, self._active_accounts[request.account])
+                and self._within(self.max_per_disk, self._active_disks[request.disk]))
+    
+    def _dispatch_locked(self) -> None:
+        """按任务轮转分配空闲槽位：每个任务只看队首请求，账号或磁盘已满时跳到下一个任务"""
+        while self._queues and self._within(self.max_global, self._active):
+            for task_key, queue in self._queues.items():
+                if self._can_grant_locked(queue[0]):
+                    break
+            else:
+                return
+            
+            request = queue.popleft()
+            if queue:
+                self._queues.move_to_end(task_key)
+            else:
+                del self._queues[task_key]
+            
+            self._active += 1
+            self._active_accounts[request.account] += 1
+            self._active_disks[request.disk] += 1
+            request.granted = True
+            try:
+                request.loop.call_soon_threadsafe(self._resolve, request.future)
+            except RuntimeError:
+                # 请求所在的事件循环已关闭，收回槽位
+                self._release_locked(request)
+    
+    @staticmethod
+    def _resolve(future: asyncio.Future) -> None:
+        if not future.done():
+            future.set_result(None)
+    
+    def _release_locked(self, request: _SlotRequest) -> None:
+        self._active -= 1
+        self._active_accounts[request.account] -= 1
+        self._active_disks[request.disk] -= 1
+        request.granted = False
+    
+    async def _acquire(self, task_key: str, account: str, disk: str) -> _SlotRequest:
+        request = _SlotRequest(task_key, account, disk, asyncio.get_running_loop())
+        with self._lock:
+            self._queues.setdefault(task_key, deque()).append(request)
+            self._dispatch_locked()
+            waiting = not request.granted
+            active = self._active
+        if waiting:
+            Logger.debug(f"等待下载槽位（正在下载: {active}）")
+        
+        try:
+            await request.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if request.granted:
+                    # 已分配但还没来得及使用
+                    self._release_locked(request)
+                    self._dispatch_locked()
+                else:
+                    queue = self._queues.get(task_key)
+                    if queue is not None and request in queue:
+                        queue.remove(request)
+                        if not queue:
+                            del self._queues[task_key]
+            raise
+        return request
+    
+    def _release(self, request: _SlotRequest) -> None:
+        with self._lock:
+            self._release_locked(request)
+            self._dispatch_locked()
+    
+    @asynccontextmanager
+    async def slot(self, task_key: str, sessdata: Optional[str], output_dir: Path) -> AsyncIterator[None]:
+        """占用一个下载槽位（async with），退出时归还"""
+        request = await self._acquire(task_key, account_key(sessdata), _disk_key(output_dir))
+        try:
+            yield
+        finally:
+            self._release(request)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """当前占用和等待情况"""
+        with self._lock:
+            return {
+                "active": self._active,
+                "waiting": sum(len(queue) for queue in self._queues.values()),
+                "waiting_tasks": len(self._queues),
+            }
+
+
+def _disk_key(path: Path) -> str:
+    """输出目录所在的文件系统（目录不存在时向上查找）"""
+    for candidate in [path, *path.parents]:
+        try:
+            return str(os.stat(candidate).st_dev)
+        except OSError:
+            continue
+    return str(path)
+
+
+# 全局下载调度器实例
+_download_scheduler: Optional[DownloadScheduler] = None
+_download_scheduler_lock = threading.Lock()
+
+
+def configure_download_scheduler(max_global: int, max_per_account: int, max_per_disk: int) -> None:
+    """设置全局、每个账号、每个磁盘同时运行的下载数上限（<= 0 表示不限制）"""
+    get_download_scheduler().configure(max_global, max_per_account, max_per_disk)
+
+
+def get_download_scheduler() -> DownloadScheduler:
+    """获取全局下载调度器实例"""
+    global _download_scheduler
+    with _download_scheduler_lock:
+        if _download_scheduler is None:
+            _download_scheduler = DownloadScheduler(
+                DEFAULT_PERFORMANCE_OPTIONS["max_downloads"],
+                DEFAULT_PERFORMANCE_OPTIONS["max_downloads_per_account"],
+                DEFAULT_PERFORMANCE_OPTIONS["max_downloads_per_disk"]
+            )
+        return _download_scheduler
@@ -0,0 +1,179 @@
+"""
+yutto失败原因分类
+所有规则编译成一个正则（命名分组对应规则），yutto每输出一行就匹配一次，
+记录目前为止优先级最高的命中；命中致命规则（配置错误）时可以立即终止下载，不必等进程结束。
+规则表可以在配置文件 performance.failure_rules 中扩展或覆盖
+"""
+
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .logger import Logger
+
+
+# 分类及优先级（越靠前越优先）
+FAILURE_CATEGORIES = ["failure", "should_skip", "retry"]
+
+# 默认规则：(名称, 匹配文本, 分类, 是否致命)
+DEFAULT_FAILURE_RULES: List[Tuple[str, str, str, bool]] = [
+    # 1. 配置问题（不应标记为成功）- 优先级最高，命中后立即终止
+    ("strict_vip_check", "启用了严格校验大会员或登录模式，请检查 sessdata 或大会员状态", "failure", True),
+    ("check_sessdata", "请检查 sessdata", "failure", True),
+    ("invalid_cookie", "cookie 无效", "failure", True),
+    ("login_failed", "登录失败", "failure", True),
+    ("auth_failed", "身份验证失败", "failure", True),
+    # 2. 应该跳过的情况（标记为成功避免重复尝试）
+    ("dash_unsupported", "尚不支持 dash 格式", "should_skip", False),  # 充电视频
+    ("charge_bvid", "该视频（bvid:", "should_skip", False),  # 充电视频的另一种表达
+    ("video_not_found", "视频不存在", "should_skip", False),
+    ("invisible", "稿件不可见", "should_skip", False),
+    ("deleted", "已删除", "should_skip", False),
+    ("no_permission", "权限不足", "should_skip", False),
+    ("paid", "需要付费", "should_skip", False),
+    ("vip_only", "会员专享", "should_skip", False),  # 仅当不是配置错误时才跳过
+    ("charge_only", "充电专享", "should_skip", False),
+    # 3. 可重试的临时错误
+    ("network_error", "网络错误", "retry", False),
+    ("connect_timeout", "连接超时", "retry", False),
+    ("request_failed", "请求失败", "retry", False),
+    ("download_failed", "下载失败", "retry", False),
+    ("separator_not_found", "separator is not found", "retry", False),  # 网络传输问题
+    ("chunk_exceed", "chunk exceed the limit", "retry", False),  # 网络传输问题
+    ("connection_reset", "connection reset", "retry", False),
+    ("timeout", "timeout", "retry", False),
+    ("temporary_failure", "temporary failure", "retry", False),
+    ("unreachable", "无法访问", "retry", False),
+    ("cannot_connect", "无法连接", "retry", False),
+    ("network_unreachable", "网络不可达", "retry", False),
+    ("server_error", "服务器错误", "retry", False),
+    ("http_503", "503 service unavailable", "retry", False),
+    ("http_502", "502 bad gateway", "retry", False),
+    ("http_504", "504 gateway timeout", "retry", False),
+]
+
+
+class FailureRule:
+    """一条分类规则"""
+    
+    __slots__ = ("name", "pattern", "category", "fatal", "regex")
+    
+    def __init__(self, name: str, pattern: str, category: str, fatal: bool = False, regex: bool = False):
+        self.name = name
+        self.pattern = pattern
+        self.category = category
+        self.fatal = fatal
+        self.regex = regex  # False 时按普通文本匹配
+    
+    def __repr__(self) -> str:
+        return f"FailureRule({self.name!r}, {self.category!r})"
+
+
+class FailureRuleSet:
+    """编译后的规则表（只读，可在多个下载之间共享）"""
+    
+    def __init__(self, rules: List[FailureRule]):
+        self.rules = rules
+        self._group_rules: Dict[str, Tuple[Tuple[int, int], FailureRule]] = {}
+        alternatives = []
+        # 优先级：先按分类，再按规则顺序；分支按优先级排列，同一位置总是命中优先级最高的规则
+        ranked = sorted(((FAILURE_CATEGORIES.index(rule.category), index), rule) for index, rule in enumerate(rules))
+        for priority, rule in ranked:
+            group = f"r{priority[1]}"
+            self._group_rules[group] = (priority, rule)
+            body = rule.pattern if rule.regex else re.escape(rule.pattern)
+            alternatives.append(f"(?P<{group}>{body})")
+        # 放在零宽断言中，每个位置都尝试匹配，规则之间相互重叠时也不会遗漏
+        self._pattern = re.compile(f"(?=(?:{'|'.join(alternatives)}))", re.IGNORECASE) if alternatives else None
+    
+    def match_line(self, line: str) -> Optional[Tuple[Tuple[int, int], FailureRule]]:
+        """返回一行中优先级最高的命中 (优先级, 规则)，没有命中时返回None"""
+        if self._pattern is None:
+            return None
+        best = None
+        for match in self._pattern.finditer(line):
+            candidate = self._group_rules[match.lastgroup]
+            if best is None or candidate[0] < best[0]:
+                best = candidate
+        return best
+    
+    def classifier(self) -> "FailureClassifier":
+        return FailureClassifier(self)
+
+
+class FailureClassifier:
+    """单次下载的增量分类器：逐行喂入输出，随时可以读取当前结果"""
+    
+    def __init__(self, rule_set: FailureRuleSet):
+        self.rule_set = rule_set
+        self._best: Optional[Tuple[Tuple[int, int], FailureRule]] = None
+    
+    def feed(self, line: str) -> Optional[FailureRule]:
+        """匹配一行输出，返回该行命中的规则（没有命中时返回None）"""
+        hit = self.rule_set.match_line(line)
+        if hit is not None and (self._best is None or hit[0] < self._best[0]):
+            self._best = hit
+        return hit[1] if hit else None
+    
+    @property
+    def matched_rule(self) -> Optional[FailureRule]:
+        """目前为止优先级最高的命中规则"""
+        return self._best[1] if self._best else None
+    
+    @property
+    def fatal_rule(self) -> Optional[FailureRule]:
+        """已命中的致命规则（可以立即终止下载）"""
+        rule = self.matched_rule
+        return rule if rule is not None and rule.fatal else None
+
+
+def _parse_custom_rule(index: int, entry: Any) -> Optional[FailureRule]:
+    if not isinstance(entry, dict) or not entry.get("pattern"):
+        Logger.warning(f"忽略无效的失败分类规则 #{index + 1}: {entry}")
+        return None
+    category = entry.get("category", "retry")
+    if category not in FAILURE_CATEGORIES:
+        Logger.warning(f"失败分类规则 #{index + 1} 的分类无效: {category}（可选: {', '.join(FAILURE_CATEGORIES)}）")
+        return None
+    rule = FailureRule(
+        str(entry.get("name") or f"custom_{index + 1}"),
+        str(entry["pattern"]),
+        category,
+        bool(entry.get("fatal", False)),
+        bool(entry.get("regex", False))
+    )
+    if rule.regex:
+        try:
+            re.compile(rule.pattern)
+        except re.error as e:
+            Logger.warning(f"失败分类规则 {rule.name} 的正则无效: {e}")
+            return None
+    return rule
+
+
+def build_failure_rules(custom_rules: Optional[List[Dict[str, Any]]] = None) -> FailureRuleSet:
+    """合并默认规则和配置中的规则并编译
+    
+    配置规则的字段：pattern（必填）、category（failure / should_skip / retry，默认 retry）、
+    name、fatal、regex；与默认规则同名时替换默认规则，否则排在同分类的默认规则之前
+    """
+    custom = [rule for index, entry in enumerate(custom_rules or [])
+              if (rule := _parse_custom_rule(index, entry)) is not None]
+    overridden = {rule.name for rule in custom}
+    defaults = [FailureRule(*rule) for rule in DEFAULT_FAILURE_RULES if rule[0] not in overridden]
+    return FailureRuleSet(custom + defaults)
+
+
+# 已编译的规则表（按配置内容缓存，避免每个下载器重复编译）
+_rule_sets: Dict[str, FailureRuleSet] = {}
+_rule_sets_lock = threading.Lock()
+
+
+def get_failure_rules(custom_rules: Optional[List[Dict[str, Any]]] = None) -> FailureRuleSet:
+    """获取配置对应的已编译规则表"""
+    key = repr(custom_rules or [])
+    with _rule_sets_lock:
+        rule_set = _rule_sets.get(key)
+        if rule_set is None:
+            rule_set = _rule_sets[key] = build_failure_rules(custom_rules)
+        return rule_set
@@ -3,50 +3,111 @@ HTTP请求工具类
 """
 
 import asyncio
+import threading
+import weakref
 import httpx
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 from .logger import Logger
+from .rate_limiter import get_rate_limiter
+from .response_cache import get_response_cache
+
+
+try:
+    import h2  # noqa: F401  HTTP/2依赖，requirements.txt 中通过 httpx[http2] 安装
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_http2_warned = False
+
+
+# 共享连接池：每个事件循环内，同一账号和代理的所有Fetcher共用一个客户端
+_shared_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[Optional[str], Optional[str]], httpx.AsyncClient]]" = weakref.WeakKeyDictionary()
+_shared_clients_lock = threading.Lock()
+
+
+def _get_shared_client(sessdata: Optional[str], proxy: Optional[str]) -> httpx.AsyncClient:
+    """获取当前事件循环中账号对应的共享客户端，不存在时创建"""
+    global _http2_warned
+    loop = asyncio.get_running_loop()
+    key = (sessdata, proxy)
+    with _shared_clients_lock:
+        if not HTTP2_AVAILABLE and not _http2_warned:
+            _http2_warned = True
+            Logger.warning('未安装 h2，请求改用 HTTP/1.1，无法复用连接并发多个请求（pip install "httpx[http2]" 启用 HTTP/2）')
+        clients = _shared_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None or client.is_closed:
+            client = clients[key] = httpx.AsyncClient(
+                cookies={"SESSDATA": sessdata} if sessdata else {},
+                proxy=proxy,
+                http2=HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(30.0, connect=10.0),  # 设置连接和总超时
+                follow_redirects=False,  # 默认不跟随重定向，需要时按请求指定
+                headers={
+                    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36",
+                    "Referer": "https://www.bilibili.com"
+                },
+                limits=httpx.Limits(max_keepalive_connections=10, max_connections=20)  # 连接池限制
+            )
+    return client
+
+
+async def close_shared_clients() -> None:
+    """关闭当前事件循环中的所有共享客户端（在事件循环结束前调用）"""
+    with _shared_clients_lock:
+        clients = _shared_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
 
 
 class Fetcher:
-    """HTTP请求工具"""
+    """HTTP请求工具
+    
+    连接池在同一事件循环内按账号共享，Fetcher本身很轻量，可以随时创建；
+    安装了 h2 时自动启用HTTP/2。
+    """
     
-    def __init__(self, sessdata: Optional[str] = None, proxy: Optional[str] = None, max_retries: int = 3, retry_delay: float = 1.0):
-        """初始化"""
+    def __init__(self, sessdata: Optional[str] = None, proxy: Optional[str] = None, max_retries: int = 3, retry_delay: float = 1.0, refresh: bool = False):
+        """初始化（refresh 为 True 时该Fetcher的所有请求都跳过读取缓存）"""
         self.cookies = {}
         if sessdata:
             self.cookies["SESSDATA"] = sessdata
         
         self.proxy = proxy
+        self.rate_limiter = get_rate_limiter(sessdata)  # 同一账号的所有Fetcher共享
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.refresh = refresh
         self._client: Optional[httpx.AsyncClient] = None
     
     async def __aenter__(self):
         """异步上下文管理器入口"""
-        self._client = httpx.AsyncClient(
-            cookies=self.cookies,
-            proxy=self.proxy,
-            timeout=httpx.Timeout(30.0, connect=10.0),  # 设置连接和总超时
-            follow_redirects=False,  # 不自动跟随重定向
-            headers={
-                "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36",
-                "Referer": "https://www.bilibili.com"
-            },
-            limits=httpx.Limits(max_keepalive_connections=10, max_connections=20)  # 连接池限制
-        )
+        self._client = _get_shared_client(self.cookies.get("SESSDATA"), self.proxy)
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """异步上下文管理器退出"""
-        if self._client:
-            await self._client.aclose()
+        """异步上下文管理器退出（共享客户端由 close_shared_clients 统一关闭）"""
+        pass
     
-    async def fetch_json(self, url: str, params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
-        """获取JSON数据（带重试机制）"""
+    async def fetch_json(self, url: str, params: Optional[Dict[str, Any]] = None, bypass_cache: bool = False) -> Optional[Dict[str, Any]]:
+        """获取JSON数据（带重试机制）
+        
+        元数据类接口的成功响应会写入磁盘缓存，有效期内直接返回缓存；
+        响应带校验信息时发送条件请求，304时返回缓存的响应；
+        bypass_cache 为 True 或强制刷新时跳过读取缓存（响应仍会写入）
+        """
         if not self._client:
             raise RuntimeError("Fetcher not initialized. Use 'async with' syntax.")
         
+        cache = get_response_cache()
+        if cache is not None and not (bypass_cache or self.refresh):
+            cached = cache.get(url, params)
+            if cached is not None:
+                return cached
+        # 保存过 ETag/Last-Modified 时发送条件请求，未变化时服务器只返回304
+        conditional_headers = cache.get_validators(url, params) if cache is not None else {}
+        
         last_exception = None
         
         for attempt in range(self.max_retries + 1):
@@ -56,13 +117,34 @@ class Fetcher:
                     await asyncio.sleep(self.retry_delay * attempt)
                     Logger.debug(f"重试请求 ({attempt}/{self.max_retries}): {url}")
                 
-                response = await self._client.get(url, params=params)
+                # 同一账号所有Fetcher共享的按接口类别限速
+                await self.rate_limiter.acquire(url)
+                response = await self._client.get(url, params=params, headers=conditional_headers or None)
                 
-                if response.status_code == 200:
-                    return response.json()
+                if response.status_code == 304 and cache is not None:
+                    data = cache.revalidate(url, params)
+                    if data is not None:
+                        self.rate_limiter.report_success(url)
+                        return data
+                    # 缓存记录已被淘汰，重新发送完整请求
+                    conditional_headers = {}
+                    continue
+                elif response.status_code == 200:
+                    data = response.json()
+                    # 根据业务码反馈给自适应调速
+                    code = data.get("code") if isinstance(data, dict) else None
+                    if code in (-352, -412):
+                        self.rate_limiter.report_throttle(url)
+                    elif code == 0:
+                        self.rate_limiter.report_success(url)
+                        if cache is not None:
+                            cache.put(url, params, data, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+                    return data
                 elif response.status_code == 429:
                     Logger.warning(f"请求频率限制 (429)，等待后重试: {url}")
-                    await asyncio.sleep(5.0)  # 频率限制时等待更久
+                    # 降低该类接口的速率并暂停发放令牌，同类的其他请求也一并顺延
+                    self.rate_limiter.report_throttle(url)
+                    self.rate_limiter.pause(url, 5.0)
                     continue
                 elif response.status_code in [502, 503, 504]:
                     Logger.warning(f"服务器暂时不可用 ({response.status_code})，重试: {url}")
@@ -96,19 +178,9 @@ class Fetcher:
             raise RuntimeError("Fetcher not initialized. Use 'async with' syntax.")
         
         try:
-            # 临时创建一个支持重定向的客户端
-            async with httpx.AsyncClient(
-                cookies=self.cookies,
-                proxy=self.proxy,
-                timeout=httpx.Timeout(30.0, connect=10.0),
-                follow_redirects=True,
-                headers={
-                    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36",
-                    "Referer": "https://www.bilibili.com"
-                }
-            ) as client:
-                response = await client.get(url)
-                return str(response.url)
+            await self.rate_limiter.acquire(url)
+            response = await self._client.get(url, follow_redirects=True)
+            return str(response.url)
         except Exception as e:
             Logger.error(f"获取重定向URL失败: {e}")
             return url
@@ -119,6 +191,7 @@ class Fetcher:
             raise RuntimeError("Fetcher not initialized. Use 'async with' syntax.")
         
         try:
+            await self.rate_limiter.acquire(url)
             response = await self._client.get(url)
             return response.status_code == 200
         except Exception:
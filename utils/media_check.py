@@ -0,0 +1,83 @@
+"""
+媒体文件完整性检查
+按MP4的box结构检查yutto留下的文件：完整的视频文件（.mp4/.m4a）必须所有box首尾相接并包含moov和mdat，
+下载中断的分段文件（.m4s）只要求已写入的box结构有效（最后一个box可以不完整），
+用于断点续传时判断哪些文件可以保留、哪些必须删除
+"""
+
+import struct
+from pathlib import Path
+from typing import Iterator, Optional, Set, Tuple
+
+
+# yutto下载中的音视频分段（断点续传时从文件末尾继续下载）
+PARTIAL_MEDIA_SUFFIXES = {".m4s"}
+# 合并后的完整视频文件
+FINAL_MEDIA_SUFFIXES = {".mp4", ".m4a"}
+
+# 分段文件开头允许出现的box
+_FRAGMENT_START_BOXES = {b"ftyp", b"styp", b"sidx"}
+
+
+def _iter_boxes(path: Path) -> Iterator[Tuple[bytes, int, int]]:
+    """依次返回顶层box的 (类型, 起始位置, 大小)；box大小超出文件末尾时照常返回，由调用方判断"""
+    file_size = path.stat().st_size
+    with open(path, "rb") as f:
+        offset = 0
+        while offset + 8 <= file_size:
+            f.seek(offset)
+            size, box_type = struct.unpack(">I4s", f.read(8))
+            if size == 1:
+                # 64位大小
+                if offset + 16 > file_size:
+                    size = file_size - offset + 1  # 头部不完整，按超出文件末尾处理
+                else:
+                    size = struct.unpack(">Q", f.read(8))[0]
+            elif size == 0:
+                # 延伸到文件末尾
+                size = file_size - offset
+            yield box_type, offset, size
+            if size < 8:
+                return
+            offset += size
+
+
+def _valid_box_type(box_type: bytes) -> bool:
+    return all(32 <= byte < 127 for byte in box_type)
+
+
+def check_complete_mp4(path: Path) -> bool:
+    """完整的MP4：box首尾相接正好到文件末尾，且包含moov和mdat"""
+    try:
+        file_size = path.stat().st_size
+        seen: Set[bytes] = set()
+        end = 0
+        for box_type, offset, size in _iter_boxes(path):
+            if not _valid_box_type(box_type) or size < 8 or offset + size > file_size:
+                return False
+            seen.add(box_type)
+            end = offset + size
+        return end == file_size and {b"moov", b"mdat"} <= seen
+    except (OSError, struct.error):
+        return False
+
+
+def partial_fragment_size(path: Path) -> Optional[int]:
+    """检查下载中断的分段文件，结构有效时返回文件大小（续传的起点），否则返回None
+    
+    只有最后一个box允许超出文件末尾（正在写入时中断）
+    """
+    try:
+        file_size = path.stat().st_size
+        first = True
+        for box_type, offset, size in _iter_boxes(path):
+            if not _valid_box_type(box_type) or size < 8:
+                return None
+            if first and box_type not in _FRAGMENT_START_BOXES:
+                return None
+            first = False
+            if offset + size > file_size:
+                break
+        return file_size if not first else None
+    except (OSError, struct.error):
+        return None
@@ -0,0 +1,160 @@
+"""
+yutto下载进度解析
+从yutto输出中提取已下载/总大小、百分比、速度和剩余时间，汇总为每个视频的进度；
+进度行按时间间隔限流后再写日志和推送到WebUI，避免每个刷新帧都产生一条日志
+"""
+
+import re
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+PROGRESS_LOG_INTERVAL = 10.0  # 同一视频两次进度日志之间的最短间隔（秒）
+PROGRESS_PUBLISH_INTERVAL = 1.0  # 同一视频两次推送实时速度之间的最短间隔（秒）
+
+_ANSI_RE = re.compile(r"\x1b\[[0-?]*[ -/]*[@-~]")
+_LINE_END_RE = re.compile(rb"[^\r\n]*[\r\n]")
+
+_SIZE = r"(\d+(?:\.\d+)?)\s*([KMGT]?i?B)"
+_TRANSFER_RE = re.compile(r"(\d+(?:\.\d+)?)\s*([KMGT]?i?B)?\s*/\s*" + _SIZE)  # 已下载/总大小
+_SPEED_RE = re.compile(_SIZE + r"\s*/\s*(?:s\b|秒|⚡)")
+_PERCENT_RE = re.compile(r"(\d{1,3}(?:\.\d+)?)\s*%")
+_ETA_RE = re.compile(r"(?:ETA|eta|剩余(?:时间)?)\s*[:：]?\s*((?:\d+:)?\d{1,2}:\d{2})")
+_CLOCK_RE = re.compile(r"(?<![\d:])(\d+:\d{2}:\d{2})\s*$")
+
+_UNIT_SIZES = {
+    "B": 1,
+    "KB": 1000, "MB": 1000 ** 2, "GB": 1000 ** 3, "TB": 1000 ** 4,
+    "KiB": 1024, "MiB": 1024 ** 2, "GiB": 1024 ** 3, "TiB": 1024 ** 4,
+}
+
+
+def split_output(buffer: bytes) -> Tuple[List[bytes], bytes]:
+    """按 \\r 或 \\n 切分输出（进度条通常用 \\r 原地刷新），返回 (完整的行, 尚未结束的部分)"""
+    lines = []
+    end = 0
+    for match in _LINE_END_RE.finditer(buffer):
+        lines.append(match.group())
+        end = match.end()
+    return lines, buffer[end:]
+
+
+def clean_output_line(raw: bytes) -> str:
+    """解码一行输出并去掉终端控制序列"""
+    return _ANSI_RE.sub("", raw.decode("utf-8", errors="ignore")).strip()
+
+
+def _to_bytes(value: str, unit: Optional[str]) -> Optional[int]:
+    if unit not in _UNIT_SIZES:
+        return None
+    return int(float(value) * _UNIT_SIZES[unit])
+
+
+def _clock_to_seconds(text: str) -> int:
+    seconds = 0
+    for part in text.split(":"):
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+
+def format_speed(speed: Optional[float]) -> str:
+    return f"{(speed or 0) / 1024 / 1024:.2f} MB/s"
+
+
+class DownloadProgress:
+    """单个视频的下载进度"""
+    
+    __slots__ = ("bytes_done", "bytes_total", "percent", "speed", "eta", "updated_at")
+    
+    def __init__(self):
+        self.bytes_done: Optional[int] = None
+        self.bytes_total: Optional[int] = None
+        self.percent: Optional[float] = None
+        self.speed: Optional[float] = None  # 字节/秒
+        self.eta: Optional[int] = None  # 剩余秒数
+        self.updated_at = 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "bytes_done": self.bytes_done,
+            "bytes_total": self.bytes_total,
+            "percent": round(self.percent, 1) if self.percent is not None else None,
+            "speed": round(self.speed or 0),
+            "eta": self.eta,
+        }
+    
+    def format(self) -> str:
+        parts = []
+        if self.bytes_done is not None and self.bytes_total:
+            parts.append(f"{self.bytes_done / 1024 / 1024:.1f}/{self.bytes_total / 1024 / 1024:.1f} MB")
+        if self.percent is not None:
+            parts.append(f"{self.percent:.0f}%")
+        if self.speed is not None:
+            parts.append(format_speed(self.speed))
+        if self.eta is not None:
+            parts.append(f"剩余 {self.eta // 60}:{self.eta % 60:02d}")
+        return " ".join(parts)
+
+
+class ProgressParser:
+    """逐行解析yutto输出，识别出的进度行更新 progress；同时负责日志和推送的限流"""
+    
+    def __init__(self):
+        self.progress = DownloadProgress()
+        self._last_sample: Optional[Tuple[float, int]] = None  # 上一次的 (时间, 已下载字节)，用于估算速度
+        self._last_reported: Dict[str, float] = {}
+        self._finished_reported: Set[str] = set()
+    
+    def parse(self, line: str) -> bool:
+        """解析一行输出，是进度行时更新进度并返回True"""
+        speed_match = _SPEED_RE.search(line)
+        rest = _SPEED_RE.sub(" ", line) if speed_match else line
+        transfer_match = _TRANSFER_RE.search(rest)
+        percent_match = _PERCENT_RE.search(rest)
+        if not (transfer_match or percent_match or speed_match):
+            return False
+        
+        progress = self.progress
+        now = time.monotonic()
+        progress.updated_at = now
+        
+        if transfer_match:
+            done_value, done_unit, total_value, total_unit = transfer_match.groups()
+            done = _to_bytes(done_value, done_unit or total_unit)
+            total = _to_bytes(total_value, total_unit)
+            if done is not None and total:
+                progress.bytes_done, progress.bytes_total = done, total
+                if not percent_match:
+                    progress.percent = min(100.0, done * 100 / total)
+        if percent_match:
+            progress.percent = min(100.0, float(percent_match.group(1)))
+        
+        if speed_match:
+            progress.speed = _to_bytes(*speed_match.groups())
+        elif progress.bytes_done is not None:
+            # 输出中没有速度时按两次采样之间的增量估算（指数平滑）
+            if self._last_sample and now > self._last_sample[0] and progress.bytes_done >= self._last_sample[1]:
+                sample = (progress.bytes_done - self._last_sample[1]) / (now - self._last_sample[0])
+                progress.speed = sample if progress.speed is None else 0.7 * progress.speed + 0.3 * sample
+        if progress.bytes_done is not None:
+            self._last_sample = (now, progress.bytes_done)
+        
+        eta_match = _ETA_RE.search(rest) or _CLOCK_RE.search(rest)
+        if eta_match:
+            progress.eta = _clock_to_seconds(eta_match.group(1))
+        elif progress.speed and progress.bytes_total and progress.bytes_done is not None:
+            progress.eta = int(max(0, progress.bytes_total - progress.bytes_done) / progress.speed)
+        return True
+    
+    def due(self, channel: str, interval: float) -> bool:
+        """距离该通道上次报告已超过 interval 秒，或刚刚下载完成时返回True"""
+        now = time.monotonic()
+        finished = self.progress.percent is not None and self.progress.percent >= 100
+        if finished and channel not in self._finished_reported:
+            self._finished_reported.add(channel)
+            self._last_reported[channel] = now
+            return True
+        if now - self._last_reported.get(channel, 0.0) >= interval:
+            self._last_reported[channel] = now
+            return True
+        return False
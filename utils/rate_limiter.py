@@ -0,0 +1,221 @@
+"""
+请求速率限制
+进程级共享的令牌桶，按账号和接口类别分别限速，所有Fetcher实例共用；
+速率根据响应情况自适应调整（AIMD：正常时加性增加，遇到限流/风控时乘性减少）
+"""
+
+import asyncio
+import hashlib
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .logger import Logger
+from .constants import DEFAULT_RATE_LIMITS
+
+
+# 接口类别：按顺序匹配URL，未匹配的归入 default
+ENDPOINT_FAMILIES = [
+    ("space", re.compile(r"api\.bilibili\.com/x/space/")),
+    ("list", re.compile(r"api\.bilibili\.com/x/(v3/fav|series|polymer|v2/history/toview)/")),
+    ("video", re.compile(r"api\.bilibili\.com/x/(web-interface/view|player)")),
+    ("pgc", re.compile(r"api\.bilibili\.com/(pgc|pugv)/")),
+]
+
+
+def get_endpoint_family(url: str) -> str:
+    """根据URL判断接口类别"""
+    for family, pattern in ENDPOINT_FAMILIES:
+        if pattern.search(url):
+            return family
+    return "default"
+
+
+class TokenBucket:
+    """令牌桶（线程安全，可被多个事件循环共享）
+    
+    采用预订方式：取令牌时立即扣减（允许为负），返回调用方需要等待的时间，
+    等待在锁外进行，因此并发请求会按顺序均匀排开。
+    """
+    
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate  # 每秒令牌数，<= 0 表示不限速
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self, now: float) -> None:
+        if self.rate > 0:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def reserve(self) -> float:
+        """预订一个令牌，返回需要等待的秒数"""
+        with self._lock:
+            if self.rate <= 0:
+                return 0.0
+            self._refill(time.monotonic())
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+    
+    def pause(self, seconds: float) -> None:
+        """暂停发放令牌一段时间（如收到429时），之后的请求统一顺延"""
+        with self._lock:
+            if self.rate <= 0:
+                return
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+    
+    def set_rate(self, rate: float, capacity: Optional[float] = None) -> None:
+        """调整速率（已累积的令牌按旧速率结算）"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+            self.capacity = capacity if capacity is not None else max(1.0, rate)
+            self._tokens = min(self._tokens, self.capacity)
+
+
+class RateLimiter:
+    """按接口类别限速的速率限制器（对应一个账号）
+    
+    启用自适应调速时，以配置的速率为基准：每次正常响应使速率增加
+    ADDITIVE_INCREASE / 当前速率（即正常请求每持续一秒约增加 ADDITIVE_INCREASE 次/秒），
+    收到429、-352/-412 或确认风控时速率乘以 MULTIPLICATIVE_DECREASE。
+    速率限制在基准的 [MIN_RATE_RATIO, MAX_RATE_RATIO] 倍之间。
+    """
+    
+    ADDITIVE_INCREASE = 0.02
+    MULTIPLICATIVE_DECREASE = 0.5
+    MIN_RATE_RATIO = 0.1
+    MAX_RATE_RATIO = 4.0
+    DECREASE_COOLDOWN = 2.0  # 秒，降速后短时间内的其他限流信号多来自降速前已发出的请求，不再重复降速
+    
+    def __init__(self, rates: Optional[Dict[str, float]] = None, adaptive: bool = True):
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._base_rates: Dict[str, float] = {}
+        self._last_decrease: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.adaptive = adaptive
+        self.configure(rates)
+    
+    def configure(self, rates: Optional[Dict[str, float]] = None, adaptive: Optional[bool] = None) -> None:
+        """设置各类别的基准速率（每秒请求数），未指定的类别使用默认值"""
+        merged = dict(DEFAULT_RATE_LIMITS)
+        merged.update({family: float(rate) for family, rate in (rates or {}).items() if rate is not None})
+        with self._lock:
+            if adaptive is not None:
+                self.adaptive = adaptive
+            for family, rate in merged.items():
+                bucket = self._buckets.get(family)
+                if bucket is None:
+                    self._buckets[family] = TokenBucket(rate)
+                elif self._base_rates.get(family) != rate:
+                    # 基准变化时重新从新基准开始调整
+                    bucket.set_rate(rate)
+                self._base_rates[family] = rate
+    
+    def get_bucket(self, family: str) -> TokenBucket:
+        with self._lock:
+            return self._get_bucket_locked(family)
+    
+    def _get_bucket_locked(self, family: str) -> TokenBucket:
+        bucket = self._buckets.get(family)
+        if bucket is None:
+            base_rate = self._base_rates.get("default", DEFAULT_RATE_LIMITS["default"])
+            bucket = self._buckets[family] = TokenBucket(base_rate)
+            self._base_rates[family] = base_rate
+        return bucket
+    
+    async def acquire(self, url: str) -> None:
+        """按URL所属类别取得一个令牌，必要时等待"""
+        family = get_endpoint_family(url)
+        wait = self.get_bucket(family).reserve()
+        if wait > 0:
+            Logger.debug(f"请求限速 [{family}]：等待 {wait:.2f} 秒")
+            await asyncio.sleep(wait)
+    
+    def pause(self, url: str, seconds: float) -> None:
+        """暂停URL所属类别的请求一段时间"""
+        self.get_bucket(get_endpoint_family(url)).pause(seconds)
+    
+    def report_success(self, url: str) -> None:
+        """正常响应：加性增加该类别的速率"""
+        if not self.adaptive:
+            return
+        family = get_endpoint_family(url)
+        with self._lock:
+            bucket = self._get_bucket_locked(family)
+            if bucket.rate <= 0:
+                return
+            max_rate = self._base_rates[family] * self.MAX_RATE_RATIO
+            new_rate = min(max_rate, bucket.rate + self.ADDITIVE_INCREASE / bucket.rate)
+            if new_rate != bucket.rate:
+                bucket.set_rate(new_rate)
+    
+    def report_throttle(self, url: str) -> None:
+        """限流信号（429、-352/-412）：乘性减少该类别的速率"""
+        if self.adaptive:
+            self._decrease(get_endpoint_family(url))
+    
+    def report_risk(self) -> None:
+        """确认受到风控：所有类别一起降速"""
+        if not self.adaptive:
+            return
+        with self._lock:
+            families = list(self._buckets)
+        for family in families:
+            self._decrease(family)
+    
+    def _decrease(self, family: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_decrease.get(family, float('-inf')) < self.DECREASE_COOLDOWN:
+                return
+            self._last_decrease[family] = now
+            bucket = self._get_bucket_locked(family)
+            if bucket.rate <= 0:
+                return
+            min_rate = self._base_rates[family] * self.MIN_RATE_RATIO
+            new_rate = max(min_rate, bucket.rate * self.MULTIPLICATIVE_DECREASE)
+            bucket.set_rate(new_rate)
+        Logger.warning(f"检测到限流信号，[{family}] 类接口请求速率降至 {new_rate:.2f} 次/秒")
+    
+    def get_rates(self) -> Dict[str, float]:
+        """当前各类别的实际速率"""
+        with self._lock:
+            return {family: bucket.rate for family, bucket in self._buckets.items()}
+
+
+# 全局速率限制器实例（按账号区分）
+_rate_limiters: Dict[str, RateLimiter] = {}
+_rate_limiter_config: Dict[str, Any] = {"rates": None, "adaptive": True}
+_rate_limiter_lock = threading.Lock()
+
+
+def account_key(sessdata: Optional[str]) -> str:
+    """账号标识（不在内存中直接用SESSDATA作键，避免被意外打印）"""
+    if not sessdata:
+        return "anonymous"
+    return hashlib.sha1(sessdata.encode("utf-8")).hexdigest()[:16]
+
+
+def configure_rate_limits(rates: Optional[Dict[str, float]] = None, adaptive: bool = True) -> None:
+    """设置所有账号的基准速率与是否自适应调速"""
+    with _rate_limiter_lock:
+        _rate_limiter_config["rates"] = rates
+        _rate_limiter_config["adaptive"] = adaptive
+        limiters = list(_rate_limiters.values())
+    for limiter in limiters:
+        limiter.configure(rates, adaptive)
+
+
+def get_rate_limiter(sessdata: Optional[str] = None) -> RateLimiter:
+    """获取账号对应的全局速率限制器实例"""
+    key = account_key(sessdata)
+    with _rate_limiter_lock:
+        limiter = _rate_limiters.get(key)
+        if limiter is None:
+            limiter = _rate_limiters[key] = RateLimiter(_rate_limiter_config["rates"], _rate_limiter_config["adaptive"])
+        return limiter
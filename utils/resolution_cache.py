@@ -0,0 +1,73 @@
+"""
+URL解析结果缓存
+记录短链重定向、番剧/课程 md/ep → ss 等解析结果（原始URL → 规范URL），
+持久化到缓存目录，重复解析同一URL时无需任何网络请求
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from .logger import Logger
+from .constants import CACHE_DIR
+
+
+class ResolutionCache:
+    """URL解析缓存（线程安全，进程内共享）"""
+    
+    MAX_ENTRIES = 10000  # 超出时丢弃最早写入的记录
+    
+    def __init__(self, cache_file: Path):
+        self.cache_file = cache_file
+        self._entries: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._load()
+    
+    def _load(self) -> None:
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._entries = {str(k): str(v) for k, v in data.items()}
+        except (OSError, ValueError):
+            pass
+    
+    def _save_locked(self) -> None:
+        temp_path = self.cache_file.with_suffix(".tmp")
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(temp_path, self.cache_file)
+        except OSError as e:
+            Logger.debug(f"保存URL解析缓存失败: {e}")
+    
+    def get(self, url: str) -> Optional[str]:
+        with self._lock:
+            return self._entries.get(url)
+    
+    def set(self, url: str, resolved_url: str) -> None:
+        with self._lock:
+            if self._entries.get(url) == resolved_url:
+                return
+            self._entries.pop(url, None)
+            self._entries[url] = resolved_url
+            while len(self._entries) > self.MAX_ENTRIES:
+                self._entries.pop(next(iter(self._entries)))
+            self._save_locked()
+
+
+# 全局URL解析缓存实例
+_resolution_cache: Optional[ResolutionCache] = None
+_resolution_cache_lock = threading.Lock()
+
+
+def get_resolution_cache() -> ResolutionCache:
+    """获取全局URL解析缓存实例"""
+    global _resolution_cache
+    with _resolution_cache_lock:
+        if _resolution_cache is None:
+            _resolution_cache = ResolutionCache(CACHE_DIR / "url_resolution.json")
+        return _resolution_cache
@@ -0,0 +1,242 @@
+"""
+HTTP响应磁盘缓存
+缓存元数据类接口的成功响应（按规范化URL+参数为键，不含Cookie），
+每类接口单独设置有效期，按最近使用时间淘汰；
+响应带有 ETag/Last-Modified 时同时保存，过期后用条件请求重新验证
+"""
+
+import atexit
+import json
+import sqlite3
+import threading
+import time
+import urllib.parse
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .logger import Logger
+from .constants import CACHE_DIR, RESPONSE_CACHE_TTLS
+
+
+# 不参与缓存键的查询参数（WBI签名的时间戳和签名值每次请求都不同）
+VOLATILE_PARAMS = {"wts", "w_rid"}
+
+
+class ResponseCache:
+    """基于SQLite的响应缓存（线程安全，进程内共享）"""
+    
+    EVICT_CHECK_INTERVAL = 50  # 每写入多少条检查一次容量
+    
+    def __init__(self, db_path: Path, max_bytes: int, max_entries: int = 50000):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0  # 条件请求返回304的次数
+        self._puts_since_check = 0
+        # 命中时只在内存中记录访问时间，随下一次写入（或淘汰、退出前）批量落盘，读取路径不写数据库
+        self._pending_access: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                body TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                etag TEXT,
+                last_modified TEXT
+            )
+        """)
+        # 旧版本数据库没有校验字段
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(responses)")}
+        for column in ("etag", "last_modified"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE responses ADD COLUMN {column} TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses(last_access)")
+        self._conn.commit()
+    
+    @staticmethod
+    def get_ttl(url: str) -> Optional[float]:
+        """返回URL对应的缓存有效期（秒），不可缓存时返回None"""
+        for pattern, ttl in RESPONSE_CACHE_TTLS.items():
+            if pattern in url:
+                return ttl
+        return None
+    
+    @staticmethod
+    def make_key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """规范化URL和参数：合并查询参数并按名称排序，去掉每次请求都会变化的签名参数"""
+        parts = urllib.parse.urlsplit(url)
+        query = urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        if params:
+            query += [(str(k), str(v)) for k, v in params.items()]
+        query = sorted((k, v) for k, v in query if k not in VOLATILE_PARAMS)
+        return urllib.parse.urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, urllib.parse.urlencode(query), ""))
+    
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """读取未过期的缓存响应"""
+        if self.get_ttl(url) is None:
+            return None
+        key = self.make_key(url, params)
+        
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT body, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] < now:
+                self.misses += 1
+                return None
+            self._pending_access[key] = now
+            self.hits += 1
+        
+        Logger.debug(f"命中响应缓存: {key}")
+        return json.loads(row[0])
+    
+    def get_validators(self, url: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+        """返回条件请求头（If-None-Match / If-Modified-Since），没有保存校验信息时返回空字典"""
+        key = self.make_key(url, params)
+        with self._lock:
+            row = self._conn.execute("SELECT etag, last_modified FROM responses WHERE key = ?", (key,)).fetchone()
+        headers = {}
+        if row and row[0]:
+            headers["If-None-Match"] = row[0]
+        if row and row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+    
+    def revalidate(self, url: str, params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """条件请求返回304：延长有效期并返回保存的响应（记录已被淘汰时返回None）"""
+        key = self.make_key(url, params)
+        ttl = self.get_ttl(url) or 0
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT body FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._flush_access_locked()
+            self._conn.execute(
+                "UPDATE responses SET expires_at = ?, last_access = ? WHERE key = ?",
+                (now + ttl, now, key)
+            )
+            self._conn.commit()
+            self.not_modified += 1
+        
+        Logger.debug(f"响应未变化 (304): {key}")
+        return json.loads(row[0])
+    
+    def put(self, url: str, params: Optional[Dict[str, Any]], data: Dict[str, Any],
+            etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """写入响应（只应写入成功的响应）
+        
+        不在 RESPONSE_CACHE_TTLS 中的接口只有带校验信息时才保存，且立即过期（每次都做条件请求）
+        """
+        ttl = self.get_ttl(url)
+        if ttl is None:
+            if not (etag or last_modified) or "api.bilibili.com" not in url:
+                return
+            ttl = 0
+        key = self.make_key(url, params)
+        
+        body = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        now = time.time()
+        with self._lock:
+            self._flush_access_locked()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, body, size, expires_at, last_access, etag, last_modified) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, body, len(body.encode("utf-8")), now + ttl, now, etag, last_modified)
+            )
+            self._conn.commit()
+            self._puts_since_check += 1
+            if self._puts_since_check >= self.EVICT_CHECK_INTERVAL:
+                self._puts_since_check = 0
+                self._evict_locked()
+    
+    def _flush_access_locked(self) -> None:
+        """把暂存的访问时间写入数据库（由调用方提交）"""
+        if not self._pending_access:
+            return
+        self._conn.executemany(
+            "UPDATE responses SET last_access = ? WHERE key = ?",
+            [(accessed, key) for key, accessed in self._pending_access.items()]
+        )
+        self._pending_access.clear()
+    
+    def flush(self) -> None:
+        """写入暂存的访问时间（进程退出前调用）"""
+        with self._lock:
+            if self._pending_access:
+                self._flush_access_locked()
+                self._conn.commit()
+    
+    def get_stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "not_modified": self.not_modified}
+    
+    def _evict_locked(self) -> None:
+        """删除过期且无法重新验证的条目，并按最近使用时间淘汰直到满足容量限制"""
+        now = time.time()
+        self._conn.execute(
+            "DELETE FROM responses WHERE expires_at < ? AND etag IS NULL AND last_modified IS NULL",
+            (now,)
+        )
+        count, total_size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total_size <= self.max_bytes:
+            self._conn.commit()
+            return
+        
+        removed = 0
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall():
+            if count <= self.max_entries and total_size <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            count -= 1
+            total_size -= size
+            removed += 1
+        self._conn.commit()
+        Logger.debug(f"响应缓存已淘汰 {removed} 条记录")
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._pending_access.clear()
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+
+# 全局响应缓存实例
+_response_cache: Optional[ResponseCache] = None
+_response_cache_config: Dict[str, Any] = {"enabled": True, "max_mb": 200.0}
+_response_cache_lock = threading.Lock()
+
+
+def configure_response_cache(enabled: bool = True, max_mb: float = 200.0) -> None:
+    """设置是否启用缓存以及容量上限（MB）；强制刷新按请求指定（见 Fetcher 的 refresh 参数）"""
+    with _response_cache_lock:
+        _response_cache_config.update(enabled=enabled, max_mb=max_mb)
+        if _response_cache is not None:
+            _response_cache.max_bytes = int(max_mb * 1024 * 1024)
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """获取全局响应缓存实例，未启用或打开失败时返回None"""
+    global _response_cache
+    with _response_cache_lock:
+        if not _response_cache_config["enabled"]:
+            return None
+        if _response_cache is None:
+            try:
+                _response_cache = ResponseCache(
+                    CACHE_DIR / "http_cache.db",
+                    max_bytes=int(_response_cache_config["max_mb"] * 1024 * 1024)
+                )
+            except sqlite3.Error as e:
+                Logger.warning(f"打开响应缓存失败，将不使用缓存: {e}")
+                _response_cache_config["enabled"] = False
+                return None
+            atexit.register(_response_cache.flush)
+        return _response_cache
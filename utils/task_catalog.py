@@ -0,0 +1,277 @@
+"""
+任务目录索引（SQLite）
+每个输出根目录一个数据库，记录任务、视频及下载状态，
+用于代替逐个目录读取CSV的扫描、查重和统计
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .logger import Logger
+from .constants import TASK_FOLDER_PREFIXES, CSV_FIELDNAMES
+
+
+CATALOG_FILENAME = ".bilisyncer_catalog.db"
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS tasks (
+    name TEXT PRIMARY KEY,
+    original_url TEXT,
+    state TEXT,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS videos (
+    task TEXT NOT NULL,
+    {', '.join(f'{column} TEXT' for column in CSV_FIELDNAMES)},
+    PRIMARY KEY (task, video_url)
+);
+CREATE INDEX IF NOT EXISTS idx_videos_url ON videos(video_url);
+CREATE INDEX IF NOT EXISTS idx_tasks_url ON tasks(original_url);
+"""
+
+
+class TaskCatalog:
+    """任务索引
+    
+    CSV快照仍是任务状态的权威来源（方便Excel查看），索引由CSVManager写穿更新。
+    每个任务记录写入时快照和状态日志的签名（文件名、mtime、大小，见 CSVManager.state_key），
+    扫描时签名未变化则直接使用索引，否则重新读取该目录的CSV；
+    不使用目录mtime，yutto每下载一个视频都会新建文件夹，目录mtime随之变化。
+    无效目录同样记录（original_url为空，按目录mtime判断是否出现了快照），避免重复检查。
+    """
+    
+    def __init__(self, root: Path):
+        self.root = root
+        self.db_path = root / CATALOG_FILENAME
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        # 旧版本建立的索引缺少后来新增的列（旧记录没有签名，首次扫描时重新索引）
+        for table, required in (("tasks", ["state"]), ("videos", CSV_FIELDNAMES)):
+            columns = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+            for column in required:
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT")
+        self._conn.commit()
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+    
+    def _dir_mtime(self, name: str) -> Optional[int]:
+        try:
+            return (self.root / name).stat().st_mtime_ns
+        except OSError:
+            return None
+    
+    def _no_snapshot_state(self, name: str) -> str:
+        """没有快照的目录的签名：新增快照会改变目录mtime"""
+        return f"dir:{self._dir_mtime(name)}"
+    
+    # ---------- 写入（由CSVManager调用） ----------
+    
+    def replace_task(self, name: str, original_url: Optional[str], rows: List[Dict[str, str]],
+                     state: Optional[str] = None) -> None:
+        """用完整的视频列表替换任务记录（写入新快照后调用，state 为写入后的签名）"""
+        if state is None:
+            state = self._no_snapshot_state(name)
+        
+        placeholders = ', '.join('?' for _ in range(len(CSV_FIELDNAMES) + 1))
+        values = [
+            [name] + [str(row.get(column, '') or '') for column in CSV_FIELDNAMES]
+            for row in rows if row.get('video_url')
+        ]
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tasks (name, original_url, state, updated_at) VALUES (?, ?, ?, ?)",
+                (name, original_url, state, time.time())
+            )
+            self._conn.execute("DELETE FROM videos WHERE task = ?", (name,))
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO videos (task, {', '.join(CSV_FIELDNAMES)}) VALUES ({placeholders})",
+                values
+            )
+    
+    def add_videos(self, name: str, rows: List[Dict[str, str]], state: Optional[str]) -> None:
+        """追加新视频（流式提取逐页追加后调用），已存在的视频保持不变"""
+        placeholders = ', '.join('?' for _ in range(len(CSV_FIELDNAMES) + 1))
+        values = [
+            [name] + [str(row.get(column, '') or '') for column in CSV_FIELDNAMES]
+            for row in rows if row.get('video_url')
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR IGNORE INTO videos (task, {', '.join(CSV_FIELDNAMES)}) VALUES ({placeholders})",
+                values
+            )
+            self._conn.execute(
+                "UPDATE tasks SET state = ?, updated_at = ? WHERE name = ?",
+                (state, time.time(), name)
+            )
+    
+    def update_video(self, name: str, video_url: str, fields: Dict[str, str], state: Optional[str]) -> None:
+        """更新单个视频的字段（追加状态日志后调用）"""
+        fields = {key: value for key, value in fields.items() if key in CSV_FIELDNAMES and key != 'video_url'}
+        with self._lock, self._conn:
+            if fields:
+                assignments = ', '.join(f"{key} = ?" for key in fields)
+                self._conn.execute(
+                    f"UPDATE videos SET {assignments} WHERE task = ? AND video_url = ?",
+                    list(fields.values()) + [name, video_url]
+                )
+            self._conn.execute(
+                "UPDATE tasks SET state = ?, updated_at = ? WHERE name = ?",
+                (state, time.time(), name)
+            )
+    
+    def remove_task(self, name: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM videos WHERE task = ?", (name,))
+            self._conn.execute("DELETE FROM tasks WHERE name = ?", (name,))
+    
+    # ---------- 同步 ----------
+    
+    def refresh_task(self, task_dir: Path) -> bool:
+        """从CSV重新索引单个任务目录，返回是否为有效任务"""
+        from .csv_manager import CSVManager
+        
+        if self._dir_mtime(task_dir.name) is None:
+            self.remove_task(task_dir.name)
+            return False
+        
+        csv_manager = CSVManager(task_dir)
+        original_url = csv_manager.get_original_url()
+        rows = (csv_manager.load_video_list() or []) if original_url else []
+        self.replace_task(task_dir.name, original_url, rows, csv_manager.state_key())
+        return original_url is not None
+    
+    def _state_matches(self, name: str, state: Optional[str]) -> bool:
+        """索引中记录的签名是否与磁盘上的快照和状态日志一致"""
+        from .csv_manager import CSVManager
+        
+        if state is None:
+            return False
+        if state.startswith("dir:"):
+            return state == self._no_snapshot_state(name)
+        csv_name = state.split(":", 1)[0]
+        return CSVManager.snapshot_state_key(self.root / name, csv_name) == state
+    
+    def _is_fresh(self, name: str) -> bool:
+        """返回索引中的记录是否仍然有效（没有记录时返回False）"""
+        with self._lock:
+            row = self._conn.execute("SELECT state FROM tasks WHERE name = ?", (name,)).fetchone()
+        return row is not None and self._state_matches(name, row[0])
+    
+    def sync(self) -> None:
+        """扫描根目录，只重新索引新增或快照/状态日志有变化的目录，并移除已消失的目录"""
+        with self._lock:
+            stored = dict(self._conn.execute("SELECT name, state FROM tasks").fetchall())
+        
+        seen = set()
+        refreshed = 0
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if not entry.is_dir() or not any(entry.name.startswith(prefix) for prefix in TASK_FOLDER_PREFIXES):
+                    continue
+                seen.add(entry.name)
+                if not self._state_matches(entry.name, stored.get(entry.name)):
+                    self.refresh_task(Path(entry.path))
+                    refreshed += 1
+        
+        for name in set(stored) - seen:
+            self.remove_task(name)
+        
+        Logger.debug(f"任务索引同步完成：{len(seen)} 个目录，重新索引 {refreshed} 个")
+    
+    # ---------- 查询 ----------
+    
+    _TASK_QUERY = """
+        SELECT t.name, t.original_url, COUNT(v.video_url),
+               COALESCE(SUM(CASE WHEN v.downloaded = 'True' THEN 1 ELSE 0 END), 0)
+        FROM tasks t LEFT JOIN videos v ON v.task = t.name
+        WHERE t.original_url IS NOT NULL {condition}
+        GROUP BY t.name ORDER BY t.name
+    """
+    
+    def _task_info(self, row) -> Dict[str, Any]:
+        name, original_url, total, downloaded = row
+        return {
+            'name': name,
+            'path': str(self.root / name),
+            'url': original_url,
+            'total': total,
+            'downloaded': downloaded,
+            'pending': total - downloaded
+        }
+    
+    def list_tasks(self, sync: bool = True) -> List[Dict[str, Any]]:
+        """列出所有有效任务及下载统计"""
+        if sync:
+            self.sync()
+        with self._lock:
+            rows = self._conn.execute(self._TASK_QUERY.format(condition="")).fetchall()
+        return [self._task_info(row) for row in rows]
+    
+    def get_task(self, task_dir: Path) -> Optional[Dict[str, Any]]:
+        """获取单个任务信息，目录有变化时先重新索引；无效任务返回None"""
+        name = task_dir.name
+        if not self._is_fresh(name):
+            if not self.refresh_task(task_dir):
+                return None
+        with self._lock:
+            row = self._conn.execute(self._TASK_QUERY.format(condition="AND t.name = ?"), (name,)).fetchone()
+        return self._task_info(row) if row else None
+    
+    def find_task_by_url(self, original_url: str) -> Optional[Path]:
+        """按原始URL查找已有任务目录"""
+        with self._lock:
+            rows = self._conn.execute("SELECT name FROM tasks WHERE original_url = ?", (original_url,)).fetchall()
+        for (name,) in rows:
+            task_dir = self.root / name
+            if self.get_task(task_dir) is not None:
+                return task_dir
+        return None
+    
+    def find_tasks_with_video(self, video_url: str) -> List[Path]:
+        """查找包含指定视频的任务目录"""
+        with self._lock:
+            rows = self._conn.execute("SELECT task FROM videos WHERE video_url = ?", (video_url,)).fetchall()
+        return [self.root / name for (name,) in rows]
+
+
+_catalogs: Dict[Path, TaskCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_task_catalog(root: Path, create: bool = False) -> Optional[TaskCatalog]:
+    """获取输出根目录对应的任务索引
+    
+    索引文件不存在且 create 为 False 时返回None（未启用索引）
+    """
+    try:
+        root = Path(root).expanduser().resolve()
+    except OSError:
+        return None
+    
+    with _catalogs_lock:
+        catalog = _catalogs.get(root)
+        if catalog is not None and catalog.db_path.exists():
+            return catalog
+        
+        if not create and not (root / CATALOG_FILENAME).exists():
+            return None
+        
+        try:
+            root.mkdir(parents=True, exist_ok=True)
+            catalog = TaskCatalog(root)
+        except sqlite3.Error as e:
+            Logger.warning(f"打开任务索引失败，继续使用CSV扫描: {e}")
+            return None
+        _catalogs[root] = catalog
+        return catalog
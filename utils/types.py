@@ -121,6 +121,7 @@ class VideoListData(TypedDict):
     """视频列表数据"""
     title: str
     videos: list[VideoInfo]
+    incremental: Optional[bool]  # 是否为增量结果（只包含新增视频，不能据此删除已有记录）
 
 
 class DownloadOptions(TypedDict):
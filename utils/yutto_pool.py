@@ -0,0 +1,330 @@
+"""
+yutto常驻进程池
+每个视频启动一次yutto都要付出解释器启动和导入的开销，视频多而短时这部分开销占大头；
+启用后下载任务交给已导入yutto的常驻进程（utils/yutto_worker.py）执行，通过管道收发任务，
+结束时返回结构化结果（退出码、yutto错误名、异常类型），不再只能从输出文本中推断
+"""
+
+import asyncio
+import atexit
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from .logger import Logger
+from .constants import DEFAULT_PERFORMANCE_OPTIONS
+from .progress_parser import split_output
+from .yutto_worker import MESSAGE_MARKER
+
+
+_MARKER = MESSAGE_MARKER.encode("utf-8")
+
+# yutto错误名 → 下载结果（见 BatchDownloader._analyze_yutto_result）
+YUTTO_ERROR_RESULTS = {
+    "NOT_LOGIN_ERROR": "failure",
+    "NOT_VIP_ERROR": "failure",
+    "WRONG_ARGUMENT_ERROR": "failure",
+    "NO_ACCESS_PERMISSION_ERROR": "should_skip",
+    "UNSUPPORTED_TYPE_ERROR": "should_skip",
+    "EPISODE_NOT_FOUND_ERROR": "should_skip",
+    "HTTP_STATUS_ERROR": "retry",
+    "MAX_RETRY_ERROR": "retry",
+}
+
+# 未捕获的异常中属于网络问题、可以重试的类型
+RETRY_EXCEPTIONS = {
+    "ConnectError", "ConnectTimeout", "ReadError", "ReadTimeout", "WriteError",
+    "PoolTimeout", "RemoteProtocolError", "TimeoutError", "ConnectionError",
+    "ConnectionResetError", "IncompleteRead",
+}
+
+
+def classify_worker_result(result: Optional[Dict[str, Any]]) -> Optional[str]:
+    """根据常驻进程返回的结构化结果判断下载结果，无法判断时返回None"""
+    if not result:
+        return None
+    if result.get("error") in YUTTO_ERROR_RESULTS:
+        return YUTTO_ERROR_RESULTS[result["error"]]
+    if result.get("exception") in RETRY_EXCEPTIONS:
+        return "retry"
+    return None
+
+
+class YuttoJob:
+    """交给常驻进程的一次下载
+    
+    接口与 asyncio 子进程一致（pid、stdout.read()、wait()、terminate()、kill()），
+    调用方可以像对待独立的yutto进程一样读取输出和停止；停止时终止整个常驻进程
+    """
+    
+    def __init__(self, worker: "_YuttoWorker", loop: asyncio.AbstractEventLoop):
+        self.worker = worker
+        self.loop = loop
+        self.result: Optional[Dict[str, Any]] = None  # 常驻进程返回的结构化结果
+        self.returncode: Optional[int] = None
+        self._lines: asyncio.Queue = asyncio.Queue()
+        self._done = asyncio.Event()
+        self._eof = False
+    
+    @property
+    def pid(self) -> int:
+        return self.worker.process.pid
+    
+    @property
+    def stdout(self) -> "YuttoJob":
+        """读取输出（与子进程的 stdout.read() 相同，每次返回以 \\r 或 \\n 结尾的一段，结束时返回 b''）"""
+        return self
+    
+    async def read(self, n: int = -1) -> bytes:
+        if self._eof:
+            return b""
+        line = await self._lines.get()
+        if not line:
+            self._eof = True
+        return line
+    
+    async def wait(self) -> int:
+        await self._done.wait()
+        return self.returncode if self.returncode is not None else 1
+    
+    def terminate(self) -> None:
+        self.worker.kill()
+    
+    def kill(self) -> None:
+        self.worker.kill()
+    
+    # 以下由读取线程通过 call_soon_threadsafe 调用
+    
+    def _post(self, callback, *args) -> None:
+        try:
+            self.loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            pass  # 事件循环已关闭
+    
+    def _feed(self, line: bytes) -> None:
+        self._lines.put_nowait(line)
+    
+    def _finish(self, result: Optional[Dict[str, Any]], returncode: int) -> None:
+        self.result = result
+        self.returncode = returncode
+        self._lines.put_nowait(b"")
+        self._done.set()
+
+
+class _YuttoWorker:
+    """一个常驻进程及其输出读取线程"""
+    
+    def __init__(self, process: subprocess.Popen):
+        self.process = process
+        self.jobs_done = 0
+        self.job: Optional[YuttoJob] = None
+    
+    def is_alive(self) -> bool:
+        return self.process.poll() is None
+    
+    def send(self, message: Dict[str, Any]) -> None:
+        self.process.stdin.write((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+        self.process.stdin.flush()
+    
+    def close(self) -> None:
+        """关闭输入管道，常驻进程读到EOF后自行退出"""
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+    
+    def kill(self) -> None:
+        try:
+            self.process.kill()
+        except OSError:
+            pass
+    
+    def start_reader(self, pool: "YuttoWorkerPool") -> None:
+        threading.Thread(target=self._read_loop, args=(pool,), name=f"yutto-worker-{self.process.pid}", daemon=True).start()
+    
+    def _dispatch_line(self, pool: "YuttoWorkerPool", line: bytes) -> None:
+        job = self.job
+        if line.startswith(_MARKER):
+            try:
+                message = json.loads(line[len(_MARKER):])
+            except ValueError:
+                return
+            if message.get("event") == "result" and job is not None:
+                self.job = None
+                self.jobs_done += 1
+                job._post(job._finish, message, int(message.get("return_code", 1)))
+                pool._release(self)
+            return
+        if job is not None:
+            job._post(job._feed, line)
+        else:
+            Logger.debug(f"[yutto-worker] {line.decode('utf-8', errors='ignore').rstrip()}")
+    
+    def _read_loop(self, pool: "YuttoWorkerPool") -> None:
+        """把输出转发给当前任务；收到结果消息时结束任务并把进程交还进程池
+        
+        按 \\r 或 \\n 切分转发，进度条原地刷新的输出不必等到换行
+        """
+        buffer = b""
+        for chunk in iter(lambda: self.process.stdout.read1(65536), b""):
+            lines, buffer = split_output(buffer + chunk)
+            for line in lines:
+                self._dispatch_line(pool, line)
+        if buffer:
+            self._dispatch_line(pool, buffer)
+        
+        # 进程已退出（正常关闭或被终止）
+        returncode = self.process.wait()
+        job, self.job = self.job, None
+        if job is not None:
+            job._post(job._finish, None, returncode)
+        pool._discard(self)
+
+
+class YuttoWorkerPool:
+    """常驻进程池（线程安全，WebUI中多个任务共享）
+    
+    空闲进程最多保留 max_idle 个；同时下载的数量超过时临时启动新进程，用完即退出。
+    每个进程执行 MAX_JOBS_PER_WORKER 次下载后退出，避免yutto的全局状态和内存持续累积。
+    当前Python环境无法导入yutto（例如通过pipx单独安装）时自动停用，退回每次启动新进程。
+    """
+    
+    MAX_JOBS_PER_WORKER = 50
+    
+    def __init__(self, max_idle: int = 0):
+        self.max_idle = max_idle
+        self.unavailable_reason: Optional[str] = None
+        self._idle: List[_YuttoWorker] = []
+        self._workers: Set[_YuttoWorker] = set()
+        self._job_ids = itertools.count(1)
+        self._lock = threading.Lock()
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_idle > 0 and self.unavailable_reason is None
+    
+    def configure(self, max_idle: int) -> None:
+        with self._lock:
+            self.max_idle = max_idle
+            surplus = self._idle[max(0, max_idle):]
+            del self._idle[max(0, max_idle):]
+        for worker in surplus:
+            worker.close()
+    
+    def _spawn(self) -> Optional[_YuttoWorker]:
+        """启动一个常驻进程并等待其导入yutto完成（阻塞，在线程池中调用）"""
+        env = dict(os.environ, PYTHONUNBUFFERED="1")
+        try:
+            process = subprocess.Popen(
+                [sys.executable, "-m", "utils.yutto_worker"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                cwd=Path(__file__).parent.parent,
+                env=env
+            )
+        except OSError as e:
+            self._disable(str(e))
+            return None
+        
+        for line in iter(process.stdout.readline, b""):
+            if not line.startswith(_MARKER):
+                continue
+            try:
+                message = json.loads(line[len(_MARKER):])
+            except ValueError:
+                continue
+            if message.get("event") == "ready":
+                worker = _YuttoWorker(process)
+                with self._lock:
+                    self._workers.add(worker)
+                worker.start_reader(self)
+                Logger.debug(f"yutto常驻进程已启动 (PID: {process.pid})")
+                return worker
+            self._disable(message.get("message") or "未知原因")
+            break
+        else:
+            self._disable("进程启动后意外退出")
+        
+        process.kill()
+        process.wait()
+        return None
+    
+    def _disable(self, reason: str) -> None:
+        with self._lock:
+            if self.unavailable_reason is not None:
+                return
+            self.unavailable_reason = reason
+        Logger.warning(f"无法使用yutto常驻进程，改为每次下载启动新进程: {reason}")
+    
+    async def submit(self, args: List[str]) -> Optional[YuttoJob]:
+        """把一次下载交给常驻进程，返回 YuttoJob；未启用或不可用时返回None（调用方自行启动yutto）"""
+        if not self.enabled:
+            return None
+        
+        with self._lock:
+            worker = self._idle.pop() if self._idle else None
+        if worker is None:
+            worker = await asyncio.get_running_loop().run_in_executor(None, self._spawn)
+            if worker is None:
+                return None
+        
+        job = YuttoJob(worker, asyncio.get_running_loop())
+        worker.job = job
+        try:
+            worker.send({"id": next(self._job_ids), "args": args})
+        except (OSError, ValueError):
+            # 进程已经退出
+            worker.job = None
+            worker.kill()
+            return None
+        return job
+    
+    def _release(self, worker: _YuttoWorker) -> None:
+        with self._lock:
+            keep = (worker.is_alive() and worker.jobs_done < self.MAX_JOBS_PER_WORKER
+                    and len(self._idle) < self.max_idle)
+            if keep:
+                self._idle.append(worker)
+        if not keep:
+            worker.close()
+    
+    def _discard(self, worker: _YuttoWorker) -> None:
+        with self._lock:
+            self._workers.discard(worker)
+            if worker in self._idle:
+                self._idle.remove(worker)
+    
+    def close(self) -> None:
+        """结束所有常驻进程"""
+        with self._lock:
+            workers = list(self._workers)
+            self._idle.clear()
+        for worker in workers:
+            worker.close()
+            worker.kill()
+
+
+# 全局常驻进程池实例
+_yutto_worker_pool: Optional[YuttoWorkerPool] = None
+_yutto_worker_pool_lock = threading.Lock()
+
+
+def configure_yutto_workers(max_idle: int) -> None:
+    """设置保留的空闲常驻进程数（0 表示不使用常驻进程）"""
+    get_yutto_worker_pool().configure(max_idle)
+
+
+def get_yutto_worker_pool() -> YuttoWorkerPool:
+    """获取全局常驻进程池实例"""
+    global _yutto_worker_pool
+    with _yutto_worker_pool_lock:
+        if _yutto_worker_pool is None:
+            _yutto_worker_pool = YuttoWorkerPool(DEFAULT_PERFORMANCE_OPTIONS["yutto_workers"])
+            atexit.register(_yutto_worker_pool.close)
+        return _yutto_worker_pool
@@ -0,0 +1,88 @@
+"""
+yutto常驻下载进程
+由 YuttoWorkerPool 启动（python -m utils.yutto_worker），进程内只导入一次yutto，
+之后从标准输入逐行读取下载任务（JSON），直接调用yutto的命令行入口；
+yutto的输出原样写到标准输出，每个任务结束时再输出一行带标记的JSON结果
+"""
+
+import json
+import sys
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+
+
+# 结果消息的行首标记，用于和yutto自身的输出区分
+MESSAGE_MARKER = "\x1ebilisyncer-worker:"
+
+
+def send_message(message: Dict[str, Any]) -> None:
+    """输出一条协议消息（先刷新yutto的输出，保证消息在该任务的所有输出之后）
+    
+    消息前先换行，yutto最后一行输出没有换行时标记也能位于行首
+    """
+    sys.stderr.flush()
+    sys.stdout.write("\n" + MESSAGE_MARKER + json.dumps(message, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
+
+def _error_name(return_code: int) -> Optional[str]:
+    """yutto退出码对应的错误名（如 NOT_LOGIN_ERROR），无法识别时返回None"""
+    try:
+        from yutto.exceptions import ErrorCode
+        return ErrorCode(return_code).name
+    except Exception:
+        return None
+
+
+def run_job(yutto_main: Callable[[], Any], args: List[str]) -> Dict[str, Any]:
+    """用给定参数执行一次yutto，返回结构化结果"""
+    sys.argv = ["yutto", *args]
+    return_code = 0
+    exception = None
+    try:
+        yutto_main()
+    except SystemExit as e:
+        if e.code is None:
+            return_code = 0
+        elif isinstance(e.code, int):
+            return_code = e.code
+        else:
+            print(e.code)
+            return_code = 1
+    except Exception as e:
+        traceback.print_exc()
+        return_code = 1
+        exception = type(e).__name__
+    
+    return {
+        "event": "result",
+        "return_code": return_code,
+        "error": _error_name(return_code) if return_code else None,
+        "exception": exception,
+    }
+
+
+def main() -> int:
+    try:
+        from yutto.__main__ import main as yutto_main
+    except Exception as e:
+        send_message({"event": "unavailable", "message": f"{type(e).__name__}: {e}"})
+        return 1
+    send_message({"event": "ready"})
+    
+    while True:
+        line = sys.stdin.readline()
+        if not line:
+            # 主进程已关闭管道
+            return 0
+        try:
+            job = json.loads(line)
+        except ValueError:
+            continue
+        result = run_job(yutto_main, [str(arg) for arg in job.get("args", [])])
+        result["id"] = job.get("id")
+        send_message(result)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -20,9 +20,11 @@ import time
 # 添加上级目录到Python路径，以便导入现有模块
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from batch_downloader import BatchDownloader
+from batch_downloader import BatchDownloader, configure_process_options
 from utils.logger import Logger
 from utils.csv_manager import CSVManager
+from utils.task_catalog import get_task_catalog
+from utils.fetcher import close_shared_clients
 from utils.config_manager import ConfigManager
 
 app = Flask(__name__)
@@ -34,6 +36,21 @@ current_tasks: Dict[str, Dict[str, Any]] = {}
 task_counter = 0
 
 
+def apply_process_config(config_name: Optional[str] = None) -> None:
+    """按配置文件的 performance 段设置进程级参数（WebUI启动时调用一次）
+    
+    各任务配置中的进程级参数不生效，避免后启动的任务改掉正在运行的任务的设置
+    """
+    performance = {}
+    if config_name:
+        config = ConfigManager().load_config(config_name)
+        if config is None:
+            Logger.warning(f"无法加载配置文件 {config_name}，进程级参数使用默认值")
+        else:
+            performance = config.get('performance') or {}
+    configure_process_options(performance)
+
+
 def create_web_logger_callback(task_id: Optional[str] = None):
     """创建WebLogger回调函数"""
     def web_logger_callback(level: str, message: str, category: Optional[str] = None):
@@ -54,6 +71,7 @@ def filter_task_for_json(task_data: Dict[str, Any]) -> Dict[str, Any]:
     filtered_task = task_data.copy()
     filtered_task.pop('thread', None)  # 移除Thread对象
     filtered_task.pop('process', None)  # 移除Process对象
+    filtered_task.pop('processes', None)  # 移除并发下载的Process对象列表
     return filtered_task
 
 
@@ -113,6 +131,12 @@ def save_config(name):
         data = request.get_json() or {}
         config_manager = ConfigManager()
         
+        # 页面表单不编辑 performance 段，保存时沿用已有的性能参数
+        if 'performance' not in data:
+            existing = config_manager.load_config(name) or {}
+            if existing.get('performance'):
+                data['performance'] = existing['performance']
+        
         # 验证配置
         errors = config_manager.validate_config(data)
         if errors:
@@ -164,11 +188,15 @@ def stop_task(task_id):
         
         Logger.warning(f"正在停止任务 {task_id}")
         
-        # 尝试终止相关进程
-        if 'process' in task and task['process']:
+        # 尝试终止相关进程（并发下载时可能同时存在多个yutto进程）
+        processes = list(task.get('processes') or [])
+        if task.get('process') and task['process'] not in processes:
+            processes.append(task['process'])
+        
+        for process in processes:
             try:
                 # 使用psutil强制终止进程及其子进程
-                parent = psutil.Process(task['process'].pid)
+                parent = psutil.Process(process.pid)
                 children = parent.children(recursive=True)
                 
                 # 先尝试优雅终止
@@ -191,7 +219,7 @@ def stop_task(task_id):
                         except psutil.NoSuchProcess:
                             pass
                 
-                Logger.info(f"已终止任务 {task_id} 的相关进程")
+                Logger.info(f"已终止任务 {task_id} 的相关进程 (PID: {process.pid})")
                 
             except Exception as e:
                 Logger.warning(f"终止进程时出现问题: {e}")
@@ -219,6 +247,7 @@ def start_download():
     save_cover = data.get('save_cover', False)
     debug = data.get('debug', False)
     extra_args_from_config = data.get('extra_args', [])
+    performance = data.get('performance') or {}
     
     if not url:
         return jsonify({'success': False, 'message': '请输入下载URL'})
@@ -243,6 +272,13 @@ def start_download():
             if not scan_dir.exists():
                 return None
             
+            # 启用了任务索引时，先按原始URL精确查找
+            catalog = get_task_catalog(scan_dir)
+            if catalog is not None:
+                task_dir = catalog.find_task_by_url(target_url)
+                if task_dir is not None:
+                    return task_dir
+            
             # 从URL中提取关键信息用于快速匹配
             url_lower = target_url.lower()
             
@@ -356,11 +392,13 @@ def start_download():
                     extra_args=extra_args,
                     original_url=None,
                     task_id=task_id,
-                    task_control=current_tasks
+                    task_control=current_tasks,
+                    performance=performance
                 )
                 loop = asyncio.new_event_loop()
                 asyncio.set_event_loop(loop)
                 loop.run_until_complete(downloader.update_single_task(existing_task_dir))
+                loop.run_until_complete(close_shared_clients())
                 loop.close()
             else:
                 downloader = BatchDownloader(
@@ -369,11 +407,13 @@ def start_download():
                     extra_args=extra_args,
                     original_url=url,
                     task_id=task_id,  # 传递任务ID以便检查停止标志
-                    task_control=current_tasks  # 传递任务控制字典
+                    task_control=current_tasks,  # 传递任务控制字典
+                    performance=performance
                 )
                 loop = asyncio.new_event_loop()
                 asyncio.set_event_loop(loop)
                 loop.run_until_complete(downloader.download_from_url(url))
+                loop.run_until_complete(close_shared_clients())
                 loop.close()
             
             # 检查是否被手动停止
@@ -425,6 +465,7 @@ def start_update_all():
     save_cover = data.get('save_cover', False)
     debug = data.get('debug', False)
     extra_args_from_config = data.get('extra_args', [])
+    performance = data.get('performance') or {}
     
     task_counter += 1
     task_id = f"update_{task_counter}"
@@ -472,13 +513,15 @@ def start_update_all():
                 extra_args=extra_args,
                 original_url=None,
                 task_id=task_id,  # 传递任务ID
-                task_control=current_tasks  # 传递任务控制字典
+                task_control=current_tasks,  # 传递任务控制字典
+                performance=performance
             )
             
             # 在新的事件循环中运行异步任务
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
             loop.run_until_complete(downloader.update_all_tasks())
+            loop.run_until_complete(close_shared_clients())
             loop.close()
             
             # 检查是否被手动停止
@@ -530,6 +573,7 @@ def start_update_selected():
     save_cover = data.get('save_cover', False)
     debug = data.get('debug', False)
     extra_args_from_config = data.get('extra_args', [])
+    performance = data.get('performance') or {}
     
     if not task_paths:
         return jsonify({'success': False, 'message': '请选择要更新的任务'})
@@ -598,13 +642,15 @@ def start_update_selected():
                         extra_args=extra_args,
                         original_url=None,
                         task_id=task_id,
-                        task_control=current_tasks
+                        task_control=current_tasks,
+                        performance=performance
                     )
                     
                     # 在新的事件循环中运行异步任务
                     loop = asyncio.new_event_loop()
                     asyncio.set_event_loop(loop)
                     await_task = loop.run_until_complete(downloader.update_single_task(Path(task_path)))
+                    loop.run_until_complete(close_shared_clients())
                     loop.close()
                     
                     completed_count += 1
@@ -716,6 +762,7 @@ def start_delete_all():
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
             loop.run_until_complete(downloader.delete_all_tasks())
+            loop.run_until_complete(close_shared_clients())
             loop.close()
             
             # 检查是否被手动停止
@@ -828,6 +875,7 @@ def start_delete_selected():
                     loop = asyncio.new_event_loop()
                     asyncio.set_event_loop(loop)
                     await_task = loop.run_until_complete(downloader.delete_single_task(Path(task_path)))
+                    loop.run_until_complete(close_shared_clients())
                     loop.close()
                     
                     completed_count += 1
@@ -964,24 +1012,9 @@ def scan_tasks_with_progress():
                 
                 try:
                     # 使用新的筛选逻辑，只处理有效的任务目录
-                    if downloader._is_valid_task_directory(task_dir):
-                        csv_manager = CSVManager(task_dir)
-                        original_url = csv_manager.get_original_url()
-                        stats = csv_manager.get_download_stats()
-                        
-                        # 识别任务类型
-                        task_type = _identify_task_type(task_dir.name)
-                        
-                        task_info = {
-                            'name': task_dir.name,
-                            'path': str(task_dir),
-                            'url': original_url,
-                            'type': task_type,
-                            'total': stats['total'],
-                            'downloaded': stats['downloaded'],
-                            'pending': stats['pending']
-                        }
-                        
+                    task_info = _collect_task_info(downloader, task_dir)
+                    if task_info is not None:
+                        task_type = task_info['type']
                         tasks.append(task_info)
                         current_tasks[task_id]['progress_detail']['found_tasks'].append(task_info)
                         
@@ -1059,23 +1092,9 @@ def scan_tasks():
         
         for task_dir in all_dirs:
             # 使用新的筛选逻辑，只处理有效的任务目录
-            if downloader._is_valid_task_directory(task_dir):
-                csv_manager = CSVManager(task_dir)
-                original_url = csv_manager.get_original_url()
-                stats = csv_manager.get_download_stats()
-                
-                # 识别任务类型
-                task_type = _identify_task_type(task_dir.name)
-                
-                tasks.append({
-                    'name': task_dir.name,
-                    'path': str(task_dir),
-                    'url': original_url,
-                    'type': task_type,
-                    'total': stats['total'],
-                    'downloaded': stats['downloaded'],
-                    'pending': stats['pending']
-                })
+            task_info = _collect_task_info(downloader, task_dir)
+            if task_info is not None:
+                tasks.append(task_info)
         
         return jsonify({'success': True, 'tasks': tasks})
         
@@ -1083,6 +1102,32 @@ def scan_tasks():
         return jsonify({'success': False, 'message': str(e)})
 
 
+def _collect_task_info(downloader: BatchDownloader, task_dir: Path) -> Optional[Dict[str, Any]]:
+    """读取任务目录的原始URL和下载统计，无效目录返回None（启用任务索引时直接查询索引）"""
+    if not downloader._is_valid_task_directory(task_dir):
+        return None
+    
+    if downloader.task_catalog is not None:
+        stats = downloader.task_catalog.get_task(task_dir)
+        if stats is None:
+            return None
+        original_url = stats['url']
+    else:
+        csv_manager = CSVManager(task_dir)
+        original_url = csv_manager.get_original_url()
+        stats = csv_manager.get_download_stats()
+    
+    return {
+        'name': task_dir.name,
+        'path': str(task_dir),
+        'url': original_url,
+        'type': _identify_task_type(task_dir.name),
+        'total': stats['total'],
+        'downloaded': stats['downloaded'],
+        'pending': stats['pending']
+    }
+
+
 def _identify_task_type(dir_name: str) -> str:
     """根据目录名识别任务类型"""
     if dir_name.startswith('投稿视频-'):